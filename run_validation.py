@@ -1,12 +1,31 @@
+import argparse
+import contextlib
 import sys
 from pathlib import Path
 
+from sardou.cli import _parse_jobs
+from sardou.parallel import captured, default_jobs, imap
 from sardou.validation import validate_template
 
 
+def _validate(file):
+    result, logs = captured(validate_template, file)
+    return bool(result), logs
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Validate every template")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_parse_jobs,
+        default=default_jobs(),
+        help="Number of templates to validate in parallel (default: CPU count)",
+    )
+    args = parser.parse_args()
+
     templates_dir = Path("templates")
-    yaml_files = list(
+    yaml_files = sorted(
         templates_dir.rglob("*.yaml")
     )  # finds all YAML files inside subfolders
 
@@ -15,12 +34,14 @@ def main():
         sys.exit(0)
 
     success, fail = 0, 0
-    for file in yaml_files:
-        print(f"\nProcessing {file}...\n")
-        if validate_template(file):
-            success += 1
-        else:
-            fail += 1
+    with contextlib.closing(imap(_validate, yaml_files, args.jobs)) as outcomes:
+        for file, (ok, logs) in zip(yaml_files, outcomes):
+            print(f"\nProcessing {file}...\n")
+            print(logs, end="")
+            if ok:
+                success += 1
+            else:
+                fail += 1
 
     print("============================")
     print(f"{success} Successful")
@@ -0,0 +1,187 @@
+"""asyncio front-ends for import resolution and template validation.
+
+Puccini runs through :func:`asyncio.create_subprocess_exec`, so many
+templates can be validated from one event loop without a thread each.
+Import fetching and the YAML work around it stay synchronous — they are
+dominated by cache, mirror and lockfile hits — and are handed to the
+default executor.
+"""
+
+import asyncio
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import validation
+from .cache import DEFAULT_CACHE_DIR, fetch, resolve_imports
+from .scheduler import scheduler
+from .timings import timed
+
+# Puccini processes allowed to run at once per event loop.
+MAX_CONCURRENCY = os.cpu_count() or 4
+
+_semaphores: dict = {}
+
+
+def _semaphore() -> asyncio.Semaphore:
+    """Concurrency limit for the running event loop."""
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        for other in [other for other in _semaphores if other.is_closed()]:
+            del _semaphores[other]
+        sem = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return sem
+
+
+async def afetch(
+    url: str, cache_dir: Path = DEFAULT_CACHE_DIR, max_age: float | None = None
+) -> Path | None:
+    """Asynchronous :func:`sardou.cache.fetch`."""
+    return await asyncio.to_thread(fetch, url, cache_dir, max_age=max_age)
+
+
+async def aresolve_imports(data: dict, cache_dir: Path = DEFAULT_CACHE_DIR, **kwargs):
+    """Asynchronous :func:`sardou.cache.resolve_imports`."""
+    return await asyncio.to_thread(resolve_imports, data, cache_dir=cache_dir, **kwargs)
+
+
+async def _acquire() -> None:
+    """Take a scheduler slot without blocking the event loop or a thread."""
+    loop = asyncio.get_running_loop()
+    admitted = loop.create_future()
+
+    def grant():
+        if not admitted.done():
+            admitted.set_result(None)
+
+    ticket = scheduler.enqueue(lambda: loop.call_soon_threadsafe(grant))
+    try:
+        await admitted
+    except asyncio.CancelledError:
+        if not scheduler.withdraw(ticket):
+            # Admitted after all, just too late to be used.
+            scheduler.release()
+        raise
+
+
+async def _precheck(precheck) -> list:
+    """Run *precheck* on a thread of its own, as the blocking path does.
+
+    Other tasks may fill the default executor; a run holding a scheduler
+    slot must never wait behind them.
+    """
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(1, thread_name_prefix="sardou-precheck")
+    try:
+        return await loop.run_in_executor(pool, validation._safe_precheck, precheck)
+    finally:
+        pool.shutdown(wait=False)
+
+
+async def _run_puccini(document: bytes, precheck=None) -> subprocess.CompletedProcess:
+    args = validation._puccini_args()
+    async with _semaphore():
+        await _acquire()
+        start = time.perf_counter()
+        try:
+            return await _communicate(args, document, precheck)
+        finally:
+            scheduler.release()
+            scheduler.metrics.incr("puccini.runs")
+            scheduler.metrics.observe(
+                "puccini.run_seconds", time.perf_counter() - start
+            )
+
+
+async def _communicate(args, document, precheck) -> subprocess.CompletedProcess:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+    except FileNotFoundError:
+        raise validation._puccini_not_found()
+    timeout = scheduler.timeout
+    output = asyncio.ensure_future(
+        asyncio.wait_for(proc.communicate(document), timeout)
+    )
+    errors = []
+    try:
+        if precheck is not None:
+            errors = await _precheck(precheck)
+            if errors:
+                validation._kill(proc)
+        stdout, stderr = await output
+    except TimeoutError:
+        validation._kill(proc)
+        await proc.wait()
+        return validation._timed_out(timeout)
+    except asyncio.CancelledError:
+        # Puccini must be gone before its slot is released.
+        output.cancel()
+        validation._kill(proc)
+        await proc.wait()
+        raise
+    if errors:
+        return validation._precheck_failure(errors)
+    return subprocess.CompletedProcess(
+        args, proc.returncode, stdout.decode(), stderr.decode()
+    )
+
+
+def _timed(timings, stage, fn, *args):
+    with timed(timings, stage):
+        return fn(*args)
+
+
+async def avalidate_template(
+    input_data, locked=None, data=None, timings=None, errors=None
+):
+    """Asynchronous :func:`sardou.validation.validate_template`.
+
+    At most :data:`MAX_CONCURRENCY` Puccini processes run at once on each
+    event loop; further calls wait for a free slot.
+    """
+    yaml_data = await asyncio.to_thread(
+        validation.prevalidate,
+        input_data,
+        locked=locked,
+        data=data,
+        timings=timings,
+    )
+    key = await asyncio.to_thread(
+        _timed, timings, "result lookup", validation._result_key, yaml_data, input_data
+    )
+    result = validation.results.lookup(key, validation._puccini_args())
+    if result is None:
+        document = await asyncio.to_thread(
+            _timed, timings, "serialize", validation._serialize, yaml_data
+        )
+        with timed(timings, "puccini"):
+            result = await _run_puccini(
+                document, validation._prechecks_for(yaml_data, input_data)
+            )
+        validation._store(key, result)
+    return validation._failure_reported(
+        result, validation._file_label(input_data), errors
+    )
+
+
+async def aload(cls, path=None, content=None, locked=None):
+    """Build a *cls* (a :class:`sardou.Sardou`) without blocking the loop."""
+    path, source = cls._source(path, content)
+    timings = {}
+    errors = []
+    data = await asyncio.to_thread(validation.parse_template, source, timings)
+    template = await avalidate_template(
+        source, locked=locked, data=data, timings=timings, errors=errors
+    )
+    obj = cls.__new__(cls)
+    await asyncio.to_thread(obj._build, template, path, data, timings, errors)
+    return obj
@@ -1,18 +1,59 @@
+import contextlib
+import copy
+import hashlib
+import io
 import json
 import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
 from pathlib import Path
-from urllib.error import URLError
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
 
-from ruamel.yaml import YAML
+from ruamel.yaml.error import YAMLError
+
+from . import connections, mirrors
+from .metrics import Registry
+from .yamlio import ThreadLocalYAML
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sardou"
 
-yaml = YAML()
-yaml.width = 4096
+# Bounds for concurrent fetching while resolving one level of the import graph.
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+# Seconds a cached import is trusted without revalidating it upstream. When
+# unset, the upstream Cache-Control max-age decides.
+MAX_AGE_ENV = "SARDOU_CACHE_MAX_AGE"
+
+# Budget enforced by ``prune``: total bytes on disk, and seconds since an
+# entry was last used. Unset means unbounded.
+MAX_SIZE_ENV = "SARDOU_CACHE_MAX_SIZE"
+MAX_IDLE_ENV = "SARDOU_CACHE_MAX_IDLE"
+
+# Minimum seconds between automatic prunes of one cache dir by this process.
+AUTO_PRUNE_INTERVAL = 600
+
+# Leftover temp files older than this are assumed to belong to dead writers,
+# and orphaned blobs to have no writer about to link them.
+_STALE_TEMP_AGE = 3600
+
+yaml = ThreadLocalYAML(width=4096)
+
+# Fetch instrumentation. Counters (``fetch.*``): ``fresh`` (served without a
+# request), ``downloaded`` (200), ``not_modified`` (304), ``fallback`` (error,
+# cached copy used), ``failed`` (error, nothing cached), ``mirrored`` (read
+# from a local mirror) and ``bytes`` downloaded. ``fetch.seconds`` holds the
+# latency of every network request, overall and labelled by URL, and
+# ``resolve.seconds`` the duration of each ``resolve_imports`` call.
+metrics = Registry()
 
 
 def _meta_path(cached: Path) -> Path:
@@ -33,89 +74,662 @@ def _cached_path_for_url(cache_dir: Path, url: str) -> Path:
     return cache_dir / parsed.netloc / parsed.path.lstrip("/")
 
 
-def fetch(url: str, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+def _blob_path(cache_dir: Path, digest: str) -> Path:
+    return cache_dir / "blobs" / digest[:2] / digest
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write *data* to *path* through a temp file and a rename.
+
+    Readers in other threads or processes see either the old or the new
+    file, never a partially written one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def _store_blob(cache_dir: Path, data: bytes) -> str:
+    """Store *data* in the content-addressed blob store, returning its digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    blob = _blob_path(cache_dir, digest)
+    if not blob.exists():
+        _atomic_write(blob, data)
+    return digest
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _link_blob(cache_dir: Path, digest: str, path: Path, data: bytes) -> None:
+    """Atomically replace *path* with the blob *digest* of *data*.
+
+    A hard link is used so identical content reached through different URLs
+    is stored once; filesystems without hard links get a copy instead. If a
+    concurrent ``prune`` removed the blob as an orphan, it is stored again.
+    """
+    blob = _blob_path(cache_dir, digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(tmp)
+    try:
+        _link_or_copy(blob, tmp)
+    except FileNotFoundError:
+        _atomic_write(blob, data)
+        _link_or_copy(blob, tmp)
+    os.replace(tmp, path)
+
+
+def _store(cache_dir: Path, path: Path, data: bytes) -> str:
+    """Store *data* as a blob and expose it at *path*, returning its digest."""
+    digest = _store_blob(cache_dir, data)
+    _link_blob(cache_dir, digest, path, data)
+    return digest
+
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)")
+
+# cached path -> metadata of its last (re)validation by this process
+_validated: dict[Path, dict] = {}
+_validated_lock = threading.Lock()
+
+
+def _upstream_max_age(headers) -> int:
+    """Freshness lifetime, in seconds, granted by a Cache-Control header."""
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+def _configured_max_age(max_age: float | None) -> float | None:
+    if max_age is not None:
+        return max_age
+    value = os.getenv(MAX_AGE_ENV)
+    return float(value) if value else None
+
+
+def _read_meta(meta: Path) -> dict:
+    if not meta.exists():
+        return {}
+    return json.loads(meta.read_text())
+
+
+def _touch(meta: Path) -> None:
+    """Record an access for LRU eviction as the mtime of the ``.meta`` file.
+
+    The per-URL file itself can't carry it: its inode is shared with the
+    blob and with every other URL serving the same bytes.
+    """
+    with contextlib.suppress(OSError):
+        os.utime(meta)
+
+
+def _mark_fresh(cached: Path, meta: Path, etag, lifetime: int, digest) -> None:
+    """Record a successful (re)validation on disk and in this process."""
+    meta_data = {
+        "etag": etag,
+        "checked": time.time(),
+        "max_age": lifetime,
+        "digest": digest,
+    }
+    _atomic_write(meta, json.dumps(meta_data).encode())
+    with _validated_lock:
+        _validated[cached] = meta_data
+
+
+def _is_fresh(meta_data: dict | None, max_age: float | None) -> bool:
+    if not meta_data or meta_data.get("checked") is None:
+        return False
+    lifetime = max_age if max_age is not None else meta_data.get("max_age") or 0
+    return time.time() < meta_data["checked"] + lifetime
+
+
+def fetch(
+    url: str, cache_dir: Path = DEFAULT_CACHE_DIR, max_age: float | None = None
+) -> Path:
     """Fetch *url*, returning a local cached path.
 
-    Uses ETag for conditional requests — a 304 reuses the existing
+    While the cached copy is fresh no request is made at all. Freshness lasts
+    *max_age* seconds after the last (re)validation; when *max_age* is None it
+    is read from ``$SARDOU_CACHE_MAX_AGE``, falling back to the upstream
+    Cache-Control max-age.
+
+    Otherwise uses ETag for conditional requests — a 304 reuses the existing
     cached file; a 200 stores the new content and ETag.
     Falls back to the cached copy on network errors.
+
+    Requests share the process-wide keep-alive pool in
+    :mod:`sardou.connections`.
+
+    Content is kept in a blob store keyed by its SHA-256 digest; the returned
+    per-URL path is a link to that blob, swapped in atomically, and the
+    ``.meta`` sidecar records the digest.
     """
     cached = _cached_path_for_url(cache_dir, url)
     meta = _meta_path(cached)
+    max_age = _configured_max_age(max_age)
 
-    etag = None
-    if meta.exists():
-        etag = json.loads(meta.read_text()).get("etag")
+    with _validated_lock:
+        meta_data = _validated.get(cached)
+    if not _is_fresh(meta_data, max_age):
+        # Another process may have revalidated more recently.
+        meta_data = _read_meta(meta)
+    if _is_fresh(meta_data, max_age) and cached.exists():
+        logger.debug("Cached (fresh): %s", url)
+        metrics.incr("fetch.fresh")
+        with _validated_lock:
+            _validated[cached] = meta_data
+        _touch(meta)
+        return cached
 
-    req = Request(url)
+    etag = meta_data.get("etag")
+    headers = {}
     if etag and cached.exists():
-        req.add_header("If-None-Match", etag)
+        headers["If-None-Match"] = etag
 
+    started = time.perf_counter()
     try:
-        resp = urlopen(req, timeout=10)
-        # 200 — new or updated content
-        cached.parent.mkdir(parents=True, exist_ok=True)
-        cached.write_bytes(resp.read())
-        new_etag = resp.headers.get("ETag")
-        if new_etag:
-            meta.write_text(json.dumps({"etag": new_etag}))
-        logger.debug("Cached (fresh): %s", url)
-    except URLError as exc:
-        if hasattr(exc, "code") and exc.code == 304:
-            logger.debug("Cached (not modified): %s", url)
-        elif cached.exists():
-            logger.warning("Network error fetching %s — using cached copy", url)
-        else:
-            logger.warning("Failed to fetch %s — skipping cache", url)
-            return None
+        resp = connections.get(url, headers)
+    except (OSError, HTTPException) as exc:
+        resp = None
+        logger.debug("Error fetching %s: %s", url, exc)
+    metrics.observe("fetch.seconds", time.perf_counter() - started, label=url)
+
+    if resp is not None and resp.status == 200:
+        # New or updated content
+        digest = hashlib.sha256(resp.body).hexdigest()
+        if digest != meta_data.get("digest") or not cached.exists():
+            _store(cache_dir, cached, resp.body)
+        _mark_fresh(
+            cached,
+            meta,
+            resp.headers.get("ETag"),
+            _upstream_max_age(resp.headers),
+            digest,
+        )
+        logger.debug("Cached (downloaded): %s", url)
+        metrics.incr("fetch.downloaded")
+        metrics.incr("fetch.bytes", len(resp.body))
+    elif resp is not None and resp.status == 304:
+        _mark_fresh(
+            cached,
+            meta,
+            etag,
+            _upstream_max_age(resp.headers),
+            meta_data.get("digest"),
+        )
+        logger.debug("Cached (not modified): %s", url)
+        metrics.incr("fetch.not_modified")
+    elif cached.exists():
+        logger.warning("Network error fetching %s — using cached copy", url)
+        metrics.incr("fetch.fallback")
+    else:
+        logger.warning("Failed to fetch %s — skipping cache", url)
+        metrics.incr("fetch.failed")
+        return None
 
+    _touch(meta)
     return cached
 
 
-def resolve_imports(
-    data: dict, cache_dir: Path = DEFAULT_CACHE_DIR, _seen: set | None = None
+def _entry_key(path: Path) -> Path:
+    """Per-URL cached path that *path* (a file, ``.meta`` or ``.resolved``) belongs to."""
+    if path.suffix == ".meta":
+        return path.with_suffix("")
+    if path.suffix == ".resolved":
+        return path.with_suffix("")
+    stem = Path(path.stem)
+    if stem.suffix == ".resolved":
+        return path.with_name(stem.stem + path.suffix)
+    return path
+
+
+def _scan(cache_dir: Path):
+    """Stat every file in the cache once, without reading any content.
+
+    Returns ``(entries, blobs, temps)``. *entries* maps each per-URL cached
+    path to ``(last_access, [(path, stat), ...])``, where the last access is
+    the mtime of its ``.meta`` file (or of the file itself if it has none);
+    *blobs* and *temps* are lists of ``(path, stat)``.
+    """
+    groups: dict[Path, list] = {}
+    blobs, temps = [], []
+    blob_root = cache_dir / "blobs"
+    for root, _, names in os.walk(cache_dir):
+        root = Path(root)
+        for name in names:
+            path = root / name
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if name.startswith("."):
+                temps.append((path, st))
+            elif root.parent == blob_root:
+                blobs.append((path, st))
+            else:
+                groups.setdefault(_entry_key(path), []).append((path, st))
+
+    entries = {}
+    for key, files in groups.items():
+        mtimes = {path: st.st_mtime for path, st in files}
+        access = mtimes.get(_meta_path(key)) or mtimes.get(key)
+        entries[key] = (access or max(mtimes.values()), files)
+    return entries, blobs, temps
+
+
+def stats(cache_dir: Path = DEFAULT_CACHE_DIR) -> dict:
+    """Summarise the cache in one metadata-only pass over its files."""
+    entries, blobs, temps = _scan(cache_dir)
+    inodes = {}
+    for _, files in entries.values():
+        for _, st in files:
+            inodes[(st.st_dev, st.st_ino)] = st.st_size
+    linked = set(inodes)
+    for _, st in blobs + temps:
+        inodes[(st.st_dev, st.st_ino)] = st.st_size
+    accessed = [access for access, _ in entries.values()]
+    return {
+        "entries": len(entries),
+        "blobs": len(blobs),
+        "orphaned_blobs": sum((st.st_dev, st.st_ino) not in linked for _, st in blobs),
+        "temp_files": len(temps),
+        "size": sum(inodes.values()),
+        "oldest_access": min(accessed, default=None),
+        "newest_access": max(accessed, default=None),
+    }
+
+
+def _unlink(path: Path) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+
+
+def prune(
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    max_size: int | None = None,
+    max_idle: float | None = None,
+    keep_since: float | None = None,
 ) -> dict:
-    """Rewrite remote URLs in *imports* to local cached paths, recursively."""
-    if _seen is None:
-        _seen = set()
+    """Evict least recently used entries until the cache fits its budget.
+
+    Entries unused for more than *max_idle* seconds are removed, then the
+    oldest remaining entries until no more than *max_size* bytes are used.
+    Entries accessed at or after *keep_since* are never evicted. Blobs no
+    longer linked from any entry, and stale temp files, are removed too;
+    blobs written in the last hour are kept, as a writer may be about to
+    link them.
+    Runs in one ``stat`` pass plus a sort, whatever the cache size.
+    """
+    entries, blobs, temps = _scan(cache_dir)
+    now = time.time()
+
+    # Bytes are only freed once the last link to an inode goes, so count
+    # the links held by entries and size each inode once.
+    refs: dict[tuple, int] = {}
+    sizes: dict[tuple, int] = {}
+    for _, files in entries.values():
+        for _, st in files:
+            inode = (st.st_dev, st.st_ino)
+            refs[inode] = refs.get(inode, 0) + 1
+            sizes[inode] = st.st_size
+    # Blobs not linked from any entry are removed below regardless.
+    total = sum(sizes.values())
+
+    evicted = 0
+    for key, (access, files) in sorted(entries.items(), key=lambda e: e[1][0]):
+        # Sorted oldest first, so once an entry is kept all later ones are.
+        if keep_since is not None and access >= keep_since:
+            break
+        idle = max_idle is not None and now - access > max_idle
+        over = max_size is not None and total > max_size
+        if not (idle or over):
+            break
+        for path, st in files:
+            _unlink(path)
+            inode = (st.st_dev, st.st_ino)
+            refs[inode] -= 1
+            if not refs[inode]:
+                total -= sizes[inode]
+        with _validated_lock:
+            _validated.pop(key, None)
+        evicted += 1
+
+    removed_blobs = 0
+    for path, st in blobs:
+        if now - st.st_mtime <= _STALE_TEMP_AGE:
+            continue
+        if not refs.get((st.st_dev, st.st_ino)):
+            _unlink(path)
+            removed_blobs += 1
+    for path, st in temps:
+        if now - st.st_mtime > _STALE_TEMP_AGE:
+            _unlink(path)
+
+    return {"evicted": evicted, "removed_blobs": removed_blobs, "size": total}
+
+
+def clear(cache_dir: Path = DEFAULT_CACHE_DIR) -> None:
+    """Remove everything in the cache."""
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    with _validated_lock:
+        _validated.clear()
+    with _memo_lock:
+        _parsed.clear()
+        _written.clear()
+
+
+def env_budget() -> tuple[int | None, float | None]:
+    """The ``(max_size, max_idle)`` budget configured in the environment."""
+    max_size, max_idle = os.getenv(MAX_SIZE_ENV), os.getenv(MAX_IDLE_ENV)
+    return (
+        int(max_size) if max_size else None,
+        float(max_idle) if max_idle else None,
+    )
+
+
+_last_auto_prune: dict[Path, float] = {}
+_auto_prune_lock = threading.Lock()
+
+
+def _maybe_prune(cache_dir: Path, keep_since: float) -> None:
+    """Apply the ``$SARDOU_CACHE_MAX_SIZE``/``$SARDOU_CACHE_MAX_IDLE`` budget,
+    at most once every ``AUTO_PRUNE_INTERVAL`` seconds per cache dir."""
+    max_size, max_idle = env_budget()
+    if max_size is None and max_idle is None:
+        return
+    now = time.monotonic()
+    with _auto_prune_lock:
+        last = _last_auto_prune.get(cache_dir)
+        if last is not None and now - last < AUTO_PRUNE_INTERVAL:
+            return
+        _last_auto_prune[cache_dir] = now
+    prune(cache_dir, max_size, max_idle, keep_since=keep_since)
 
+
+_host_limits: dict[tuple[str, int], threading.BoundedSemaphore] = {}
+_host_limits_lock = threading.Lock()
+
+
+def _host_limit(url: str, per_host: int) -> threading.BoundedSemaphore:
+    """Process-wide semaphore capping concurrent fetches to one host."""
+    key = (urlparse(url).netloc, per_host)
+    with _host_limits_lock:
+        sem = _host_limits.get(key)
+        if sem is None:
+            sem = _host_limits[key] = threading.BoundedSemaphore(per_host)
+    return sem
+
+
+def _fetch_limited(
+    url: str, cache_dir: Path, per_host: int, max_age: float | None
+) -> Path | None:
+    with _host_limit(url, per_host):
+        return fetch(url, cache_dir, max_age)
+
+
+def _remote_imports(data: dict):
+    """Yield the import entries of *data* that point at http(s) URLs."""
     for imp in data.get("imports", []):
         if not isinstance(imp, dict):
             continue
-
         url = imp.get("url", "")
-        if not url.startswith(("http://", "https://")):
-            continue
+        if url.startswith(("http://", "https://")):
+            yield imp, url
 
-        if url in _seen:
-            cached = _cached_path_for_url(cache_dir, url)
-            resolved = _resolved_path(cached)
-            imp["url"] = str(resolved if resolved.exists() else cached)
-            continue
 
-        _seen.add(url)
-        local = fetch(url, cache_dir)
-        if local is None:
-            continue
+def _import_target(
+    url: str,
+    targets: dict,
+    failed: set,
+    seen: set,
+    cache_dir: Path,
+    mirror_table: dict,
+) -> str | None:
+    """Local path an import of *url* is rewritten to, or None to leave it."""
+    if url in targets:
+        return str(targets[url])
+    if url in seen and url not in failed:
+        # Resolved by an earlier call sharing the same ``_seen`` set.
+        cached = _cached_path_for_url(cache_dir, url)
+        local = mirrors.lookup(url, mirror_table) or cached
+        resolved = _resolved_path(cached)
+        return str(resolved if resolved.exists() else local)
+    return None
+
+
+def _rewrite_imports(data: dict, *target_args) -> None:
+    for imp, url in _remote_imports(data):
+        target = _import_target(url, *target_args)
+        if target is not None:
+            imp["url"] = target
+
+
+def _signature(path: Path) -> tuple | None:
+    """Cheap identity of a file's current content: a new inode, size or
+    mtime means it was replaced or modified."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+# path -> (signature, pristine parsed document) for imported documents
+_parsed: dict[Path, tuple[tuple, object]] = {}
+# .resolved path -> (inputs it was written from, its signature afterwards)
+_written: dict[Path, tuple[tuple, tuple]] = {}
+_memo_lock = threading.Lock()
+
+
+def _load_nested(path: Path):
+    """Parse the imported document at *path*, reusing the previous parse
+    while the file is unchanged. The result must not be mutated."""
+    signature = _signature(path)
+    with _memo_lock:
+        memo = _parsed.get(path)
+    if memo is not None and memo[0] == signature:
+        return memo[1]
+    with path.open("r") as f:
+        doc = yaml.load(f)
+    with _memo_lock:
+        _parsed[path] = (signature, doc)
+    return doc
+
+
+def _import_urls(data) -> list:
+    """Every import location in *data*, local or remote."""
+    if not isinstance(data, dict):
+        return []
+    urls = []
+    for imp in data.get("imports") or []:
+        url = imp.get("url") if isinstance(imp, dict) else imp
+        if isinstance(url, str):
+            urls.append(url)
+    return urls
+
 
-        # Verify the cached file is valid YAML before rewriting the URL.
-        # Always read the *pristine* cached copy so its original http(s)
-        # imports are revalidated on every call.
-        with local.open("r") as f:
-            nested = yaml.load(f)
-        if not isinstance(nested, dict):
+def walk_imports(data: dict, base: Path):
+    """Yield ``(location, path, document)`` for each file *data* imports,
+    transitively, once each.
+
+    Relative imports are anchored at *base*, then at the importing file's
+    directory. Imports still pointing at a URL (their fetch failed) give
+    ``(url, None, None)``; files that are missing or not YAML have no
+    document. Documents come from :func:`_load_nested` and must not be
+    mutated.
+    """
+    seen = set()
+    pending = [(url, base) for url in _import_urls(data)]
+    while pending:
+        url, parent = pending.pop()
+        if "://" in url:
+            yield url, None, None
             continue
+        path = (parent / url).resolve()
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            doc = _load_nested(path)
+        except (OSError, YAMLError) as e:
+            logger.debug("Not following imports of %s: %s", path, e)
+            doc = None
+        yield str(path), path, doc
+        pending.extend((u, path.parent) for u in _import_urls(doc))
+
+
+def _write_resolved(
+    cache_dir: Path, resolved: Path, local: Path, nested, mirrored: bool, *target_args
+) -> None:
+    """(Re)write the import-rewritten copy of *local* at *resolved*, unless
+    the copy on disk was already produced from the same inputs."""
+    targets = tuple(
+        _import_target(url, *target_args) for _, url in _remote_imports(nested)
+    )
+    inputs = (local, _signature(local), targets)
+    with _memo_lock:
+        written = _written.get(resolved)
+    if written == (inputs, _signature(resolved)):
+        return
+
+    nested = copy.deepcopy(nested)
+    if mirrored:
+        mirrors.absolutize_imports(nested, local.parent)
+    _rewrite_imports(nested, *target_args)
+    buf = io.StringIO()
+    yaml.dump(nested, buf)
+    content = buf.getvalue().encode()
+
+    # Another process may already have written identical content.
+    if _signature(resolved) is None or resolved.read_bytes() != content:
+        _store(cache_dir, resolved, content)
+    with _memo_lock:
+        _written[resolved] = (inputs, _signature(resolved))
+
+
+def resolve_imports(
+    data: dict,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    _seen: set | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    max_age: float | None = None,
+    mirror_table: dict | None = None,
+    closure: dict | None = None,
+) -> dict:
+    """Rewrite remote URLs in *imports* to local cached paths, recursively.
+
+    URLs under a prefix in *mirror_table* (by default
+    :func:`sardou.mirrors.configured_mirrors`, which maps this repository's
+    profiles onto the copies bundled with Sardou) are read from disk without
+    any network access.
+
+    The import graph is walked breadth-first. All new URLs found on one level
+    are fetched concurrently, using at most *max_workers* threads and at most
+    *per_host* simultaneous requests to any one host. *max_age* is passed
+    on to :func:`fetch`.
+
+    If a *closure* dict is given, it is filled with an entry
+    ``{"path": <local path>, "imports": [<urls>]}`` for every URL resolved.
+    """
+    if _seen is None:
+        _seen = set()
+    started_perf = time.perf_counter()
+    if mirror_table is None:
+        mirror_table = mirrors.configured_mirrors()
+    started = time.time()
+
+    # url -> local path that importers should point at
+    targets: dict[str, Path] = {}
+    failed: set[str] = set()
+    # url -> remote urls imported by that document
+    edges: dict[str, list[str]] = {}
+    # (rewritten copy path, source path, parsed document, mirrored) for nested
+    # docs with imports
+    nested_docs: list[tuple[Path, Path, dict, bool]] = []
+
+    level = [data]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while level:
+            urls = []
+            for doc in level:
+                for _, url in _remote_imports(doc):
+                    if url not in _seen:
+                        _seen.add(url)
+                        urls.append(url)
+
+            mirrored = {url: mirrors.lookup(url, mirror_table) for url in urls}
+            remote = [url for url in urls if mirrored[url] is None]
+            metrics.incr("fetch.mirrored", len(urls) - len(remote))
+            fetched = pool.map(
+                lambda u: _fetch_limited(u, cache_dir, per_host, max_age), remote
+            )
+            local_paths = {**mirrored, **dict(zip(remote, fetched))}
+
+            level = []
+            for url in urls:
+                local = local_paths[url]
+                if local is None:
+                    failed.add(url)
+                    continue
+
+                # Verify the cached file is valid YAML before rewriting the URL.
+                # Always read the *pristine* cached copy so its original http(s)
+                # imports are revalidated on every call.
+                nested = _load_nested(local)
+                if not isinstance(nested, dict):
+                    failed.add(url)
+                    continue
+
+                resolved = _resolved_path(_cached_path_for_url(cache_dir, url))
+                if mirrored[url] is not None:
+                    # Bundled files are read-only and their relative imports
+                    # already work, so only copy those that import URLs.
+                    if any(_remote_imports(nested)):
+                        edges[url] = [u for _, u in _remote_imports(nested)]
+                        targets[url] = resolved
+                        nested_docs.append((resolved, local, nested, True))
+                        level.append(nested)
+                    else:
+                        targets[url] = local
+                elif nested.get("imports"):
+                    edges[url] = [u for _, u in _remote_imports(nested)]
+                    targets[url] = resolved
+                    nested_docs.append((resolved, local, nested, False))
+                    level.append(nested)
+                else:
+                    targets[url] = local
 
-        # Recursively resolve imports inside the nested document. The pristine
-        # cached file is never overwritten; the rewritten copy goes to a
-        # sibling ".resolved" file which Puccini reads offline.
-        if nested.get("imports"):
-            resolve_imports(nested, cache_dir, _seen)
-            resolved = _resolved_path(local)
-            with resolved.open("w") as f:
-                yaml.dump(nested, f)
-            imp["url"] = str(resolved)
-        else:
-            imp["url"] = str(local)
+    # The pristine cached file is never overwritten; the rewritten copy goes
+    # to a sibling ".resolved" file which Puccini reads offline. Every target
+    # path is known up front, so shared and cyclic imports rewrite correctly.
+    target_args = (targets, failed, _seen, cache_dir, mirror_table)
+    for resolved, local, nested, mirrored in reversed(nested_docs):
+        _write_resolved(cache_dir, resolved, local, nested, mirrored, *target_args)
 
+    _rewrite_imports(data, *target_args)
+    if closure is not None:
+        for url, path in targets.items():
+            closure[url] = {"path": path, "imports": edges.get(url, [])}
+    if targets:
+        # Never evict what this call just resolved.
+        _maybe_prune(cache_dir, keep_since=started - 1)
+    metrics.observe("resolve.seconds", time.perf_counter() - started_perf)
     return data
@@ -1,20 +1,189 @@
 import argparse
+import contextlib
 import glob
 import logging
+import os
+import re
 import sys
+import time
 import traceback
 from pathlib import Path
 
 from ruamel.yaml.error import YAMLError
 
-from sardou import Sardou
+from sardou import Sardou, cache, connections, results
+from sardou.metrics import format_snapshot, merge_snapshots
+from sardou.parallel import captured, default_jobs, imap
+from sardou.scheduler import scheduler
+from sardou.timings import format_timings
 
+_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+_DURATIONS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_size(value):
+    """Parse a byte count such as ``500M`` or ``2G``."""
+    match = re.fullmatch(r"(\d+)\s*([kmg]?)i?b?", value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+
+def _parse_jobs(value):
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"invalid job count: {value}")
+    return jobs
+
+
+def _parse_duration(value):
+    """Parse a duration such as ``90s``, ``12h`` or ``30d``."""
+    match = re.fullmatch(r"(\d+)\s*([smhd]?)", value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value}")
+    return int(match.group(1)) * _DURATIONS[match.group(2)]
+
+
+def _format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _format_time(timestamp):
+    if timestamp is None:
+        return "-"
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def _stats():
+    return {
+        "cache": cache.metrics.snapshot(),
+        "results": results.metrics.snapshot(),
+        "puccini": scheduler.metrics.snapshot(),
+        "connections": connections.stats(),
+    }
+
+
+def _merge_stats(stats):
+    pools = [s["connections"] for s in stats]
+    return {
+        "cache": merge_snapshots(s["cache"] for s in stats),
+        "results": merge_snapshots(s["results"] for s in stats),
+        "puccini": merge_snapshots(s["puccini"] for s in stats),
+        "connections": {key: sum(p[key] for p in pools) for key in pools[0]},
+    }
+
+
+def print_cache_stats(stats=None):
+    """Print *stats* (by default this process's) as collected by ``_stats``."""
+    stats = _stats() if stats is None else stats
+    print("Import cache:")
+    print(format_snapshot(stats["cache"]))
+    pool = stats["connections"]
+    print(
+        f"connections: requests={pool['requests']} "
+        f"handshakes={pool['handshakes']} reused={pool['reused']}"
+    )
+    print("Validation results:")
+    print(format_snapshot(stats["results"]))
+    print("Puccini:")
+    print(format_snapshot(stats["puccini"]))
+
+
+def _parse_file(job):
+    """Parse one template in a worker.
+
+    Returns ``(error, log output, pid, stats, timings)``; *error* is None on
+    success, *stats* are the worker's cumulative statistics and *timings*
+    the template's stage timings (None if it failed).
+    """
+    target_path, locked, verbose = job
+
+    def parse():
+        try:
+            sardou = Sardou(str(target_path), locked=locked)
+        except (OSError, ValueError, TypeError, KeyError, YAMLError) as e:
+            if verbose:
+                return traceback.format_exc(), None
+            return f"Error parsing TOSCA template: {e}\n", None
+        return None, sardou.timings
+
+    (error, timings), logs = captured(parse, level=logging.INFO)
+    return error, logs, os.getpid(), _stats(), timings
+
+
+def cache_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="sardou cache", description="Manage the Sardou import cache"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=cache.DEFAULT_CACHE_DIR,
+        help=f"Cache directory (default: {cache.DEFAULT_CACHE_DIR})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show cache size and usage")
+    prune_parser = commands.add_parser(
+        "prune", help="Evict least recently used entries"
+    )
+    prune_parser.add_argument(
+        "--max-size",
+        type=_parse_size,
+        help=f"Size budget, e.g. 200M (default: ${cache.MAX_SIZE_ENV})",
+    )
+    prune_parser.add_argument(
+        "--max-idle",
+        type=_parse_duration,
+        help=f"Evict entries unused for this long, e.g. 30d "
+        f"(default: ${cache.MAX_IDLE_ENV})",
+    )
+    commands.add_parser("clear", help="Remove everything from the cache")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        info = cache.stats(args.cache_dir)
+        print(f"Cache directory: {args.cache_dir}")
+        print(f"Entries:         {info['entries']}")
+        print(f"Blobs:           {info['blobs']} ({info['orphaned_blobs']} orphaned)")
+        print(f"Size:            {_format_size(info['size'])}")
+        print(f"Oldest access:   {_format_time(info['oldest_access'])}")
+        print(f"Newest access:   {_format_time(info['newest_access'])}")
+    elif args.command == "prune":
+        env_size, env_idle = cache.env_budget()
+        max_size = env_size if args.max_size is None else args.max_size
+        max_idle = env_idle if args.max_idle is None else args.max_idle
+        if max_size is None and max_idle is None:
+            parser.error("prune needs --max-size and/or --max-idle")
+        result = cache.prune(args.cache_dir, max_size=max_size, max_idle=max_idle)
+        print(
+            f"Evicted {result['evicted']} entries and {result['removed_blobs']} "
+            f"blobs; {_format_size(result['size'])} in use"
+        )
+    elif args.command == "clear":
+        cache.clear(args.cache_dir)
+        print(f"Cleared {args.cache_dir}")
+
+    sys.exit(0)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["cache"]:
+        cache_main(argv[1:])
 
-def main():
     logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     parser = argparse.ArgumentParser(
-        description="Sardou - TOSCA template parser and processor"
+        description="Sardou - TOSCA template parser and processor",
+        epilog="Run 'sardou cache --help' to manage the import cache.",
     )
     parser.add_argument(
         "path",
@@ -25,8 +194,31 @@ def main():
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose output"
     )
+    parser.add_argument(
+        "--locked",
+        action="store_true",
+        default=None,
+        help="Resolve imports from sardou.lock, creating or updating it as needed",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print import cache and fetch statistics when done",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long each stage of parsing every template took",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_parse_jobs,
+        default=default_jobs(),
+        help="Number of templates to validate in parallel (default: CPU count)",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Expand glob patterns and collect all files
     files = []
@@ -42,28 +234,39 @@ def main():
         print("Error: No files found matching the given path(s)", file=sys.stderr)
         sys.exit(1)
 
-    # Process each file
+    targets = []
     for file_path in files:
         target_path = Path(file_path).resolve()
         if not target_path.exists():
             print(f"Error: Path does not exist: {file_path}", file=sys.stderr)
             sys.exit(1)
+        targets.append(target_path)
 
-        if args.verbose:
-            print(f"Parsing TOSCA template: {target_path}")
+    # Validate on a worker pool, reporting in the order given
+    worker_stats = {}
+    jobs = [(target, args.locked, args.verbose) for target in targets]
+    with contextlib.closing(imap(_parse_file, jobs, args.jobs)) as outcomes:
+        for target_path, outcome in zip(targets, outcomes):
+            error, logs, pid, stats, timings = outcome
+            worker_stats[pid] = stats
+            if args.verbose:
+                print(f"Parsing TOSCA template: {target_path}", flush=True)
+            sys.stderr.write(logs)
 
-        try:
-            Sardou(str(target_path))
+            if error is not None:
+                sys.stderr.write(error)
+                if args.cache_stats:
+                    print_cache_stats(_merge_stats(worker_stats.values()))
+                sys.exit(1)
 
             if args.verbose:
                 print("Successfully parsed TOSCA template")
-        except (OSError, ValueError, TypeError, KeyError, YAMLError) as e:
-            if args.verbose:
-                traceback.print_exc(file=sys.stderr)
-            else:
-                print(f"Error parsing TOSCA template: {e}", file=sys.stderr)
-            sys.exit(1)
+            if args.timings:
+                print(f"Timings for {target_path}:")
+                print(format_timings(timings))
 
+    if args.cache_stats:
+        print_cache_stats(_merge_stats(worker_stats.values()))
     sys.exit(0)
 
 
@@ -11,7 +11,7 @@ def get_cluster(rdt, resource_suffix=None):
 
     resources = {}
 
-    for name, node in rdt.nodeTemplates._to_dict().items():
+    for name, node in rdt.nodeTemplates._synced().items():
         is_resource = any(
             t.get("parent", "").endswith(resource_suffix) or k.endswith(resource_suffix)
             for k, t in node.get("types", {}).items()
@@ -0,0 +1,170 @@
+import http.client
+import logging
+import ssl
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, getproxies, proxy_bypass, urlopen
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+# Idle keep-alive connections retained per host.
+DEFAULT_MAX_IDLE = 4
+MAX_REDIRECTS = 5
+
+_REDIRECTS = {301, 302, 303, 307, 308}
+# Raised when a kept-alive connection turns out to have been closed by the
+# server; the request is retried once on a new connection.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class Response:
+    """A fully read HTTP response."""
+
+    def __init__(self, status: int, headers, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class ConnectionPool:
+    """Per-host pool of persistent (keep-alive) HTTP/HTTPS connections.
+
+    Connections are returned to the pool after each fully read response and
+    reused by later requests to the same host, so a TCP+TLS handshake is
+    only paid once per host and concurrent request. Thread-safe; each
+    connection is used by one thread at a time.
+    """
+
+    def __init__(self, max_idle: int = DEFAULT_MAX_IDLE, timeout=DEFAULT_TIMEOUT):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle: dict[tuple, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = None
+        self._stats = {"handshakes": 0, "requests": 0, "reused": 0}
+
+    def stats(self) -> dict:
+        """Counts of requests made, new connections opened, and reuses."""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _new_connection(self, scheme: str, host: str, port):
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: tuple):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+        return self._new_connection(*key), False
+
+    def _release(self, key: tuple, conn) -> None:
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def _request_once(self, url: str, headers: dict) -> Response:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                if conn.sock is None:
+                    self._count("handshakes")
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                # The server dropped the idle connection; retry on a new one.
+                conn.close()
+                conn, reused = self._new_connection(*key), False
+                self._count("handshakes")
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+            body = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        self._count("requests")
+        if reused:
+            self._count("reused")
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return Response(resp.status, resp.headers, body)
+
+    def get(self, url: str, headers: dict | None = None) -> Response:
+        """GET *url*, following redirects. Non-2xx statuses are returned,
+        not raised; network failures raise ``OSError`` or
+        ``http.client.HTTPException``."""
+        headers = dict(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self._request_once(url, headers)
+            location = resp.headers.get("Location")
+            if resp.status not in _REDIRECTS or not location:
+                return resp
+            url = urljoin(url, location)
+        raise http.client.HTTPException(f"Too many redirects fetching {url}")
+
+
+def _proxied(url: str) -> bool:
+    parts = urlsplit(url)
+    return parts.scheme in getproxies() and not proxy_bypass(parts.hostname or "")
+
+
+def _urlopen_get(url: str, headers: dict, timeout) -> Response:
+    """Fallback through urllib, which knows how to talk to proxies."""
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as resp:
+            return Response(resp.status, resp.headers, resp.read())
+    except HTTPError as exc:
+        return Response(exc.code, exc.headers, b"")
+
+
+_pool = ConnectionPool()
+
+
+def get(url: str, headers: dict | None = None) -> Response:
+    """GET *url* over the process-wide keep-alive pool.
+
+    Requests that must go through a proxy configured in the environment use
+    ``urllib`` instead, as the pool only speaks to origin servers directly.
+    """
+    if _proxied(url):
+        return _urlopen_get(url, dict(headers or {}), _pool.timeout)
+    return _pool.get(url, headers)
+
+
+def stats() -> dict:
+    """Connection statistics for the process-wide pool."""
+    return _pool.stats()
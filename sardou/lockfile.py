@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from .cache import (
+    DEFAULT_CACHE_DIR,
+    _atomic_write,
+    _remote_imports,
+    resolve_imports,
+)
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = "sardou.lock"
+LOCK_VERSION = 1
+
+# Set to a truthy value to resolve imports from lockfiles by default.
+LOCKED_ENV = "SARDOU_LOCKED"
+
+
+def locked_by_default() -> bool:
+    return os.getenv(LOCKED_ENV, "").lower() in ("1", "true", "yes")
+
+
+def lock_path_for(template: Path | None, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    """``sardou.lock`` next to *template*, or in the cache for inline content."""
+    if template is None:
+        return cache_dir / LOCK_NAME
+    return template.parent / LOCK_NAME
+
+
+def _digest(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def read_lock(lock_path: Path) -> dict:
+    """URL entries of the lockfile at *lock_path*; empty if missing or invalid."""
+    try:
+        lock = json.loads(lock_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if lock.get("version") != LOCK_VERSION:
+        return {}
+    return lock.get("imports", {})
+
+
+def _locked_closure(urls, entries: dict) -> dict | None:
+    """Lock entries reachable from *urls*, if all are present and intact."""
+    closure = {}
+    pending = list(urls)
+    while pending:
+        url = pending.pop()
+        if url in closure:
+            continue
+        entry = entries.get(url)
+        if entry is None:
+            return None
+        if _digest(Path(entry["path"])) != entry["digest"]:
+            logger.info("Lockfile digest mismatch for %s — re-resolving", url)
+            return None
+        closure[url] = entry
+        pending.extend(entry.get("imports", []))
+    return closure
+
+
+def write_lock(lock_path: Path, closure: dict) -> None:
+    """Merge resolved *closure* entries into the lockfile at *lock_path*."""
+    entries = read_lock(lock_path)
+    for url, entry in closure.items():
+        digest = _digest(entry["path"])
+        if digest is None:
+            continue
+        entries[url] = {
+            "path": str(entry["path"]),
+            "digest": digest,
+            "imports": entry["imports"],
+        }
+    lock = {"version": LOCK_VERSION, "imports": dict(sorted(entries.items()))}
+    _atomic_write(lock_path, (json.dumps(lock, indent=2) + "\n").encode())
+
+
+def resolve_locked(
+    data: dict, lock_path: Path, cache_dir: Path = DEFAULT_CACHE_DIR
+) -> dict:
+    """Rewrite remote imports in *data* from the lockfile at *lock_path*.
+
+    No fetching or parsing of imported documents happens as long as every
+    URL reachable from *data* is locked and the files it points at still
+    match their recorded digests. Otherwise the imports are resolved as
+    usual with :func:`sardou.cache.resolve_imports` and the lock updated.
+    """
+    urls = [url for _, url in _remote_imports(data)]
+    if not urls:
+        return data
+
+    entries = read_lock(lock_path)
+    if _locked_closure(urls, entries) is not None:
+        for imp, url in _remote_imports(data):
+            imp["url"] = entries[url]["path"]
+        logger.debug("Imports resolved from %s", lock_path)
+        return data
+
+    closure = {}
+    resolve_imports(data, cache_dir=cache_dir, closure=closure)
+    write_lock(lock_path, closure)
+    return data
@@ -0,0 +1,140 @@
+import bisect
+import math
+import threading
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+
+class Histogram:
+    """Count, sum, min, max and bucketed distribution of observed values."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "mean": self.sum / self.count if self.count else None,
+            "buckets": dict(zip(self.buckets, self.counts)),
+        }
+
+
+class Registry:
+    """Thread-safe set of named counters and (optionally labelled) histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._histograms: dict[tuple[str, str | None], Histogram] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, label: str | None = None) -> None:
+        """Record *value* in histogram *name*, and in its *label* series."""
+        with self._lock:
+            keys = [(name, None)] if label is None else [(name, None), (name, label)]
+            for key in keys:
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = Histogram()
+                hist.observe(value)
+
+    def snapshot(self) -> dict:
+        """Plain-dict copy of every counter and histogram.
+
+        Labelled series appear under ``"labels"``, keyed by histogram name
+        then label.
+        """
+        with self._lock:
+            histograms, labels = {}, {}
+            for (name, label), hist in self._histograms.items():
+                if label is None:
+                    histograms[name] = hist.snapshot()
+                else:
+                    labels.setdefault(name, {})[label] = hist.snapshot()
+            return {
+                "counters": dict(self._counters),
+                "histograms": histograms,
+                "labels": labels,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """Human-readable rendering of :meth:`Registry.snapshot`."""
+    lines = []
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"{name}: {value:g}")
+    for name, hist in sorted(snapshot["histograms"].items()):
+        lines.append(_format_histogram(name, hist))
+        for label, series in sorted(snapshot["labels"].get(name, {}).items()):
+            lines.append("  " + _format_histogram(label, series))
+    return "\n".join(lines)
+
+
+def _format_histogram(name: str, hist: dict) -> str:
+    if not hist["count"]:
+        return f"{name}: no observations"
+    return (
+        f"{name}: count={hist['count']} mean={hist['mean'] * 1000:.1f}ms "
+        f"min={hist['min'] * 1000:.1f}ms max={hist['max'] * 1000:.1f}ms"
+    )
+
+
+def merge_snapshots(snapshots) -> dict:
+    """Combine :meth:`Registry.snapshot` results, e.g. from worker processes."""
+    merged = {"counters": {}, "histograms": {}, "labels": {}}
+    for snapshot in snapshots:
+        for name, value in snapshot["counters"].items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + value
+        for name, hist in snapshot["histograms"].items():
+            merged["histograms"][name] = _merge_histogram(
+                merged["histograms"].get(name), hist
+            )
+        for name, series in snapshot["labels"].items():
+            labels = merged["labels"].setdefault(name, {})
+            for label, hist in series.items():
+                labels[label] = _merge_histogram(labels.get(label), hist)
+    return merged
+
+
+def _merge_histogram(a: dict | None, b: dict) -> dict:
+    if a is None:
+        return dict(b, buckets=dict(b["buckets"]))
+    count = a["count"] + b["count"]
+    total = a["sum"] + b["sum"]
+    mins = [v for v in (a["min"], b["min"]) if v is not None]
+    maxes = [v for v in (a["max"], b["max"]) if v is not None]
+    buckets = dict(a["buckets"])
+    for bound, n in b["buckets"].items():
+        buckets[bound] = buckets.get(bound, 0) + n
+    return {
+        "count": count,
+        "sum": total,
+        "min": min(mins, default=None),
+        "max": max(maxes, default=None),
+        "mean": total / count if count else None,
+        "buckets": buckets,
+    }
@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_PACKAGE_DIR = Path(__file__).parent
+
+# Profiles ship inside the wheel as sardou/profiles; a source checkout keeps
+# them at the repository root.
+PROFILES_DIR = next(
+    (
+        path
+        for path in (_PACKAGE_DIR / "profiles", _PACKAGE_DIR.parent / "profiles")
+        if path.is_dir()
+    ),
+    _PACKAGE_DIR / "profiles",
+)
+
+_REPO_RAW = "https://raw.githubusercontent.com/Swarmchestrate/tosca"
+
+# URL prefix -> local directory holding the same files.
+DEFAULT_MIRRORS = {
+    f"{_REPO_RAW}/refs/heads/main/profiles/": PROFILES_DIR,
+    f"{_REPO_RAW}/main/profiles/": PROFILES_DIR,
+}
+
+# Path to a JSON object of extra ``{"<url prefix>": "<directory>"}`` entries.
+# Mapping a prefix to null disables it, including the defaults.
+MIRRORS_ENV = "SARDOU_MIRRORS"
+
+
+def configured_mirrors() -> dict[str, Path]:
+    """The default mirror table merged with the one named by ``$SARDOU_MIRRORS``."""
+    mirrors = dict(DEFAULT_MIRRORS)
+    config = os.getenv(MIRRORS_ENV)
+    if config:
+        with open(config) as f:
+            for prefix, directory in json.load(f).items():
+                if directory is None:
+                    mirrors.pop(prefix, None)
+                else:
+                    mirrors[prefix] = Path(directory).expanduser()
+    return mirrors
+
+
+def lookup(url: str, mirrors: dict[str, Path]) -> Path | None:
+    """Local file mirroring *url*, or None if no existing file maps to it.
+
+    The longest matching prefix wins.
+    """
+    for prefix in sorted(mirrors, key=len, reverse=True):
+        if url.startswith(prefix):
+            local = Path(mirrors[prefix]) / url[len(prefix) :]
+            if local.is_file():
+                logger.debug("Mirrored: %s -> %s", url, local)
+                return local
+            return None
+    return None
+
+
+def absolutize_imports(data: dict, base: Path, existing_only: bool = False) -> None:
+    """Anchor relative imports in *data* at *base*, so a rewritten copy stored
+    elsewhere still finds the files next to the original.
+
+    With *existing_only*, imports not naming a file under *base* are left
+    as they are.
+    """
+    imports = data.get("imports") or []
+    for i, imp in enumerate(imports):
+        url = imp.get("url") if isinstance(imp, dict) else imp
+        if not isinstance(url, str) or "://" in url or Path(url).is_absolute():
+            continue
+        if existing_only and not (base / url).is_file():
+            continue
+        if isinstance(imp, dict):
+            imp["url"] = str(base / url)
+        else:
+            imports[i] = str(base / url)
@@ -0,0 +1,97 @@
+"""In-process cache of validated templates, behind :meth:`sardou.Sardou.open`.
+
+Entries are keyed on the resolved template path and remember the SHA-256 of
+the template and of every local file it imports. While those are unchanged,
+opening the path again returns a copy-on-write clone of the cached Sardou
+without parsing or validating anything; a file whose content changed, not
+merely its mtime, gets the template validated again. Remote imports are
+not refetched while the template is cached.
+
+Beyond *size* templates, the least recently opened are dropped.
+"""
+
+import collections
+import os
+import threading
+from pathlib import Path
+
+from .metrics import Registry
+from .results import _file_digest, _import_digests
+
+# Templates kept (default: 32); 0 turns the cache off.
+SIZE_ENV = "SARDOU_OPEN_CACHE_SIZE"
+DEFAULT_SIZE = 32
+
+
+class OpenCache:
+    """LRU of up to *size* validated Sardou objects.
+
+    Counters: ``open.hits``, ``open.misses`` (including changed files) and
+    ``open.evictions``.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.size = size
+        self.metrics = Registry()
+        # (class, resolved path, locked) -> (digests, Sardou)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        size = os.getenv(SIZE_ENV)
+        return cls(int(size) if size else DEFAULT_SIZE)
+
+    def open(self, cls, path, locked=None):
+        """A clone of the cached *cls* for *path*, building it if needed."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"File does not exist: {path}")
+        path = path.resolve()
+        key = (cls, path, locked)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            digests, sardou = entry
+            if digests == (_file_digest(path), _imports(path, sardou)):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                self.metrics.incr("open.hits")
+                return sardou._clone()
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+
+        self.metrics.incr("open.misses")
+        # Taken first: if the file changes while it is validated, the next
+        # open sees a different digest.
+        digest = _file_digest(path)
+        sardou = cls(path, locked=locked)
+        if self.size <= 0:
+            return sardou
+        digests = (digest, _imports(path, sardou))
+        with self._lock:
+            self._entries[key] = (digests, sardou)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.metrics.incr("open.evictions")
+        return sardou._clone()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _imports(path: Path, sardou) -> list:
+    """Digests of the files imported by *sardou*, built from *path*."""
+    return _import_digests(sardou.raw._synced(), path.parent)
+
+
+# Shared by every Sardou.open in this process.
+open_cache = OpenCache.from_env()
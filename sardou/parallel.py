@@ -0,0 +1,58 @@
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def captured(fn, *args, level=logging.WARNING):
+    """Call *fn*, returning ``(result, log output)``.
+
+    Log records of *level* and above are formatted as ``%(message)s`` into
+    the returned text instead of going to the root logger's handlers, so
+    the caller decides when, and in what order, they are shown. The level
+    is set here because a worker process started by spawn or forkserver
+    does not inherit the parent's logging configuration.
+    """
+    root = logging.getLogger()
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.setLevel(level)
+    saved_handlers, saved_level = root.handlers[:], root.level
+    root.handlers = [handler]
+    root.setLevel(level)
+    try:
+        result = fn(*args)
+    finally:
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+    return result, stream.getvalue()
+
+
+def imap(fn, items, jobs: int | None = None):
+    """Yield ``fn(item)`` for each of *items*, in order, computed on up to
+    *jobs* (default: CPU count) worker processes.
+
+    Results are yielded as soon as they and every earlier one are ready.
+    Closing the generator early cancels work not yet started. With one job,
+    everything runs in this process.
+    """
+    items = list(items)
+    jobs = min(jobs or default_jobs(), len(items))
+    if jobs <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(fn, item) for item in items]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
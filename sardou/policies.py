@@ -7,7 +7,7 @@ def _get_policies(sat, suffix, incl_type=False):
     if not hasattr(sat, "policies"):
         return {}
 
-    policies = sat.policies._to_dict()
+    policies = sat.policies._synced()
     result = {}
 
     for name, policy in policies.items():
@@ -21,7 +21,7 @@ def _get_policies(sat, suffix, incl_type=False):
         if incl_type:
             policy_data["type"] = list(types.keys())[-1]
 
-        raw_policies = sat.raw._to_dict()["service_template"]["policies"]
+        raw_policies = sat.raw._synced()["service_template"]["policies"]
         for raw_policy in raw_policies:
             if name not in raw_policy:
                 continue
@@ -51,7 +51,7 @@ def get_affinity(sat):
     if not hasattr(sat, "nodeTemplates"):
         return {}
 
-    nodes = sat.nodeTemplates._to_dict()
+    nodes = sat.nodeTemplates._synced()
     microservices = [
         name for name, node in nodes.items()
         if any(
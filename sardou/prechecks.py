@@ -0,0 +1,138 @@
+"""Fast structural checks on a prevalidated template.
+
+These run in plain Python alongside Puccini and catch mistakes that would
+otherwise only surface after a full parse, so Puccini can be stopped early.
+"""
+
+import logging
+from pathlib import Path
+
+from .cache import walk_imports
+
+logger = logging.getLogger(__name__)
+
+CAPACITY = "Capacity"
+MICROSERVICE = "Microservice"
+
+MIXED_KINDS = "Invalid template: cannot have both Capacity and Microservice definitions"
+
+
+def _local_name(type_name) -> str:
+    """``swch:Microservice`` -> ``Microservice``."""
+    return str(type_name).rsplit(":", 1)[-1]
+
+
+def _type_parents(data: dict, base: Path) -> dict[str, str]:
+    """Unqualified node type name -> unqualified parent, from *data* and
+    everything it imports."""
+    parents = {}
+    documents = [data] + [doc for _, _, doc in walk_imports(data, base)]
+    for doc in documents:
+        if not isinstance(doc, dict):
+            continue
+        for name, definition in (doc.get("node_types") or {}).items():
+            if isinstance(definition, dict) and definition.get("derived_from"):
+                parents.setdefault(
+                    _local_name(name), _local_name(definition["derived_from"])
+                )
+    return parents
+
+
+def _ancestry(type_name, parents: dict) -> set:
+    names = set()
+    name = _local_name(type_name)
+    while name not in names:
+        names.add(name)
+        name = parents.get(name, name)
+    return names
+
+
+# Besides types, what a file without a service_template can usefully hold.
+LIBRARY_KEYS = ("profile", "imports", "repositories")
+
+
+def check_structure(data: dict) -> list[str]:
+    has_types = any(key.endswith("_types") and data[key] for key in data)
+    template = data.get("service_template")
+    if template is None:
+        # Profiles and the files they import may only gather other files.
+        if has_types or any(data.get(key) for key in LIBRARY_KEYS):
+            return []
+        return ["Template has no service_template and defines no types"]
+    if not isinstance(template, dict):
+        return ["service_template must be a mapping"]
+    return []
+
+
+def check_policy_targets(data: dict) -> list[str]:
+    template = data.get("service_template") or {}
+    known = set(template.get("node_templates") or {}) | set(
+        template.get("groups") or {}
+    )
+    errors = []
+    for policy in template.get("policies") or []:
+        if not isinstance(policy, dict):
+            continue
+        for name, definition in policy.items():
+            if not isinstance(definition, dict):
+                continue
+            for target in definition.get("targets") or []:
+                if target not in known:
+                    errors.append(
+                        f"Policy '{name}' targets unknown node template '{target}'"
+                    )
+    return errors
+
+
+def check_node_kinds(data: dict, base: Path) -> list[str]:
+    nodes = (data.get("service_template") or {}).get("node_templates") or {}
+    types = {
+        node["type"]
+        for node in nodes.values()
+        if isinstance(node, dict) and "type" in node
+    }
+    if not types:
+        return []
+    parents = _type_parents(data, base)
+    kinds = set()
+    for type_name in types:
+        kinds |= _ancestry(type_name, parents) & {CAPACITY, MICROSERVICE}
+    if kinds == {CAPACITY, MICROSERVICE}:
+        return [MIXED_KINDS]
+    return []
+
+
+def check_reconfiguration(data: dict) -> list[str]:
+    from .validation import validate_reconfiguration
+
+    try:
+        validate_reconfiguration(data)
+    except ValueError as e:
+        return [str(e)]
+    return []
+
+
+def _run(check, *args) -> list[str]:
+    try:
+        return check(*args)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        # Puccini has the final say on templates a check cannot read.
+        logger.debug(f"Pre-check {check.__name__} skipped: {e}")
+        return []
+
+
+def run_prechecks(data: dict, base: Path) -> list[str]:
+    """Fatal problems found in the prevalidated template *data*.
+
+    *base* is the directory relative imports are anchored at. An empty list
+    means nothing obviously wrong; Puccini has the final say. A check that
+    cannot read the template is skipped without affecting the others.
+    """
+    errors = _run(check_structure, data)
+    if errors:
+        return errors
+    return (
+        _run(check_policy_targets, data)
+        + _run(check_node_kinds, data, base)
+        + _run(check_reconfiguration, data)
+    )
@@ -1,9 +1,8 @@
 import copy
 
-from ruamel.yaml import YAML
+from .yamlio import ThreadLocalYAML
 
-rdt_yaml = YAML()
-rdt_yaml.default_flow_style = False
+rdt_yaml = ThreadLocalYAML(default_flow_style=False, width=4096)
 
 
 def _validate_offer_against_cdt(selected_offer: dict, cdt_nodes: dict) -> None:
@@ -27,7 +26,7 @@ def _validate_offer_against_cdt(selected_offer: dict, cdt_nodes: dict) -> None:
 
 
 def generate_rdt(template, selected_offer: dict, output_path: str = "rdt.yaml") -> dict:
-    source = template.raw._to_dict()
+    source = template.raw._synced()
 
     rdt = {}
     rdt["tosca_definitions_version"] = source.get(
@@ -82,7 +81,6 @@ def generate_rdt(template, selected_offer: dict, output_path: str = "rdt.yaml")
     rdt["service_template"] = {"node_templates": new_node_templates}
 
     with open(output_path, "w") as f:
-        rdt_yaml.width = 4096
         for key, value in rdt.items():
             rdt_yaml.dump({key: value}, f)
             f.write("\n")
@@ -0,0 +1,155 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR, _atomic_write, _signature, walk_imports
+from .metrics import Registry
+
+logger = logging.getLogger(__name__)
+
+# Set to a falsy value (0, false, no) to always run Puccini.
+RESULTS_ENV = "SARDOU_RESULT_CACHE"
+
+# Bump when the key or the stored format changes.
+_KEY_VERSION = 3
+
+# Counters ``results.hits`` and ``results.misses``.
+metrics = Registry()
+
+# path -> (signature, sha256) of imported files
+_digests: dict[Path, tuple[tuple, str]] = {}
+# (command, signature of the binary) -> version output
+_versions: dict[tuple, str | None] = {}
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.getenv(RESULTS_ENV, "").lower() not in ("0", "false", "no")
+
+
+def results_dir(cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    return cache_dir / "results"
+
+
+def puccini_version(cmd: str) -> str | None:
+    """Output of ``<cmd> version``, remembered while the binary is unchanged."""
+    key = (cmd, _signature(Path(cmd)))
+    with _lock:
+        if key in _versions:
+            return _versions[key]
+    try:
+        proc = subprocess.run(
+            [cmd, "version"], check=False, capture_output=True, text=True
+        )
+        version = proc.stdout.strip() if proc.returncode == 0 else None
+    except OSError:
+        version = None
+    with _lock:
+        _versions[key] = version
+    return version
+
+
+def _file_digest(path: Path) -> str | None:
+    signature = _signature(path)
+    if signature is None:
+        return None
+    with _lock:
+        memo = _digests.get(path)
+    if memo is not None and memo[0] == signature:
+        return memo[1]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _lock:
+        _digests[path] = (signature, digest)
+    return digest
+
+
+def _import_digests(data: dict, base: Path) -> list:
+    """``(import, digest)`` for every file *data* imports, transitively.
+
+    Imports still pointing at a URL (their fetch failed) are keyed by the
+    URL alone.
+    """
+    found = [
+        (location, None if path is None else _file_digest(path))
+        for location, path, _ in walk_imports(data, base)
+    ]
+    return sorted(found, key=lambda item: item[0])
+
+
+def template_key(data, base: Path, cmd: str, flags: list) -> str | None:
+    """Digest of everything a Puccini run on *data* depends on.
+
+    Covers the canonicalized prevalidated template, the content of every
+    file it imports, the Puccini flags and the Puccini version. *base* is
+    the directory relative imports are anchored at. None if caching is off
+    or the Puccini version is unknown.
+    """
+    if not enabled():
+        return None
+    return _inputs_key(data, base, cmd, flags)
+
+
+def _inputs_key(data, base: Path, cmd: str, flags: list) -> str | None:
+    """:func:`template_key`, whether or not caching is on."""
+    if not data:
+        return None
+    version = puccini_version(cmd)
+    if version is None:
+        return None
+    material = {
+        "version": _KEY_VERSION,
+        "template": data,
+        "imports": _import_digests(data, base),
+        "flags": list(flags),
+        "puccini": version,
+    }
+    canonical = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _entry_path(key: str, cache_dir: Path) -> Path:
+    return results_dir(cache_dir) / key[:2] / f"{key}.json"
+
+
+def lookup(
+    key: str | None, args: list, cache_dir: Path = DEFAULT_CACHE_DIR
+) -> subprocess.CompletedProcess | None:
+    """The stored Puccini run for *key*, reported as if run with *args*."""
+    if key is None:
+        return None
+    path = _entry_path(key, cache_dir)
+    try:
+        entry = json.loads(path.read_text())
+        result = subprocess.CompletedProcess(
+            args, entry["returncode"], entry["stdout"], entry["stderr"]
+        )
+    except (OSError, ValueError, KeyError):
+        metrics.incr("results.misses")
+        return None
+    # Keep the entry at the young end of the cache's LRU order.
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    metrics.incr("results.hits")
+    logger.debug("Reusing Puccini result %s", key)
+    return result
+
+
+def store(
+    key: str | None,
+    result: subprocess.CompletedProcess,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+) -> None:
+    # Runs killed by a signal (e.g. timed out) say nothing about the template.
+    if key is None or result.returncode < 0:
+        return
+    entry = {
+        "returncode": result.returncode,
+        "stdout": result.stdout,
+        "stderr": result.stderr,
+    }
+    _atomic_write(_entry_path(key, cache_dir), json.dumps(entry).encode())
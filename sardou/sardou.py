@@ -1,7 +1,10 @@
+import copy
+import datetime
 import json
+from functools import partial, wraps
 from pathlib import Path
 
-from ruamel.yaml import YAML
+from ruamel.yaml.scalarbool import ScalarBoolean
 
 from .capacities import extract_capacities
 from .cluster import get_cluster as _get_cluster
@@ -12,25 +15,252 @@ from .policies import get_reconfiguration as _get_reconfiguration
 from .policies import get_scheduling as _get_scheduling
 from .rdt import generate_rdt as _generate_rdt
 from .requirements import tosca_to_ask_dict
+from .timings import report as _report_timings
+from .timings import timed
 from .validation import (
     TemplateKind,
     classify_template,
+    parse_template,
     post_validate,
     requires_kind,
     validate_template,
 )
 
-yaml = YAML(typ="safe")
+
+def _unwrap(value):
+    """*value* as plain data, for storing in a DotDict."""
+    if isinstance(value, DotDict):
+        return value._to_dict()
+    if isinstance(value, list) and any(isinstance(v, DotDict) for v in value):
+        return [_unwrap(v) for v in value]
+    return value
+
+
+def _private_copy(private, value):
+    """Shallow copy of *value*, recorded in *private* as the clone's own."""
+    value = copy.copy(value)
+    private[id(value)] = value
+    return value
+
+
+def _private_tree(private, value):
+    """*value* with every dict and list in it the clone's own, copying
+    those still shared."""
+    if not isinstance(value, (dict, list)):
+        return value
+    if id(value) not in private:
+        value = _private_copy(private, value)
+    items = value.items() if isinstance(value, dict) else enumerate(value)
+    for k, v in list(items):
+        owned = _private_tree(private, v)
+        if owned is not v:
+            value[k] = owned
+    return value
+
+
+def _nested_lists(value) -> bool:
+    """Whether a list anywhere in *value* holds another list."""
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        children = value.values() if isinstance(value, dict) else value
+        for child in children:
+            if isinstance(child, list) and isinstance(value, list):
+                return True
+            if isinstance(child, (dict, list)):
+                pending.append(child)
+    return False
+
+
+# Memo entry of an unchanged clone: the Sardou it was cloned from
+_ORIGIN = "origin"
+
+
+def _memoized(method):
+    """Remember *method*'s result per Sardou and arguments until the
+    template changes. Callers get a deep copy, so cannot alter it."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._sync()
+        memo = self._state["memo"]
+        origin = memo.get(_ORIGIN)
+        if origin is not None:
+            return getattr(origin, method.__name__)(*args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in memo:
+            memo[key] = method(self, *args, **kwargs)
+        return copy.deepcopy(memo[key])
+
+    return wrapper
 
 
 class DotDict:
+    """Attribute access to a dict.
+
+    The dict is kept as is and is what :meth:`_to_dict` returns; changes
+    made through the DotDict go straight into it. Nested dicts, and dicts
+    in lists, are wrapped the first time they are reached, so building a
+    DotDict costs nothing however large the data.
+
+    In a clone (see :meth:`Sardou._clone`) the data starts out shared with
+    the original, and each dict or list is copied the first time it is
+    changed, together with those leading to it.
+    """
+
+    # Attributes holding the DotDict's own state rather than data
+    _INTERNAL = ("_data", "_views", "_state", "_owner")
+
     def __init__(self, **entries):
-        for k, v in entries.items():
-            if isinstance(v, dict):
-                v = DotDict(**v)
-            elif isinstance(v, list):
-                v = [DotDict(**i) if isinstance(i, dict) else i for i in v]
-            setattr(self, k, v)
+        self._attach({k: _unwrap(v) for k, v in entries.items()})
+
+    def _attach(self, data, state=None, owner=None):
+        # key -> (value, its wrapper, the items a list held when last
+        # synced) for values reached so far
+        object.__setattr__(self, "_views", {})
+        # Shared by every wrapper of one template. Until any of them is
+        # modified, holds Puccini's JSON output ("json") and accessor
+        # results ("memo"). In a clone, "private" maps id() to each dict
+        # and list copied so far.
+        object.__setattr__(self, "_state", state)
+        object.__setattr__(self, "_data", data)
+        # In a clone: called with the data when it is first changed, puts a
+        # copy in the parent's place and returns it
+        object.__setattr__(self, "_owner", owner)
+
+    @classmethod
+    def _wrap(cls, data, state=None, owner=None):
+        view = DotDict.__new__(DotDict)
+        view._attach(data, state, owner)
+        return view
+
+    def _private(self):
+        """The clone's record of copied data, or None if not a clone."""
+        state = self.__dict__.get("_state")
+        return None if state is None else state.get("private")
+
+    def _own(self):
+        """Copy this view's dict if it is still shared, before changing it."""
+        private = self._private()
+        if private is None or id(self._data) in private:
+            return
+        if self._owner is None:
+            data = _private_copy(private, self._data)
+        else:
+            data = self._owner(self._data)
+        object.__setattr__(self, "_data", data)
+
+    def _put(self, key, old, new):
+        """Replace *old*, the value at *key*, with *new*, keeping its wrapper."""
+        if self._data.get(key) is not old:
+            return
+        self._data[key] = new
+        cached = self._views.get(key)
+        if cached is not None and cached[0] is old:
+            self._views[key] = (new, *cached[1:])
+
+    def _replace(self, key, old):
+        """The value at *key* made this clone's own, for changing it."""
+        private = self._private()
+        if private is None or id(old) in private:
+            return old
+        self._own()
+        new = _private_copy(private, old)
+        self._put(key, old, new)
+        return new
+
+    def _replace_item(self, key, old):
+        """Like :meth:`_replace`, for the dict *old* in the list at *key*."""
+        items = self._data.get(key)
+        if isinstance(items, list) and any(v is old for v in items):
+            items = self._replace(key, items)
+            index = next(i for i, v in enumerate(items) if v is old)
+            new = items[index] = _private_copy(self._private(), old)
+            cached = self._views.get(key)
+            if cached is not None and cached[2] is not None:
+                # Not a change for _sync_list to write back or rewrap
+                cached[2][:] = [new if v is old else v for v in cached[2]]
+            return new
+        # No longer in the template: changes to it go nowhere
+        return _private_copy(self._private(), old)
+
+    def _own_tree(self):
+        """Make everything under this view the clone's own."""
+        self._own()
+        for key, (value, view, _) in list(self._views.items()):
+            if self._data.get(key) is not value:
+                continue
+            views = [view] if isinstance(view, DotDict) else view
+            for v in views:
+                if isinstance(v, DotDict):
+                    v._own_tree()
+        private = self._private()
+        for key, value in list(self._data.items()):
+            self._put(key, value, _private_tree(private, value))
+
+    def __getattr__(self, key):
+        # Only reached when normal lookup fails, i.e. for data keys.
+        if key.startswith("__") or key in DotDict._INTERNAL:
+            raise AttributeError(key)
+        try:
+            value = self._data[key]
+        except KeyError:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {key!r}"
+            ) from None
+        if isinstance(value, (dict, list)):
+            return self._view(key, value)
+        return value
+
+    def _view(self, key, value):
+        cached = self._views.get(key)
+        if cached is not None and cached[0] is value:
+            if cached[2] is not None and not _same(value, cached[2]):
+                self._sync_list(key)
+            return cached[1]
+        if isinstance(value, dict):
+            clone = self._private() is not None
+            owner = partial(self._replace, key) if clone else None
+            view = DotDict._wrap(value, self._state, owner)
+        else:
+            view = self._wrap_items(key, value)
+        self._views[key] = (value, view, _items(value))
+        return view
+
+    def _wrap_items(self, key, items):
+        """Wrappers for the dicts in *items*, the list at *key*."""
+        clone = self._private() is not None
+        owner = partial(self._replace_item, key) if clone else None
+        return [
+            DotDict._wrap(v, self._state, owner) if isinstance(v, dict) else v
+            for v in items
+        ]
+
+    def __setattr__(self, key, value):
+        self._own()
+        self._data[key] = _unwrap(value)
+        private = self._private()
+        if private is not None and isinstance(self._data[key], (dict, list)):
+            private[id(self._data[key])] = self._data[key]
+        self._views.pop(key, None)
+        if isinstance(value, DotDict):
+            self._views[key] = (self._data[key], value, None)
+        self._modified()
+
+    def __delattr__(self, key):
+        self._own()
+        try:
+            del self._data[key]
+        except KeyError:
+            raise AttributeError(key) from None
+        self._views.pop(key, None)
+        self._modified()
+
+    def _modified(self):
+        state = self.__dict__.get("_state")
+        if state is not None:
+            state["json"] = None
+            state["memo"].clear()
 
     def __getitem__(self, key):
         return getattr(self, key)
@@ -45,27 +275,155 @@ class DotDict:
         return hasattr(self, key)
 
     def __repr__(self):
-        return repr(self._to_dict())
+        return repr(self._synced())
 
-    def _to_dict(self):
-        result = {}
-        for key, value in self.__dict__.items():
-            if isinstance(value, DotDict):
-                result[key] = value._to_dict()
-            elif isinstance(value, list):
-                result[key] = [
-                    v._to_dict() if isinstance(v, DotDict) else v for v in value
-                ]
+    def _sync(self):
+        """Write lists of wrappers changed in place back into the data."""
+        for key, (value, view, _) in list(self._views.items()):
+            if self._data.get(key) is not value:
+                continue
+            if isinstance(view, DotDict):
+                view._sync()
             else:
-                result[key] = value
-        return result
+                self._sync_list(key)
+
+    def _sync_list(self, key):
+        """Reconcile the wrappers of the list at *key* with the list.
+
+        Wrappers changed in place are written back into the data; if only
+        the list itself changed (through :meth:`_to_dict`), the wrappers are
+        rebuilt from it instead.
+        """
+        value, view, synced = self._views[key]
+        items = [v._synced() if isinstance(v, DotDict) else v for v in view]
+        if not _same(items, value):
+            source = value if _same(items, synced) else view
+            private = self._private()
+            if private is not None:
+                # Plain dicts added are the caller's, not the original's
+                for v in source:
+                    if isinstance(v, dict):
+                        private[id(v)] = v
+            if source is view:
+                value = self._replace(key, value)
+                value[:] = items
+            # Wrap anything added as a plain dict, keeping the list callers
+            # may still hold.
+            view[:] = self._wrap_items(key, source)
+            self._modified()
+        self._views[key] = (value, view, _items(value))
+
+    def __reduce__(self):
+        return (DotDict._wrap, (self._synced(),))
+
+    def _synced(self):
+        """The underlying dict, for reading only: changes made to it are
+        not noticed, and in a clone would reach the original."""
+        self._sync()
+        return self._data
+
+    def _to_dict(self):
+        """The underlying dict itself, not a copy.
+
+        Callers may change it, so the cached JSON and accessor results are
+        dropped.
+        """
+        self._sync()
+        if self._private() is not None:
+            self._own_tree()
+        self._modified()
+        return self._data
 
     def _to_json(self, indent=None, **kwargs):
-        return json.dumps(self._to_dict(), indent=indent, **kwargs)
+        return json.dumps(self._synced(), indent=indent, **kwargs)
+
+
+def _items(value):
+    """What a list holds now, to tell later whether it was changed."""
+    return list(value) if isinstance(value, list) else None
+
+
+def _same(items, other) -> bool:
+    return len(items) == len(other) and all(a is b for a, b in zip(items, other))
+
+
+def _plain(value):
+    """*value* as the safe loader would give it: ruamel's commented
+    containers and scalar subclasses become plain dicts, lists and scalars."""
+    if isinstance(value, dict):
+        return {_plain(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, ScalarBoolean):
+        return bool(value)
+    if isinstance(value, datetime.datetime) and type(value) is not datetime.datetime:
+        return datetime.datetime.combine(value.date(), value.timetz())
+    for plain in (str, int, float):
+        if isinstance(value, plain) and type(value) not in (plain, bool):
+            return plain(value)
+    return value
+
+
+def _restore(cls, data, raw, kind, path):
+    """Unpickle a Sardou: *data* is its template, *raw* the original."""
+    sardou = cls.__new__(cls)
+    sardou._attach(data, {"json": None, "memo": {}})
+    sardou.path = path
+    sardou.kind = kind
+    sardou.raw = DotDict._wrap(raw, {"json": None, "memo": sardou._state["memo"]})
+    sardou.timings = {}
+    return sardou
 
 
 class Sardou(DotDict):
-    def __init__(self, path=None, content=None):
+    # Attributes describing the template rather than part of it
+    _META = ("path", "kind", "raw", "timings")
+
+    def __setattr__(self, key, value):
+        if key in self._META:
+            object.__setattr__(self, key, value)
+            if "_state" in self.__dict__:
+                self._state["memo"].clear()
+        else:
+            super().__setattr__(key, value)
+
+    def __init__(self, path=None, content=None, locked=None):
+        path, source = self._source(path, content)
+        timings = {}
+        errors = []
+        # Parsed once: Puccini's input and ``raw`` both come from this.
+        data = parse_template(source, timings)
+        template = validate_template(
+            source, locked=locked, data=data, timings=timings, errors=errors
+        )
+        self._build(template, path, data, timings, errors)
+
+    @classmethod
+    async def aload(cls, path=None, content=None, locked=None):
+        """Asynchronous constructor, for use from an asyncio event loop.
+
+        Validation runs through :func:`sardou.aio.avalidate_template`, so
+        Puccini does not block the loop.
+        """
+        from .aio import aload
+
+        return await aload(cls, path=path, content=content, locked=locked)
+
+    @classmethod
+    def open(cls, path, locked=None):
+        """The validated template at *path*, validated again only once the
+        file or a local file it imports has changed.
+
+        Each call returns a new copy-on-write clone of a cached Sardou, so
+        changes made to one are not seen by the others.
+        """
+        from .opened import open_cache
+
+        return open_cache.open(cls, path, locked=locked)
+
+    @staticmethod
+    def _source(path, content):
+        """Check constructor arguments; return ``(path, validation source)``."""
         if path is None and content is None:
             raise ValueError("Either 'path' or 'content' must be provided")
 
@@ -77,64 +435,155 @@ class Sardou(DotDict):
             path = Path(path)
             if not path.exists():
                 raise FileNotFoundError(f"File does not exist: {path}")
-            self.path = path
-            source = path
-        else:
-            self.path = None
-            source = content
+            return path, path
+        return None, content
 
-        template = validate_template(source)
+    def _build(self, template, path, raw, timings=None, errors=()):
+        """Populate from a Puccini result and the parsed original template.
+
+        *timings* (see :mod:`sardou.timings`) gets the remaining stages and
+        becomes the ``timings`` attribute. If validation failed, the
+        ValueError raised includes the messages in *errors*.
+        """
+        timings = {} if timings is None else timings
+        self.path = path
         if not template:
             label = str(path) if path else "provided content"
-            raise ValueError(f"Validation failed for: {label}")
+            reasons = "".join(f"\n{error}" for error in errors if error)
+            raise ValueError(f"Validation failed for: {label}{reasons}")
 
-        resolved = yaml.load(template.stdout)
-        super().__init__(**resolved)
+        with timed(timings, "output parse"):
+            resolved = json.loads(template.stdout)
+        with timed(timings, "dotdict build"):
+            self._attach(resolved, {"json": None, "memo": {}})
 
-        if path is not None:
-            with path.open("r") as f:
-                raw = yaml.load(f)
-        elif isinstance(content, dict):
-            raw = content
-        else:
-            raw = yaml.load(content)
+        with timed(timings, "classify"):
+            self.kind = classify_template(self)
+        with timed(timings, "raw build"):
+            # A copy in plain types: the parse is ruamel's round-trip one,
+            # and a dict passed as content is the caller's.
+            raw = _plain(raw)
+            # Changes to raw affect accessor results but not the JSON.
+            self.raw = DotDict._wrap(raw, {"json": None, "memo": self._state["memo"]})
+        with timed(timings, "post validate"):
+            post_validate(raw)
+        self.timings = timings
+        self._state["json"] = template.stdout
+        _report_timings(self, timings)
+
+    def _clone(self):
+        """A copy sharing this Sardou's data, which it copies piecemeal as
+        it is changed. Until then, accessor results come from this Sardou.
+        This Sardou must not be changed afterwards."""
+        clone = type(self).__new__(type(self))
+        clone.path = self.path
+        clone.kind = self.kind
+        clone.timings = {}
+        private = {}
+        memo = {_ORIGIN: self}
+
+        def shared(data):
+            # Lists directly inside lists are handed out unwrapped, so they
+            # cannot be copied on write: such templates are copied up front.
+            return _private_tree(private, data) if _nested_lists(data) else data
+
+        clone.raw = DotDict._wrap(
+            shared(self.raw._synced()),
+            {"json": None, "memo": memo, "private": private},
+        )
+        clone._attach(
+            shared(self._synced()),
+            {"json": self._state["json"], "memo": memo, "private": private},
+        )
+        return clone
+
+    def save_snapshot(self, path):
+        """Save this validated template to *path* for :meth:`load_snapshot`."""
+        from .snapshot import save
+
+        save(self, path)
+
+    @classmethod
+    def load_snapshot(cls, path, template=None):
+        """Load a template saved by :meth:`save_snapshot`, without validating.
+
+        The snapshot is checked against the digests stored with it. Given
+        the *template* path, it must also match that file's current content.
+        """
+        from .snapshot import load
+
+        return load(cls, path, template=template)
+
+    def __reduce__(self):
+        return (
+            _restore,
+            (
+                type(self),
+                self._synced(),
+                self.raw._synced(),
+                self.kind,
+                self.path,
+            ),
+        )
+
+    def _sync(self):
+        super()._sync()
+        # Not there yet while the template is being built
+        raw = self.__dict__.get("raw")
+        if raw is not None:
+            raw._sync()
+
+    def _to_json(self, indent=None, **kwargs):
+        """The template as JSON.
 
-        self.kind = classify_template(self)
-        self.raw = DotDict(**raw)
-        post_validate(raw)
+        Unless the template was modified or formatting options are given,
+        this is Puccini's output, returned as is.
+        """
+        self._sync()
+        if self._state["json"] is not None and indent is None and not kwargs:
+            return self._state["json"]
+        return json.dumps(self._synced(), indent=indent, **kwargs)
 
+    @_memoized
     def get_requirements(self):
-        return tosca_to_ask_dict(self.raw._to_dict())
+        return tosca_to_ask_dict(self.raw._synced())
 
     @requires_kind(TemplateKind.SAT)
+    @_memoized
     def get_qos(self):
         return _get_qos(self)
 
     @requires_kind(TemplateKind.SAT)
+    @_memoized
     def get_reconfiguration(self):
         return _get_reconfiguration(self)
 
     @requires_kind(TemplateKind.SAT)
+    @_memoized
     def get_scheduling(self):
         return _get_scheduling(self)
 
     @requires_kind(TemplateKind.SAT)
+    @_memoized
     def get_affinity(self):
         return _get_affinity(self)
 
     @requires_kind(TemplateKind.CDT)
+    @_memoized
     def get_capacities(self):
-        nodes = self.nodeTemplates._to_dict()
+        nodes = self.nodeTemplates._synced()
         return extract_capacities(nodes)
 
     def generate_rdt(self, selected_offer, output_path="rdt.yaml"):
         return _generate_rdt(self, selected_offer, output_path=output_path)
 
     @requires_kind(TemplateKind.RDT)
+    @_memoized
     def get_cluster(self, resource_suffix=None):
         return _get_cluster(self, resource_suffix=resource_suffix)
 
     @requires_kind(TemplateKind.SAT)
+    @_memoized
     def get_monitoring(self):
         nodes = self.raw.service_template.node_templates
-        return _extract_monitoring(nodes._to_dict())
+        return _extract_monitoring(nodes._synced())
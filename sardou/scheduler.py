@@ -0,0 +1,192 @@
+"""Process-wide limit on concurrent Puccini runs.
+
+Every Puccini subprocess started by Sardou takes a slot from one shared
+:class:`Scheduler` first. Callers beyond the limit wait in FIFO order, so a
+burst of validations from library users or a threaded server queues up
+instead of forking a process per request.
+"""
+
+import collections
+import contextlib
+import os
+import threading
+import time
+
+from .metrics import Registry
+
+# Puccini processes allowed at once (default: CPU count, at least 4).
+MAX_IN_FLIGHT_ENV = "SARDOU_PUCCINI_MAX"
+# Seconds a Puccini run may take before it is killed (default: no limit).
+TIMEOUT_ENV = "SARDOU_PUCCINI_TIMEOUT"
+# Callers allowed to wait for a slot before new ones are turned away
+# (default: no limit).
+MAX_QUEUED_ENV = "SARDOU_PUCCINI_QUEUE"
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised when the Puccini queue is full."""
+
+
+class _Callback:
+    """A queued :meth:`Scheduler.enqueue` caller, admitted by a call."""
+
+    def __init__(self, admitted):
+        self.admitted = admitted
+        self.start = time.perf_counter()
+
+
+class Scheduler:
+    """FIFO admission of up to *max_in_flight* Puccini runs at once.
+
+    *timeout* is the per-run limit callers should apply. With *max_queued*,
+    at most that many callers wait for a slot; further ones get
+    :class:`SchedulerBusy` straight away.
+
+    Metrics: histograms ``puccini.queue_seconds`` (wait for a slot) and
+    ``puccini.run_seconds`` (time holding one); counters ``puccini.runs``,
+    ``puccini.timeouts`` and ``puccini.rejected``.
+    """
+
+    def __init__(self, max_in_flight=None, timeout=None, max_queued=None):
+        self.metrics = Registry()
+        self._reset()
+        self.configure(max_in_flight, timeout, max_queued)
+
+    def _reset(self) -> None:
+        self._cond = threading.Condition()
+        self._waiting = collections.deque()
+        self._in_flight = 0
+
+    def configure(self, max_in_flight=None, timeout=None, max_queued=None) -> None:
+        """Change the limits; ``None`` restores each default. Runs already
+        admitted are not affected."""
+        with self._cond:
+            self.max_in_flight = max_in_flight or max(os.cpu_count() or 1, 4)
+            self.timeout = timeout
+            self.max_queued = max_queued
+            self._admit_callbacks()
+
+    @classmethod
+    def from_env(cls):
+        max_in_flight = os.getenv(MAX_IN_FLIGHT_ENV)
+        timeout = os.getenv(TIMEOUT_ENV)
+        max_queued = os.getenv(MAX_QUEUED_ENV)
+        return cls(
+            max_in_flight=int(max_in_flight) if max_in_flight else None,
+            timeout=float(timeout) if timeout else None,
+            max_queued=int(max_queued) if max_queued else None,
+        )
+
+    def _check_queue(self) -> None:
+        if (
+            self.max_queued is not None
+            and self._in_flight >= self.max_in_flight
+            and len(self._waiting) >= self.max_queued
+        ):
+            self.metrics.incr("puccini.rejected")
+            raise SchedulerBusy(f"{len(self._waiting)} Puccini runs already queued")
+
+    def _admit_callbacks(self) -> None:
+        """Give free slots to the callbacks at the head of the queue, then
+        wake the waiting threads. Called with the lock held."""
+        while (
+            self._waiting
+            and isinstance(self._waiting[0], _Callback)
+            and self._in_flight < self.max_in_flight
+        ):
+            waiter = self._waiting.popleft()
+            self._in_flight += 1
+            self.metrics.observe(
+                "puccini.queue_seconds", time.perf_counter() - waiter.start
+            )
+            try:
+                waiter.admitted()
+            except RuntimeError:
+                # Nobody can use the slot: its event loop has closed.
+                self._in_flight -= 1
+        self._cond.notify_all()
+
+    def acquire(self) -> None:
+        """Wait for a slot, in arrival order."""
+        start = time.perf_counter()
+        with self._cond:
+            self._check_queue()
+            ticket = object()
+            self._waiting.append(ticket)
+            try:
+                while (
+                    self._waiting[0] is not ticket
+                    or self._in_flight >= self.max_in_flight
+                ):
+                    self._cond.wait()
+            except BaseException:
+                self._waiting.remove(ticket)
+                self._admit_callbacks()
+                raise
+            self._waiting.popleft()
+            self._in_flight += 1
+            self._admit_callbacks()
+        self.metrics.observe("puccini.queue_seconds", time.perf_counter() - start)
+
+    def enqueue(self, admitted):
+        """Queue for a slot without blocking; return a ticket for
+        :meth:`withdraw`.
+
+        Once the slot is taken, in arrival order with :meth:`acquire`
+        callers, *admitted* is called with no arguments. It runs on whichever
+        thread freed the slot, with the scheduler's lock held, so it must
+        only hand the news on (e.g. ``loop.call_soon_threadsafe``).
+        """
+        with self._cond:
+            self._check_queue()
+            ticket = _Callback(admitted)
+            self._waiting.append(ticket)
+            self._admit_callbacks()
+        return ticket
+
+    def withdraw(self, ticket) -> bool:
+        """Leave the queue; False if *ticket* already holds a slot, which
+        the caller must then :meth:`release`."""
+        with self._cond:
+            if ticket not in self._waiting:
+                return False
+            self._waiting.remove(ticket)
+            self._admit_callbacks()
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._admit_callbacks()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Hold a slot for the duration of the block."""
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release()
+            self.metrics.incr("puccini.runs")
+            self.metrics.observe("puccini.run_seconds", time.perf_counter() - start)
+
+    def timed_out(self) -> None:
+        self.metrics.incr("puccini.timeouts")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"in_flight": self._in_flight, "queued": len(self._waiting)}
+
+
+# Shared by every Puccini run in this process.
+scheduler = Scheduler.from_env()
+
+# A forked worker starts with none of the parent's runs or waiters.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=scheduler._reset)
+
+
+def configure(max_in_flight=None, timeout=None, max_queued=None) -> None:
+    """Set the limits of the process-wide :data:`scheduler`."""
+    scheduler.configure(max_in_flight, timeout, max_queued)
@@ -0,0 +1,92 @@
+"""Saving validated templates and loading them back without Puccini.
+
+A snapshot file is a short header line followed by a pickled
+:class:`sardou.Sardou`. The header records a digest of the template the
+snapshot was made from, a key covering that template with its imports,
+the Puccini flags and the Puccini version (as for stored results), and the
+SHA-256 of the pickle, which is checked before anything is unpickled.
+
+Only load snapshots you made yourself: unpickling runs code.
+"""
+
+import hashlib
+import json
+import pickle
+from pathlib import Path
+
+from .cache import _atomic_write
+from .validation import _inputs_key, parse_template
+
+MAGIC = b"sardou-snapshot"
+# Bump when the pickled form of Sardou or the header changes.
+FORMAT = 2
+
+
+def template_digest(data) -> str:
+    """Digest of a parsed template, as written (before imports are resolved)."""
+    canonical = json.dumps(
+        {"format": FORMAT, "template": data},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def save(sardou, path) -> None:
+    payload = pickle.dumps(sardou, protocol=pickle.HIGHEST_PROTOCOL)
+    raw = sardou.raw._synced()
+    header = {
+        "format": FORMAT,
+        "template": template_digest(raw),
+        # Imports are resolved again, from the cache, to digest them.
+        "inputs": _inputs_key(sardou.path or raw, data=raw),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }
+    header_line = MAGIC + b" " + json.dumps(header).encode() + b"\n"
+    _atomic_write(Path(path), header_line + payload)
+
+
+def load(cls, path, template=None):
+    """Read the snapshot at *path*, checking it against its digests.
+
+    With *template* (a path), the snapshot must also have been made from
+    that file and the files it imports as they are now, by the Puccini
+    installed now.
+    """
+    path = Path(path)
+    blob = path.read_bytes()
+    header_line, _, payload = blob.partition(b"\n")
+    magic, _, header = header_line.partition(b" ")
+    if magic != MAGIC:
+        raise ValueError(f"Not a Sardou snapshot: {path}")
+    try:
+        header = json.loads(header)
+    except ValueError:
+        raise ValueError(f"Corrupt snapshot header: {path}") from None
+    if header.get("format") != FORMAT:
+        raise ValueError(
+            f"Snapshot format {header.get('format')} is not supported "
+            f"(expected {FORMAT}): {path}"
+        )
+    if hashlib.sha256(payload).hexdigest() != header.get("sha256"):
+        raise ValueError(f"Snapshot is corrupt: {path}")
+
+    sardou = pickle.loads(payload)
+    if not isinstance(sardou, cls):
+        raise TypeError(f"Snapshot does not hold a {cls.__name__}: {path}")
+    if template_digest(sardou.raw._synced()) != header["template"]:
+        raise ValueError(f"Snapshot does not match its template digest: {path}")
+
+    if template is not None:
+        template = Path(template)
+        data = parse_template(template)
+        if data is False or template_digest(data) != header["template"]:
+            raise ValueError(f"Snapshot {path} was not made from {template}")
+        inputs = _inputs_key(template, data=data)
+        if inputs is None or inputs != header.get("inputs"):
+            raise ValueError(
+                f"Snapshot {path} was not made from {template} with its "
+                "current imports and Puccini"
+            )
+    return sardou
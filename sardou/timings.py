@@ -0,0 +1,70 @@
+"""Per-stage timing of Sardou construction.
+
+Every :class:`sardou.Sardou` records how long each stage of building it
+took in its ``timings`` attribute, a dict of stage name ->
+``{"wall": seconds, "cpu": seconds}`` in the order the stages ran. CPU time
+is that of the constructing thread, so Puccini's own work shows up as wall
+time only.
+
+Functions registered with :func:`add_hook` are called with every Sardou
+built and its timings, e.g. to forward them to a metrics pipeline.
+"""
+
+import contextlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_hooks = []
+
+
+@contextlib.contextmanager
+def timed(timings: dict | None, stage: str):
+    """Add the time spent in the block to *stage* in *timings*, if given."""
+    if timings is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        spent = timings.setdefault(stage, {"wall": 0.0, "cpu": 0.0})
+        spent["wall"] += time.perf_counter() - wall
+        spent["cpu"] += time.thread_time() - cpu
+
+
+def add_hook(hook) -> None:
+    """Call ``hook(sardou, timings)`` after every Sardou is built."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook) -> None:
+    _hooks.remove(hook)
+
+
+def report(sardou, timings: dict) -> None:
+    """Pass *timings* to every hook. A failing hook is logged and skipped."""
+    # A copy, so hooks may remove themselves.
+    for hook in _hooks[:]:
+        try:
+            hook(sardou, timings)
+        except Exception:
+            logger.exception("Timing hook %r failed", hook)
+
+
+def format_timings(timings: dict) -> str:
+    """Human-readable table of *timings*, with a total."""
+    width = max((len(stage) for stage in timings), default=0)
+    width = max(width, len("total"))
+    lines = [
+        f"{stage:<{width}}  {spent['wall'] * 1000:9.2f} ms wall"
+        f"  {spent['cpu'] * 1000:9.2f} ms cpu"
+        for stage, spent in timings.items()
+    ]
+    wall = sum(spent["wall"] for spent in timings.values())
+    cpu = sum(spent["cpu"] for spent in timings.values())
+    lines.append(
+        f"{'total':<{width}}  {wall * 1000:9.2f} ms wall  {cpu * 1000:9.2f} ms cpu"
+    )
+    return "\n".join(lines)
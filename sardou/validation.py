@@ -1,15 +1,25 @@
-import copy
+import contextlib
+import io
 import logging
+import os
+import signal
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from functools import wraps
+from functools import partial, wraps
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 
-from ruamel.yaml import YAML
 from ruamel.yaml.error import YAMLError
 
-from .cache import resolve_imports
+from . import results
+from .cache import _remote_imports, resolve_imports
+from .lockfile import lock_path_for, locked_by_default, resolve_locked
+from .mirrors import absolutize_imports
+from .prechecks import run_prechecks
+from .scheduler import scheduler
+from .timings import timed
+from .yamlio import ThreadLocalYAML
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +50,11 @@ def requires_kind(kind):
 
 PUCCINI_CMD = "/usr/bin/puccini-tosca"
 PUCCINI_FLAGS = ["-x", "data_types.string.permissive"]
+# Compact JSON decodes far faster than YAML
+PUCCINI_OUTPUT_FLAGS = ["--format", "json", "--pretty=false"]
 
-# Read and update YAML using ruamel.yaml
-yaml = YAML()
-yaml.width = 4096
+# Read and update YAML using ruamel.yaml, one instance per thread
+yaml = ThreadLocalYAML(width=4096)
 
 
 def _strip_blank_lines(text):
@@ -51,35 +62,88 @@ def _strip_blank_lines(text):
     return "\n".join("" if line.isspace() else line for line in text.split("\n"))
 
 
-def prevalidate(input_data):
-    if isinstance(input_data, Path):
-        if not input_data.exists():
-            logger.error(f"File does not exist: {input_data}")
-            return False
-        try:
-            text = input_data.read_text()
-            data = yaml.load(_strip_blank_lines(text))
-        except (OSError, YAMLError) as e:
-            logger.error(f"Error reading YAML file {input_data}: {e}")
-            return False
-    elif isinstance(input_data, dict):
-        # Work on a copy — prevalidate rewrites imports/urls in place, and a
-        # caller reusing the same dict must keep its original http(s) imports
-        # so they get revalidated on each call.
-        data = copy.deepcopy(input_data)
-    else:
-        try:
-            if isinstance(input_data, str):
+def _copy_on_write(data: dict) -> dict:
+    """Copy of *data* safe for :func:`prevalidate` to rewrite.
+
+    Only what prevalidate changes is copied: the top level, the imports
+    list and its entries, and the node templates carrying a
+    ``node_filter``. Everything else, such as large inline properties, is
+    shared with *data*. Copies are plain dicts: ``copy.copy`` of a ruamel
+    CommentedMap shares its key and merge bookkeeping with the original.
+    """
+    data = dict(data)
+    imports = data.get("imports")
+    if isinstance(imports, list):
+        data["imports"] = [
+            dict(imp) if isinstance(imp, dict) else imp for imp in imports
+        ]
+    template = data.get("service_template")
+    nodes = template.get("node_templates") if isinstance(template, dict) else None
+    if isinstance(nodes, dict):
+        template = data["service_template"] = dict(template)
+        template["node_templates"] = nodes = dict(nodes)
+        for name, node in nodes.items():
+            if isinstance(node, dict) and "node_filter" in node:
+                nodes[name] = dict(node)
+    return data
+
+
+def parse_template(input_data, timings=None):
+    """Parse *input_data*: a template path, YAML content, or a dict.
+
+    A dict is returned as is. Returns False, having logged why, if the
+    template cannot be read or parsed. Stage times are added to *timings*
+    (see :mod:`sardou.timings`), if given.
+    """
+    if isinstance(input_data, dict):
+        return input_data
+    path = input_data if isinstance(input_data, Path) else None
+    try:
+        if path is not None:
+            if not path.exists():
+                logger.error(f"File does not exist: {path}")
+                return False
+            with timed(timings, "read"):
+                input_data = path.read_text()
+        if isinstance(input_data, str):
+            with timed(timings, "strip blank lines"):
                 input_data = _strip_blank_lines(input_data)
-            data = yaml.load(input_data)
-        except YAMLError as e:
+        with timed(timings, "yaml load"):
+            return yaml.load(input_data)
+    except (OSError, YAMLError) as e:
+        if path is not None:
+            logger.error(f"Error reading YAML file {path}: {e}")
+        else:
             logger.error(f"Error parsing YAML content: {e}")
-            return False
+        return False
+
+
+def prevalidate(input_data, locked=None, data=None, timings=None, closure=None):
+    """Parse *input_data* and rewrite its imports to local files.
+
+    With *locked* (default: ``$SARDOU_LOCKED``) imports are taken from a
+    ``sardou.lock`` next to the template, or in the cache for inline content.
+
+    *data*, if given, is *input_data* already parsed by
+    :func:`parse_template`; it is not modified. Stage times are added to
+    *timings*, if given.
 
+    *closure*, a dict shared by calls for a batch of templates, collects the
+    imports resolved (see :func:`sardou.cache.resolve_imports`); templates
+    whose imports are all in it are rewritten without resolving them again.
+    """
+    if data is None:
+        data = parse_template(input_data, timings)
+    if data is False:
+        return False
     if not data:
         logger.error("No YAML content found")
         return False
 
+    # A caller reusing the same document must keep its original http(s)
+    # imports so they get revalidated on each call.
+    data = _copy_on_write(data)
+
     imports = data.get("imports", [])
     template = data.get("service_template", {})
 
@@ -87,7 +151,18 @@ def prevalidate(input_data):
         if isinstance(imp, dict) and "profile" in imp:
             imp["url"] = imp.pop("profile")
 
-    resolve_imports(data)
+    with timed(timings, "import resolution"):
+        # Puccini reads the template from stdin, so it has no directory to
+        # resolve relative imports against.
+        absolutize_imports(data, _base_dir(input_data), existing_only=True)
+
+        if locked is None:
+            locked = locked_by_default()
+        if locked:
+            template_path = input_data if isinstance(input_data, Path) else None
+            resolve_locked(data, lock_path_for(template_path))
+        else:
+            _resolve_shared(data, closure)
 
     for node in template.get("node_templates", {}).values():
         node.pop("node_filter", None)
@@ -98,13 +173,13 @@ def prevalidate(input_data):
 def classify_template(template) -> TemplateKind:
     """Classify a parsed template as SAT, CDT, RDT, or TDT."""
 
-    kind_str = template._to_dict()["metadata"].get("kind", "").lower()
+    kind_str = template._synced()["metadata"].get("kind", "").lower()
     try:
         return TemplateKind(kind_str)
     except ValueError:
         pass
 
-    nodes = template.nodeTemplates._to_dict()
+    nodes = template.nodeTemplates._synced()
     if not nodes:
         return TemplateKind.TDT
 
@@ -163,37 +238,272 @@ def validate_reconfiguration(tosca_dict) -> bool:
     return True
 
 
-def validate_template(input_data) -> bool:
-    # will run the puccini-tosca parse <with flag>
-    yaml_data = prevalidate(input_data)
-
+def _file_label(input_data) -> str:
     if isinstance(input_data, Path):
-        file_label = str(input_data)
+        return str(input_data)
     elif isinstance(input_data, dict):
-        file_label = "(dict content)"
+        return "(dict content)"
+    return "(string content)"
+
+
+def _base_dir(input_data) -> Path:
+    """Directory the template's relative imports are anchored at."""
+    if isinstance(input_data, Path):
+        return input_data.resolve().parent
+    return Path.cwd()
+
+
+def _result_key(yaml_data, input_data) -> str | None:
+    return results.template_key(
+        yaml_data,
+        _base_dir(input_data),
+        PUCCINI_CMD,
+        PUCCINI_FLAGS + PUCCINI_OUTPUT_FLAGS,
+    )
+
+
+def _inputs_key(input_data, data=None) -> str | None:
+    """Digest of everything validating *input_data* depends on (see
+    :func:`sardou.results.template_key`), cache or no cache.
+
+    *data* is as for :func:`prevalidate`.
+    """
+    yaml_data = prevalidate(input_data, data=data)
+    return results._inputs_key(
+        yaml_data,
+        _base_dir(input_data),
+        PUCCINI_CMD,
+        PUCCINI_FLAGS + PUCCINI_OUTPUT_FLAGS,
+    )
+
+
+def _puccini_args() -> list:
+    """Command line that has Puccini parse a template read from stdin."""
+    return [PUCCINI_CMD, "parse"] + PUCCINI_FLAGS + PUCCINI_OUTPUT_FLAGS
+
+
+def _serialize(yaml_data) -> bytes:
+    stream = io.BytesIO()
+    yaml.dump(yaml_data, stream)
+    return stream.getvalue()
+
+
+def _puccini_not_found() -> FileNotFoundError:
+    return FileNotFoundError(
+        f"Puccini not found at {PUCCINI_CMD}. Please install it first."
+    )
+
+
+def _check_result(result, file_label):
+    """Log the outcome of a Puccini run; return *result* on success, else None."""
+    if result.returncode == 0:
+        logger.info(f"Processed successfully: {file_label}")
+        return result
     else:
-        file_label = "(string content)"
+        logger.error(f"Failed to process: {file_label}")
+        logger.error(result.stderr.strip() or result.stdout.strip())
+        return None
+
+
+def _prechecks_for(yaml_data, input_data):
+    """Pre-check callable for *yaml_data*, or None if it did not parse."""
+    if not yaml_data:
+        return None
+    return partial(run_prechecks, yaml_data, _base_dir(input_data))
+
+
+class _PrecheckFailure(subprocess.CompletedProcess):
+    """A failed result made by the pre-checks rather than Puccini.
+
+    Never stored: result keys do not cover the pre-check rules, so a stored
+    false positive would outlive the fix to its rule.
+    """
+
+
+def _precheck_failure(errors: list) -> subprocess.CompletedProcess:
+    return _PrecheckFailure(_puccini_args(), 1, "", "\n".join(errors))
+
 
-    # open a temp file
-    with NamedTemporaryFile() as temp_file:
-        yaml.dump(yaml_data, temp_file)
+def _store(key, result) -> None:
+    """:func:`sardou.results.store`, skipping pre-check failures."""
+    if not isinstance(result, _PrecheckFailure):
+        results.store(key, result)
 
+
+def _safe_precheck(precheck) -> list:
+    try:
+        return precheck()
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        # Puccini has the final say on templates the checks cannot read.
+        logger.debug(f"Pre-checks skipped: {e}")
+        return []
+
+
+def _kill(proc) -> None:
+    """Kill Puccini and anything it started, so its pipes close.
+
+    Nothing is killed once Puccini has been reaped: its pid, and so the
+    process group id, may already belong to something else.
+    """
+    if proc.returncode is not None:
+        return
+    with contextlib.suppress(ProcessLookupError):
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+
+
+def _timed_out(timeout) -> subprocess.CompletedProcess:
+    scheduler.timed_out()
+    return subprocess.CompletedProcess(
+        _puccini_args(), -signal.SIGKILL, "", f"Puccini timed out after {timeout}s"
+    )
+
+
+def _run_puccini(document: bytes, precheck=None) -> subprocess.CompletedProcess:
+    """Run Puccini on *document* once the process-wide scheduler admits it.
+
+    *precheck*, if given, is called on another thread while Puccini runs.
+    If it reports any errors, Puccini is killed and a failed result carrying
+    them is returned. Runs exceeding the scheduler's timeout are killed too.
+    """
+    with scheduler.slot():
         try:
-            result = subprocess.run(
-                [PUCCINI_CMD, "parse", str(temp_file.name)] + PUCCINI_FLAGS,
-                check=False,
-                capture_output=True,
-                text=True,
+            proc = subprocess.Popen(
+                _puccini_args(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
             )
-            if result.returncode == 0:
-                logger.info(f"Processed successfully: {file_label}")
-                return result
-            else:
-                logger.error(f"Failed to process: {file_label}")
-                logger.error(result.stderr.strip() or result.stdout.strip())
-                return None
-
         except FileNotFoundError:
-            raise FileNotFoundError(
-                f"Puccini not found at {PUCCINI_CMD}. Please install it first."
-            )
+            raise _puccini_not_found()
+
+        errors = []
+
+        def watch():
+            errors.extend(_safe_precheck(precheck))
+            if errors:
+                _kill(proc)
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        if precheck is not None:
+            watcher.start()
+        timeout = scheduler.timeout
+        try:
+            stdout, stderr = proc.communicate(document, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill(proc)
+            proc.communicate()
+            return _timed_out(timeout)
+        finally:
+            if precheck is not None:
+                watcher.join()
+
+    if errors:
+        return _precheck_failure(errors)
+    return subprocess.CompletedProcess(
+        proc.args, proc.returncode, stdout.decode(), stderr.decode()
+    )
+
+
+def _resolve_shared(data, closure):
+    """Resolve the imports of *data*, reusing those already in *closure*."""
+    if closure is None:
+        return resolve_imports(data)
+    imports = list(_remote_imports(data))
+    if all(url in closure for _, url in imports):
+        for imp, url in imports:
+            imp["url"] = str(closure[url]["path"])
+        return data
+    return resolve_imports(data, closure=closure)
+
+
+def validate_template(
+    input_data, locked=None, data=None, timings=None, errors=None
+) -> bool:
+    """Validate *input_data* with Puccini; the result, or None on failure.
+
+    If *errors* is a list, the reasons for a failure (pre-check messages
+    or Puccini's output) are appended to it.
+    """
+    yaml_data = prevalidate(input_data, locked=locked, data=data, timings=timings)
+
+    # skip Puccini if this exact template was validated before
+    with timed(timings, "result lookup"):
+        key = _result_key(yaml_data, input_data)
+        result = results.lookup(key, _puccini_args())
+    if result is None:
+        with timed(timings, "serialize"):
+            document = _serialize(yaml_data)
+        with timed(timings, "puccini"):
+            result = _run_puccini(document, _prechecks_for(yaml_data, input_data))
+        _store(key, result)
+
+    return _failure_reported(result, _file_label(input_data), errors)
+
+
+def _failure_reported(result, file_label, errors):
+    """:func:`_check_result`, adding the reason for a failure to *errors*."""
+    checked = _check_result(result, file_label)
+    if checked is None and errors is not None:
+        errors.append(result.stderr.strip() or result.stdout.strip())
+    return checked
+
+
+def validate_many(inputs, locked=None, max_workers=None, errors=None) -> list:
+    """Validate a batch of templates; results are in the order of *inputs*.
+
+    Each entry is what :func:`validate_template` would return for that
+    input. Each import is resolved once for the whole batch, templates that
+    are identical after prevalidation share one Puccini run, and distinct
+    ones run on up to *max_workers* (default: CPU count) processes at once.
+    Stored results are reused as in :func:`validate_template`, and templates
+    failing the pre-checks never reach Puccini.
+
+    If *errors* is a dict, it is filled with ``{index: message}`` for every
+    input that failed.
+    """
+    inputs = list(inputs)
+    errors = {} if errors is None else errors
+    validated = [None] * len(inputs)
+    batches = {}  # serialized template -> (future, indexes of its inputs)
+    closure = {}  # imports resolved so far, shared by every input
+
+    def run(document, key):
+        result = results.lookup(key, _puccini_args())
+        if result is None:
+            result = _run_puccini(document)
+            results.store(key, result)
+        return result
+
+    workers = max_workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Puccini starts on each template while the next is prevalidated.
+        for i, input_data in enumerate(inputs):
+            yaml_data = prevalidate(input_data, locked=locked, closure=closure)
+            if not yaml_data:
+                errors[i] = f"Failed to prevalidate: {_file_label(input_data)}"
+                logger.error(errors[i])
+                continue
+            fatal = _safe_precheck(_prechecks_for(yaml_data, input_data))
+            if fatal:
+                _check_result(_precheck_failure(fatal), _file_label(input_data))
+                errors[i] = "\n".join(fatal)
+                continue
+            document = _serialize(yaml_data)
+            if document not in batches:
+                key = _result_key(yaml_data, input_data)
+                batches[document] = (pool.submit(run, document, key), [])
+            batches[document][1].append(i)
+
+        for future, indexes in batches.values():
+            result = future.result()
+            for i in indexes:
+                validated[i] = _check_result(result, _file_label(inputs[i]))
+                if validated[i] is None:
+                    errors[i] = result.stderr.strip() or result.stdout.strip()
+
+    logger.debug("Validated %d templates, %d distinct", len(inputs), len(batches))
+    return validated
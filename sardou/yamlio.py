@@ -0,0 +1,29 @@
+"""ruamel.yaml instances that are safe to share between threads.
+
+A ruamel ``YAML`` object keeps its reader, parser and emitter on the
+instance, so two threads loading or dumping through the same one corrupt
+each other. :class:`ThreadLocalYAML` gives every thread its own, configured
+alike, behind the ``load``/``dump`` interface the modules use.
+"""
+
+import threading
+
+from ruamel.yaml import YAML
+
+
+class ThreadLocalYAML(threading.local):
+    """A round-trip ``YAML()`` per thread, with *settings* (e.g. ``width``)
+    applied to each."""
+
+    def __init__(self, **settings):
+        # threading.local runs this again, with the same settings, the first
+        # time each thread touches the object.
+        self.yaml = YAML()
+        for name, value in settings.items():
+            setattr(self.yaml, name, value)
+
+    def load(self, stream):
+        return self.yaml.load(stream)
+
+    def dump(self, data, stream) -> None:
+        self.yaml.dump(data, stream)
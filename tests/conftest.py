@@ -0,0 +1,84 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+PUCCINI_OUTPUT = '{"metadata": {"kind": "TDT"}, "nodeTemplates": {}}'
+
+TEMPLATE = (
+    "tosca_definitions_version: tosca_2_0\n"
+    "imports:\n"
+    "  - url: types.yaml\n"
+    "service_template:\n"
+    "  node_templates:\n"
+    "    app:\n"
+    "      type: Compute\n"
+)
+
+
+@pytest.fixture
+def fake_puccini(tmp_path, monkeypatch):
+    """A stand-in for puccini-tosca that sleeps, then prints a parsed TDT.
+
+    The template is read from stdin and kept in ``last.yaml`` next to the
+    script; templates containing ``broken`` fail. Each parse appends a line
+    to the ``calls`` file, and ``start``/``end`` lines around its sleep to
+    ``runs``. Results are cached under *tmp_path*.
+    """
+    script = tmp_path / "puccini-tosca"
+    script.write_text(
+        "#!/bin/sh\n"
+        'if [ "$1" = version ]; then echo "fake 0.0"; exit 0; fi\n'
+        'echo "$$" >> "$(dirname "$0")/calls"\n'
+        "doc=$(cat)\n"
+        'printf "%s\\n" "$doc" > "$(dirname "$0")/last.yaml"\n'
+        'echo start >> "$(dirname "$0")/runs"\n'
+        "sleep 0.2\n"
+        'echo end >> "$(dirname "$0")/runs"\n'
+        'case "$doc" in *broken*) echo "broken template" >&2; exit 1;; esac\n'
+        f"printf '{PUCCINI_OUTPUT}'\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr("sardou.validation.PUCCINI_CMD", str(script))
+    monkeypatch.setattr(
+        "sardou.results.results_dir", lambda cache_dir=None: tmp_path / "results"
+    )
+    return script
+
+
+@pytest.fixture
+def puccini_runs(fake_puccini):
+    """Call to count the templates ``fake_puccini`` has parsed so far."""
+    calls = fake_puccini.parent / "calls"
+    return lambda: len(calls.read_text().splitlines()) if calls.exists() else 0
+
+
+@pytest.fixture
+def puccini_overlap(fake_puccini):
+    """Call for the most ``fake_puccini`` runs that were in flight at once.
+
+    Asserting on this rather than on elapsed time keeps concurrency tests
+    independent of how busy the machine is.
+    """
+    runs = fake_puccini.parent / "runs"
+
+    def overlap():
+        running = most = 0
+        for event in runs.read_text().split() if runs.exists() else []:
+            running += 1 if event == "start" else -1
+            most = max(most, running)
+        return most
+
+    return overlap
+
+
+@pytest.fixture
+def template(tmp_path):
+    """``app.yaml``: one Compute node, importing ``types.yaml``, which
+    imports ``base.yaml``."""
+    (tmp_path / "types.yaml").write_text(
+        "tosca_definitions_version: tosca_2_0\nimports:\n  - base.yaml\n"
+    )
+    (tmp_path / "base.yaml").write_text("tosca_definitions_version: tosca_2_0\n")
+    path = tmp_path / "app.yaml"
+    path.write_text(TEMPLATE)
+    return path
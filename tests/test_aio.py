@@ -0,0 +1,85 @@
+"""Tests for sardou.aio — asyncio resolution and validation."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from sardou import Sardou, aio
+from sardou.validation import TemplateKind
+
+TEMPLATE = (
+    "tosca_definitions_version: tosca_2_0\nservice_template:\n  node_templates: {}\n"
+)
+
+
+class TestAload:
+    def test_aload_path(self, fake_puccini, template):
+        tosca = asyncio.run(Sardou.aload(template))
+        assert isinstance(tosca, Sardou)
+        assert tosca.kind == TemplateKind.TDT
+        assert tosca.path == template
+        assert tosca.raw.tosca_definitions_version == "tosca_2_0"
+
+    def test_aload_content(self, fake_puccini):
+        tosca = asyncio.run(Sardou.aload(content=TEMPLATE))
+        assert tosca.path is None
+        assert tosca.kind == TemplateKind.TDT
+
+    def test_aload_concurrent(
+        self, puccini_runs, puccini_overlap, template, monkeypatch
+    ):
+        monkeypatch.setattr(aio, "MAX_CONCURRENCY", 8)
+
+        async def load_all():
+            return await asyncio.gather(*(Sardou.aload(template) for _ in range(8)))
+
+        results = asyncio.run(load_all())
+        assert all(r.kind == TemplateKind.TDT for r in results)
+        assert puccini_runs() == 8
+        assert puccini_overlap() > 1
+
+    def test_concurrency_bounded(self, puccini_overlap, template, monkeypatch):
+        monkeypatch.setattr(aio, "MAX_CONCURRENCY", 1)
+
+        async def load_all():
+            return await asyncio.gather(*(Sardou.aload(template) for _ in range(3)))
+
+        asyncio.run(load_all())
+        assert puccini_overlap() == 1
+
+    def test_validation_failure(self, fake_puccini, template):
+        fake_puccini.write_text("#!/bin/sh\necho 'bad template' >&2\nexit 1\n")
+        with pytest.raises(ValueError, match="Validation failed"):
+            asyncio.run(Sardou.aload(template))
+
+    def test_missing_puccini(self, template, monkeypatch, tmp_path):
+        monkeypatch.setattr("sardou.validation.PUCCINI_CMD", str(tmp_path / "nope"))
+        with pytest.raises(FileNotFoundError, match="Puccini not found"):
+            asyncio.run(Sardou.aload(template))
+
+    def test_argument_errors(self):
+        with pytest.raises(ValueError):
+            asyncio.run(Sardou.aload())
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(Sardou.aload("/does/not/exist.yaml"))
+
+
+def test_aresolve_imports_local(tmp_path):
+    data = {"imports": [{"url": "local.yaml"}]}
+    assert asyncio.run(aio.aresolve_imports(data, cache_dir=tmp_path)) == data
+
+
+def test_aresolve_imports_mirrored(tmp_path):
+    url = (
+        "https://raw.githubusercontent.com/Swarmchestrate/tosca/refs/heads/main"
+        "/profiles/eu.swarmchestrate/profile.yaml"
+    )
+    data = asyncio.run(
+        aio.aresolve_imports({"imports": [{"url": url}]}, cache_dir=tmp_path)
+    )
+    assert Path(data["imports"][0]["url"]).exists()
+
+
+def test_afetch_unreachable(tmp_path):
+    assert asyncio.run(aio.afetch("http://127.0.0.1:1/x.yaml", tmp_path)) is None
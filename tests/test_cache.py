@@ -1,19 +1,36 @@
 """Tests for sardou.cache — ETag-based HTTP cache."""
 
+import hashlib
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 from pathlib import Path
-from threading import Thread
-from unittest.mock import patch
+from threading import Lock, Thread
+from unittest.mock import ANY, patch
 
 import pytest
 
 from sardou.cache import (
+    _STALE_TEMP_AGE,
     DEFAULT_CACHE_DIR,
+    MAX_AGE_ENV,
+    MAX_IDLE_ENV,
+    _blob_path,
     _cached_path_for_url,
+    _link_blob,
+    _meta_path,
+    _resolved_path,
+    _store,
+    _store_blob,
+    clear,
     fetch,
+    prune,
     resolve_imports,
+    stats,
 )
+from sardou.metrics import Registry
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -141,10 +158,13 @@ class _NestedHandler(BaseHTTPRequestHandler):
 
     def do_GET(self):
         if self.path == "/parent.yaml":
-            etag, body = self.parent_etag, (
-                b"tosca_definitions_version: tosca_2_0\n"
-                b"imports:\n"
-                b"- url: http://%s/child.yaml\n" % self.headers["Host"].encode()
+            etag, body = (
+                self.parent_etag,
+                (
+                    b"tosca_definitions_version: tosca_2_0\n"
+                    b"imports:\n"
+                    b"- url: http://%s/child.yaml\n" % self.headers["Host"].encode()
+                ),
             )
         else:
             etag, body = self.child_etag, self.child_body
@@ -186,9 +206,436 @@ def test_changed_nested_import_is_refetched(nested_server, tmp_path):
 
     # Child changes upstream (new etag + body).
     _NestedHandler.child_etag = '"child-2"'
-    _NestedHandler.child_body = b"tosca_definitions_version: tosca_2_0\nname: child-v2\n"
+    _NestedHandler.child_body = (
+        b"tosca_definitions_version: tosca_2_0\nname: child-v2\n"
+    )
 
     # Second resolution: parent is unchanged (304) but the child must be
     # revalidated and re-fetched.
     resolve_imports({"imports": [{"url": parent_url}]}, cache_dir=tmp_path)
     assert b"child-v2" in child_cached.read_bytes()
+
+
+# ---------------------------------------------------------------------------
+# Breadth-first, concurrent resolution
+# ---------------------------------------------------------------------------
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Serves /root.yaml importing /leaf-N.yaml, tracking concurrent GETs."""
+
+    leaves = 6
+    lock = Lock()
+    in_flight = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(0.05)
+            host = self.headers["Host"]
+            if self.path == "/root.yaml":
+                body = "imports:\n" + "".join(
+                    f"- url: http://{host}/leaf-{i}.yaml\n" for i in range(cls.leaves)
+                )
+            elif self.path == "/leaf-0.yaml":
+                # A shared import, also reachable from the root level.
+                body = f"imports:\n- url: http://{host}/leaf-1.yaml\n"
+            else:
+                body = f"name: {self.path}\n"
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body.encode())
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture()
+def slow_server():
+    _SlowHandler.in_flight = _SlowHandler.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    t = Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class TestConcurrentResolution:
+    def test_level_fetched_concurrently(self, slow_server, tmp_path):
+        data = {"imports": [{"url": f"{slow_server}/root.yaml"}]}
+        resolve_imports(data, cache_dir=tmp_path, per_host=8)
+        assert _SlowHandler.peak > 1
+
+    def test_per_host_limit_respected(self, slow_server, tmp_path):
+        data = {"imports": [{"url": f"{slow_server}/root.yaml"}]}
+        resolve_imports(data, cache_dir=tmp_path, per_host=2)
+        assert _SlowHandler.peak <= 2
+
+    def test_each_url_fetched_once(self, slow_server, tmp_path):
+        data = {"imports": [{"url": f"{slow_server}/root.yaml"}]}
+        with patch("sardou.cache.fetch", wraps=fetch) as mock_fetch:
+            resolve_imports(data, cache_dir=tmp_path)
+        urls = [c.args[0] for c in mock_fetch.call_args_list]
+        assert len(urls) == len(set(urls)) == 1 + _SlowHandler.leaves
+
+    def test_shared_import_rewritten_in_resolved_copies(self, slow_server, tmp_path):
+        root_url = f"{slow_server}/root.yaml"
+        data = {"imports": [{"url": root_url}]}
+        resolve_imports(data, cache_dir=tmp_path)
+
+        root_resolved = Path(data["imports"][0]["url"])
+        assert root_resolved.name == "root.resolved.yaml"
+        leaf0_resolved = _resolved_path(
+            _cached_path_for_url(tmp_path, f"{slow_server}/leaf-0.yaml")
+        )
+        leaf1 = str(_cached_path_for_url(tmp_path, f"{slow_server}/leaf-1.yaml"))
+        assert str(leaf0_resolved) in root_resolved.read_text()
+        assert leaf1 in root_resolved.read_text()
+        assert leaf1 in leaf0_resolved.read_text()
+        assert "http://" not in root_resolved.read_text()
+
+
+# ---------------------------------------------------------------------------
+# Freshness window
+# ---------------------------------------------------------------------------
+
+
+class _CountingHandler(_Handler):
+    """Like _Handler, but counts requests and can send Cache-Control."""
+
+    requests = 0
+    cache_control = None
+
+    def do_GET(self):
+        type(self).requests += 1
+        inm = self.headers.get("If-None-Match")
+        self.send_response(304 if inm == self.etag else 200)
+        self.send_header("ETag", self.etag)
+        if self.cache_control:
+            self.send_header("Cache-Control", self.cache_control)
+        self.end_headers()
+        if inm != self.etag:
+            self.wfile.write(self.body)
+
+
+@pytest.fixture()
+def counting_server(monkeypatch):
+    monkeypatch.delenv(MAX_AGE_ENV, raising=False)
+    _CountingHandler.requests = 0
+    _CountingHandler.cache_control = None
+    server = HTTPServer(("127.0.0.1", 0), _CountingHandler)
+    t = Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class TestFreshness:
+    def test_no_cache_control_always_revalidates(self, counting_server, tmp_path):
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        fetch(url, cache_dir=tmp_path)
+        assert _CountingHandler.requests == 2
+
+    def test_upstream_max_age_skips_network(self, counting_server, tmp_path):
+        _CountingHandler.cache_control = "public, max-age=300"
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        path = fetch(url, cache_dir=tmp_path)
+        assert _CountingHandler.requests == 1
+        assert path.read_bytes() == BODY
+
+    def test_explicit_max_age_overrides_upstream(self, counting_server, tmp_path):
+        _CountingHandler.cache_control = "max-age=300"
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        fetch(url, cache_dir=tmp_path, max_age=0)
+        assert _CountingHandler.requests == 2
+
+    def test_env_max_age(self, counting_server, tmp_path, monkeypatch):
+        monkeypatch.setenv(MAX_AGE_ENV, "60")
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        fetch(url, cache_dir=tmp_path)
+        assert _CountingHandler.requests == 1
+
+    def test_freshness_persisted_on_disk(self, counting_server, tmp_path):
+        _CountingHandler.cache_control = "max-age=300"
+        url = f"{counting_server}/profile.yaml"
+        path = fetch(url, cache_dir=tmp_path)
+        # Simulate a new process: forget what this one has validated.
+        with patch.dict("sardou.cache._validated", clear=True):
+            fetch(url, cache_dir=tmp_path)
+        assert _CountingHandler.requests == 1
+        meta = json.loads(path.with_suffix(".yaml.meta").read_text())
+        assert meta["max_age"] == 300
+
+    def test_304_renews_freshness(self, counting_server, tmp_path):
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        _CountingHandler.cache_control = "max-age=300"
+        fetch(url, cache_dir=tmp_path)  # 304, now fresh for 300s
+        fetch(url, cache_dir=tmp_path)
+        assert _CountingHandler.requests == 2
+
+    def test_no_cache_directive(self, counting_server, tmp_path):
+        _CountingHandler.cache_control = "no-cache, max-age=300"
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        fetch(url, cache_dir=tmp_path)
+        assert _CountingHandler.requests == 2
+
+
+# ---------------------------------------------------------------------------
+# Content-addressed storage
+# ---------------------------------------------------------------------------
+
+
+class TestBlobStore:
+    def test_meta_records_digest(self, local_server, tmp_path):
+        path = fetch(f"{local_server}/profile.yaml", cache_dir=tmp_path)
+        meta = json.loads(path.with_suffix(".yaml.meta").read_text())
+        digest = hashlib.sha256(BODY).hexdigest()
+        assert meta["digest"] == digest
+        assert _blob_path(tmp_path, digest).read_bytes() == BODY
+
+    def test_identical_content_stored_once(self, local_server, tmp_path):
+        a = fetch(f"{local_server}/refs/heads/main/profile.yaml", cache_dir=tmp_path)
+        b = fetch(f"{local_server}/refs/tags/v1/profile.yaml", cache_dir=tmp_path)
+        assert a != b
+        assert a.stat().st_ino == b.stat().st_ino
+        assert len(list((tmp_path / "blobs").rglob("*"))) == 2  # one dir, one blob
+
+    def test_no_temp_files_left_behind(self, nested_server, tmp_path):
+        _, base = nested_server
+        resolve_imports({"imports": [{"url": f"{base}/parent.yaml"}]}, tmp_path)
+        assert not [p for p in tmp_path.rglob(".*") if p.is_file()]
+
+    def test_concurrent_fetches_never_see_partial_files(self, local_server, tmp_path):
+        url = f"{local_server}/profile.yaml"
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            paths = list(pool.map(lambda _: fetch(url, tmp_path, max_age=0), range(32)))
+        assert all(p.read_bytes() == BODY for p in paths)
+
+
+# ---------------------------------------------------------------------------
+# Eviction
+# ---------------------------------------------------------------------------
+
+
+def _age(path, seconds):
+    """Pretend the cache entry *path* was last used *seconds* ago."""
+    then = time.time() - seconds
+    for p in (path, _meta_path(path)):
+        if p.exists():
+            os.utime(p, (then, then))
+
+
+@pytest.fixture()
+def populated_cache(local_server, tmp_path):
+    """Three URLs sharing one blob, plus one with distinct content."""
+    paths = [
+        fetch(f"{local_server}/v{i}/profile.yaml", cache_dir=tmp_path) for i in range(3)
+    ]
+    distinct = _cached_path_for_url(tmp_path, "http://other/profile.yaml")
+    _store(tmp_path, distinct, b"x" * 1000)
+    return tmp_path, paths, distinct
+
+
+class TestPrune:
+    def test_stats(self, populated_cache):
+        cache_dir, _, _ = populated_cache
+        info = stats(cache_dir)
+        assert info["entries"] == 4
+        assert info["blobs"] == 2
+        assert info["orphaned_blobs"] == 0
+        # Metas plus two unique blobs; shared links are not double counted.
+        assert len(BODY) + 1000 < info["size"] < len(BODY) + 1000 + 4 * 200
+
+    def test_fetch_records_access(self, local_server, tmp_path):
+        url = f"{local_server}/profile.yaml"
+        path = fetch(url, cache_dir=tmp_path)
+        _age(path, 1000)
+        fetch(url, cache_dir=tmp_path)
+        assert time.time() - _meta_path(path).stat().st_mtime < 100
+
+    def test_prune_idle(self, populated_cache):
+        cache_dir, paths, distinct = populated_cache
+        _age(distinct, 2 * _STALE_TEMP_AGE)
+        result = prune(cache_dir, max_idle=500)
+        assert result == {"evicted": 1, "removed_blobs": 1, "size": ANY}
+        assert not distinct.exists()
+        assert all(p.exists() for p in paths)
+
+    def test_prune_size_evicts_least_recently_used(self, populated_cache):
+        cache_dir, paths, distinct = populated_cache
+        _age(distinct, 1000)
+        prune(cache_dir, max_size=stats(cache_dir)["size"] - 1)
+        assert not distinct.exists()
+        assert all(p.exists() for p in paths)
+
+    def test_shared_blob_kept_until_last_link(self, populated_cache):
+        cache_dir, paths, _ = populated_cache
+        _age(paths[0], 1000)
+        prune(cache_dir, max_idle=500)
+        assert not paths[0].exists()
+        assert paths[1].read_bytes() == BODY
+        assert stats(cache_dir)["blobs"] == 2
+
+    def test_keep_since(self, populated_cache):
+        cache_dir, _, _ = populated_cache
+        assert prune(cache_dir, max_size=0, keep_since=0)["evicted"] == 0
+
+    def test_prune_everything(self, populated_cache):
+        cache_dir, paths, distinct = populated_cache
+        for path in [*paths, distinct]:
+            _age(path, 2 * _STALE_TEMP_AGE)
+        result = prune(cache_dir, max_size=0)
+        assert result["evicted"] == 4
+        assert stats(cache_dir) == {
+            "entries": 0,
+            "blobs": 0,
+            "orphaned_blobs": 0,
+            "temp_files": 0,
+            "size": 0,
+            "oldest_access": None,
+            "newest_access": None,
+        }
+
+    def test_new_orphan_blob_kept(self, tmp_path):
+        digest = _store_blob(tmp_path, b"being linked")
+        assert prune(tmp_path)["removed_blobs"] == 0
+        assert _blob_path(tmp_path, digest).exists()
+        _age(_blob_path(tmp_path, digest), 2 * _STALE_TEMP_AGE)
+        assert prune(tmp_path)["removed_blobs"] == 1
+
+    def test_link_restores_pruned_blob(self, tmp_path):
+        digest = _store_blob(tmp_path, b"data")
+        _blob_path(tmp_path, digest).unlink()
+        path = tmp_path / "host" / "profile.yaml"
+        _link_blob(tmp_path, digest, path, b"data")
+        assert path.read_bytes() == b"data"
+        assert path.stat().st_ino == _blob_path(tmp_path, digest).stat().st_ino
+
+    def test_clear(self, populated_cache):
+        cache_dir, _, _ = populated_cache
+        clear(cache_dir)
+        assert not cache_dir.exists()
+
+    def test_auto_prune_from_env(self, local_server, tmp_path, monkeypatch):
+        monkeypatch.setenv(MAX_IDLE_ENV, "500")
+        monkeypatch.setattr("sardou.cache._last_auto_prune", {})
+        stale = _cached_path_for_url(tmp_path, "http://other/stale.yaml")
+        _store(tmp_path, stale, b"stale")
+        _age(stale, 1000)
+        data = {"imports": [{"url": f"{local_server}/profile.yaml"}]}
+        resolve_imports(data, cache_dir=tmp_path)
+        assert not stale.exists()
+        assert Path(data["imports"][0]["url"]).exists()
+
+
+# ---------------------------------------------------------------------------
+# Parse memo and skip-if-unchanged .resolved writes
+# ---------------------------------------------------------------------------
+
+
+class TestResolveMemo:
+    @pytest.fixture
+    def resolve(self, nested_server, tmp_path):
+        _, base = nested_server
+        _NestedHandler.child_etag = '"child-1"'
+        _NestedHandler.child_body = b"tosca_definitions_version: tosca_2_0\n"
+
+        def resolve():
+            data = {"imports": [{"url": f"{base}/parent.yaml"}]}
+            resolve_imports(data, cache_dir=tmp_path, max_age=60)
+            return Path(data["imports"][0]["url"])
+
+        return resolve
+
+    def test_unchanged_documents_not_reparsed(self, resolve):
+        resolve()
+        with patch("sardou.cache.yaml.load") as mock_load:
+            resolve()
+        assert not mock_load.called
+
+    def test_unchanged_resolved_copy_not_rewritten(self, resolve):
+        resolved = resolve()
+        before = resolved.stat()
+        with patch("sardou.cache._store") as mock_store:
+            resolve()
+        assert not mock_store.called
+        assert resolved.stat().st_ino == before.st_ino
+
+    def test_identical_content_not_rewritten_by_new_process(self, resolve):
+        resolved = resolve()
+        inode = resolved.stat().st_ino
+        with (
+            patch.dict("sardou.cache._parsed", clear=True),
+            patch.dict("sardou.cache._written", clear=True),
+        ):
+            resolve()
+        assert resolved.stat().st_ino == inode
+
+    def test_changed_document_reparsed(self, resolve, nested_server, tmp_path):
+        _, base = nested_server
+        resolve()
+        parent = _cached_path_for_url(tmp_path, f"{base}/parent.yaml")
+        _store(tmp_path, parent, b"imports:\n- url: /local/other.yaml\n")
+        resolved = resolve()
+        assert "/local/other.yaml" in resolved.read_text()
+
+    def test_deleted_resolved_copy_rewritten(self, resolve):
+        resolved = resolve()
+        resolved.unlink()
+        assert resolve().exists()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def cache_metrics(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr("sardou.cache.metrics", registry)
+    return registry
+
+
+class TestMetrics:
+    def test_fetch_outcomes_counted(self, counting_server, tmp_path, cache_metrics):
+        url = f"{counting_server}/profile.yaml"
+        fetch(url, cache_dir=tmp_path)
+        fetch(url, cache_dir=tmp_path)
+        fetch(url, cache_dir=tmp_path, max_age=60)
+        snap = cache_metrics.snapshot()
+        assert snap["counters"] == {
+            "fetch.downloaded": 1,
+            "fetch.bytes": len(BODY),
+            "fetch.not_modified": 1,
+            "fetch.fresh": 1,
+        }
+        assert snap["histograms"]["fetch.seconds"]["count"] == 2
+        assert snap["labels"]["fetch.seconds"][url]["count"] == 2
+
+    def test_errors_counted(self, tmp_path, cache_metrics):
+        url = "http://127.0.0.1:1/unreachable.yaml"
+        fetch(url, cache_dir=tmp_path)
+        cached = _cached_path_for_url(tmp_path, url)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        cached.write_bytes(BODY)
+        fetch(url, cache_dir=tmp_path)
+        counters = cache_metrics.snapshot()["counters"]
+        assert counters == {"fetch.failed": 1, "fetch.fallback": 1}
+
+    def test_resolve_timed(self, tmp_path, cache_metrics):
+        resolve_imports({"imports": []}, cache_dir=tmp_path)
+        assert cache_metrics.snapshot()["histograms"]["resolve.seconds"]["count"] == 1
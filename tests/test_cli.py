@@ -53,6 +53,43 @@ class TestInvalidYaml:
         result = run(str(f))
         assert result.returncode == 1
 
+    def test_cache_stats_printed(self, tmp_path):
+        f = tmp_path / "empty.yaml"
+        f.write_text("")
+        result = run("--cache-stats", str(f))
+        assert "Import cache:" in result.stdout
+        assert "handshakes=" in result.stdout
+
+
+class TestCacheCommand:
+    def test_cache_help_exits_zero(self):
+        result = run("cache", "--help")
+        assert result.returncode == 0
+        assert "prune" in result.stdout
+
+    def test_stats_on_empty_cache(self, tmp_path):
+        result = run("cache", "--cache-dir", str(tmp_path), "stats")
+        assert result.returncode == 0
+        assert "Entries:         0" in result.stdout
+
+    def test_prune_requires_budget(self, tmp_path):
+        result = run("cache", "--cache-dir", str(tmp_path), "prune")
+        assert result.returncode != 0
+
+    def test_prune_and_clear(self, tmp_path):
+        (tmp_path / "host").mkdir()
+        (tmp_path / "host" / "profile.yaml").write_text("a: 1\n")
+        result = run("cache", "--cache-dir", str(tmp_path), "prune", "--max-size", "0")
+        assert result.returncode == 0
+        assert "Evicted 1 entries" in result.stdout
+        result = run("cache", "--cache-dir", str(tmp_path), "clear")
+        assert result.returncode == 0
+        assert not tmp_path.exists()
+
+    def test_invalid_size_rejected(self, tmp_path):
+        result = run("cache", "prune", "--max-size", "lots")
+        assert result.returncode != 0
+
 
 @requires_puccini
 class TestCDTTemplates:
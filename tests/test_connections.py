@@ -0,0 +1,105 @@
+"""Tests for sardou.connections — keep-alive HTTP connection pool."""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from sardou.cache import resolve_imports
+from sardou.connections import ConnectionPool
+
+BODY = b"tosca_definitions_version: tosca_2_0\n"
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that keeps connections open between requests."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/old.yaml":
+            self.send_response(301)
+            self.send_header("Location", "/profile.yaml")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/drop.yaml":
+            # Close after responding without telling the client.
+            self.close_connection = True
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(BODY)))
+        if self.path == "/close.yaml":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    t = Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture()
+def pool():
+    pool = ConnectionPool()
+    yield pool
+    pool.close()
+
+
+class TestConnectionPool:
+    def test_get(self, server, pool):
+        resp = pool.get(f"{server}/profile.yaml")
+        assert resp.status == 200
+        assert resp.body == BODY
+
+    def test_connection_reused(self, server, pool):
+        for _ in range(5):
+            pool.get(f"{server}/profile.yaml")
+        assert pool.stats() == {"handshakes": 1, "requests": 5, "reused": 4}
+
+    def test_conditional_request(self, server, pool):
+        resp = pool.get(f"{server}/profile.yaml", {"If-None-Match": '"v1"'})
+        assert resp.status == 304
+        assert pool.get(f"{server}/profile.yaml").body == BODY
+        assert pool.stats()["handshakes"] == 1
+
+    def test_redirect_followed(self, server, pool):
+        resp = pool.get(f"{server}/old.yaml")
+        assert resp.status == 200
+        assert resp.body == BODY
+
+    def test_server_close_not_reused(self, server, pool):
+        pool.get(f"{server}/close.yaml")
+        pool.get(f"{server}/close.yaml")
+        assert pool.stats()["handshakes"] == 2
+
+    def test_stale_connection_retried(self, server, pool):
+        pool.get(f"{server}/drop.yaml")
+        assert pool.get(f"{server}/profile.yaml").body == BODY
+        assert pool.stats()["handshakes"] == 2
+
+    def test_connection_refused_raises(self, pool):
+        with pytest.raises(OSError):
+            pool.get("http://127.0.0.1:1/profile.yaml")
+
+
+def test_resolve_imports_reuses_connections(server, tmp_path, monkeypatch):
+    pool = ConnectionPool()
+    monkeypatch.setattr("sardou.connections._pool", pool)
+    url = f"{server}/profile.yaml"
+    for _ in range(3):
+        resolve_imports({"imports": [{"url": url}]}, cache_dir=tmp_path, max_age=0)
+    assert pool.stats() == {"handshakes": 1, "requests": 3, "reused": 2}
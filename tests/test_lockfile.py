@@ -0,0 +1,121 @@
+"""Tests for sardou.lockfile — pinned import resolution."""
+
+import json
+from functools import partial
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sardou.cache import resolve_imports
+from sardou.lockfile import (
+    LOCK_NAME,
+    lock_path_for,
+    read_lock,
+    resolve_locked,
+)
+
+PROFILE_URL = (
+    "https://raw.githubusercontent.com/Swarmchestrate/tosca/refs/heads/main"
+    "/profiles/eu.swarmchestrate/profile.yaml"
+)
+
+
+def _template():
+    return {"imports": [{"namespace": "swch", "url": PROFILE_URL}]}
+
+
+@pytest.fixture
+def lock(tmp_path):
+    """A lockfile for the Swarmchestrate profile closure."""
+    lock_path = tmp_path / LOCK_NAME
+    resolve_locked(_template(), lock_path, cache_dir=tmp_path / "cache")
+    return lock_path
+
+
+class TestLockfile:
+    def test_lock_written_with_closure(self, lock):
+        entries = read_lock(lock)
+        assert PROFILE_URL in entries
+        assert len(entries) == 5
+        for entry in entries.values():
+            assert Path(entry["path"]).exists()
+            assert len(entry["digest"]) == 64
+        assert len(entries[PROFILE_URL]["imports"]) == 4
+
+    def test_locked_resolution_does_no_work(self, lock, tmp_path):
+        data = _template()
+        with (
+            patch("sardou.lockfile.resolve_imports") as mock_resolve,
+            patch("sardou.cache.yaml.load") as mock_load,
+        ):
+            resolve_locked(data, lock, cache_dir=tmp_path / "cache")
+        assert not mock_resolve.called
+        assert not mock_load.called
+        assert data["imports"][0]["url"] == read_lock(lock)[PROFILE_URL]["path"]
+
+    def test_same_result_as_unlocked(self, lock, tmp_path):
+        locked = resolve_locked(_template(), lock, cache_dir=tmp_path / "cache")
+        unlocked = resolve_imports(_template(), cache_dir=tmp_path / "cache")
+        assert locked == unlocked
+
+    def test_digest_mismatch_re_resolves(self, lock, tmp_path):
+        nested = Path(read_lock(lock)[PROFILE_URL]["path"])
+        nested.unlink()
+        nested.write_text("tampered: true\n")
+        with patch(
+            "sardou.lockfile.resolve_imports", wraps=resolve_imports
+        ) as mock_resolve:
+            resolve_locked(_template(), lock, cache_dir=tmp_path / "cache")
+        assert mock_resolve.called
+        assert "tampered" not in nested.read_text()
+
+    def test_unlocked_url_re_resolves(self, lock, tmp_path):
+        app_url = PROFILE_URL.replace("profile.yaml", "app.yaml")
+        entries = json.loads(lock.read_text())
+        del entries["imports"][app_url]
+        lock.write_text(json.dumps(entries))
+        with patch(
+            "sardou.lockfile.resolve_imports", wraps=resolve_imports
+        ) as mock_resolve:
+            resolve_locked(_template(), lock, cache_dir=tmp_path / "cache")
+        assert mock_resolve.called
+        assert app_url in read_lock(lock)
+
+    def test_corrupt_lock_ignored(self, tmp_path):
+        lock_path = tmp_path / LOCK_NAME
+        lock_path.write_text("{not json")
+        assert read_lock(lock_path) == {}
+        data = resolve_locked(_template(), lock_path, cache_dir=tmp_path / "cache")
+        assert Path(data["imports"][0]["url"]).exists()
+        assert PROFILE_URL in read_lock(lock_path)
+
+    def test_no_remote_imports_no_lock(self, tmp_path):
+        lock_path = tmp_path / LOCK_NAME
+        resolve_locked({"imports": [{"url": "local.yaml"}]}, lock_path)
+        assert not lock_path.exists()
+
+
+def test_lock_path_for(tmp_path):
+    assert lock_path_for(tmp_path / "t.yaml") == tmp_path / LOCK_NAME
+    assert lock_path_for(None, cache_dir=tmp_path) == tmp_path / LOCK_NAME
+
+
+def test_prevalidate_locked_writes_lock_next_to_template(tmp_path):
+    from sardou.validation import prevalidate
+
+    template = tmp_path / "app.yaml"
+    template.write_text(
+        "tosca_definitions_version: tosca_2_0\n"
+        "imports:\n"
+        f"  - profile: {PROFILE_URL}\n"
+        "service_template:\n"
+        "  node_templates: {}\n"
+    )
+    with patch(
+        "sardou.lockfile.resolve_imports",
+        partial(resolve_imports, cache_dir=tmp_path / "cache"),
+    ):
+        result = prevalidate(template, locked=True)
+    assert PROFILE_URL in read_lock(tmp_path / LOCK_NAME)
+    assert Path(result["imports"][0]["url"]).exists()
@@ -0,0 +1,75 @@
+"""Tests for sardou.metrics — counters and histograms."""
+
+import math
+
+from sardou.metrics import Histogram, Registry, format_snapshot, merge_snapshots
+
+
+class TestHistogram:
+    def test_empty(self):
+        snap = Histogram().snapshot()
+        assert snap["count"] == 0
+        assert snap["mean"] is None
+
+    def test_observations(self):
+        hist = Histogram(buckets=(0.1, 1, math.inf))
+        for value in (0.05, 0.5, 0.5, 5):
+            hist.observe(value)
+        snap = hist.snapshot()
+        assert snap["count"] == 4
+        assert snap["sum"] == 6.05
+        assert snap["min"] == 0.05
+        assert snap["max"] == 5
+        assert snap["buckets"] == {0.1: 1, 1: 2, math.inf: 1}
+
+
+class TestRegistry:
+    def test_counters(self):
+        registry = Registry()
+        registry.incr("a")
+        registry.incr("a")
+        registry.incr("bytes", 100)
+        assert registry.snapshot()["counters"] == {"a": 2, "bytes": 100}
+
+    def test_labelled_histograms(self):
+        registry = Registry()
+        registry.observe("latency", 0.1, label="x")
+        registry.observe("latency", 0.3, label="y")
+        snap = registry.snapshot()
+        assert snap["histograms"]["latency"]["count"] == 2
+        assert snap["labels"]["latency"]["x"]["count"] == 1
+
+    def test_reset(self):
+        registry = Registry()
+        registry.incr("a")
+        registry.observe("latency", 0.1)
+        registry.reset()
+        assert registry.snapshot() == {"counters": {}, "histograms": {}, "labels": {}}
+
+    def test_format_snapshot(self):
+        registry = Registry()
+        registry.incr("fetch.downloaded")
+        registry.observe("fetch.seconds", 0.02, label="http://x/y.yaml")
+        text = format_snapshot(registry.snapshot())
+        assert "fetch.downloaded: 1" in text
+        assert "fetch.seconds: count=1 mean=20.0ms" in text
+        assert "  http://x/y.yaml: count=1" in text
+
+
+def test_merge_snapshots():
+    a, b = Registry(), Registry()
+    a.incr("hits", 2)
+    b.incr("hits")
+    b.incr("misses")
+    a.observe("seconds", 0.5, label="x")
+    b.observe("seconds", 2.0, label="x")
+    b.observe("seconds", 1.0, label="y")
+    merged = merge_snapshots([a.snapshot(), b.snapshot()])
+    assert merged["counters"] == {"hits": 3, "misses": 1}
+    hist = merged["histograms"]["seconds"]
+    assert hist["count"] == 3
+    assert hist["min"] == 0.5 and hist["max"] == 2.0
+    assert hist["mean"] == 3.5 / 3
+    assert sum(hist["buckets"].values()) == 3
+    assert merged["labels"]["seconds"]["x"]["count"] == 2
+    assert merged["labels"]["seconds"]["y"]["count"] == 1
@@ -0,0 +1,116 @@
+"""Tests for sardou.mirrors — offline URL to bundled profile mapping."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from ruamel.yaml import YAML
+
+from sardou.cache import resolve_imports
+from sardou.mirrors import (
+    DEFAULT_MIRRORS,
+    MIRRORS_ENV,
+    PROFILES_DIR,
+    absolutize_imports,
+    configured_mirrors,
+    lookup,
+)
+
+SAT = Path(__file__).parent / "templates" / "sat" / "BookInfo.yaml"
+PROFILE_URL = (
+    "https://raw.githubusercontent.com/Swarmchestrate/tosca/refs/heads/main"
+    "/profiles/eu.swarmchestrate/profile.yaml"
+)
+
+
+class TestLookup:
+    def test_bundled_profiles_found(self):
+        assert (PROFILES_DIR / "eu.swarmchestrate" / "profile.yaml").is_file()
+
+    def test_known_url_maps_to_bundled_file(self):
+        local = lookup(PROFILE_URL, DEFAULT_MIRRORS)
+        assert local == PROFILES_DIR / "eu.swarmchestrate" / "profile.yaml"
+
+    def test_unknown_url_not_mapped(self):
+        assert lookup("https://example.com/profile.yaml", DEFAULT_MIRRORS) is None
+
+    def test_missing_file_not_mapped(self):
+        url = PROFILE_URL.replace("profile.yaml", "not-there.yaml")
+        assert lookup(url, DEFAULT_MIRRORS) is None
+
+    def test_longest_prefix_wins(self, tmp_path):
+        (tmp_path / "profile.yaml").write_text("a: 1\n")
+        table = {
+            **DEFAULT_MIRRORS,
+            PROFILE_URL.rsplit("/", 1)[0] + "/": tmp_path,
+        }
+        assert lookup(PROFILE_URL, table) == tmp_path / "profile.yaml"
+
+
+class TestConfiguredMirrors:
+    def test_defaults(self, monkeypatch):
+        monkeypatch.delenv(MIRRORS_ENV, raising=False)
+        assert configured_mirrors() == DEFAULT_MIRRORS
+
+    def test_env_file_adds_and_disables(self, tmp_path, monkeypatch):
+        disabled = next(iter(DEFAULT_MIRRORS))
+        config = tmp_path / "mirrors.json"
+        config.write_text(
+            json.dumps({"https://example.com/": str(tmp_path), disabled: None})
+        )
+        monkeypatch.setenv(MIRRORS_ENV, str(config))
+        mirrors = configured_mirrors()
+        assert mirrors["https://example.com/"] == tmp_path
+        assert disabled not in mirrors
+
+
+def test_absolutize_imports(tmp_path):
+    data = {
+        "imports": [
+            "data.yaml",
+            {"url": "nodes.yaml"},
+            {"url": "/abs/file.yaml"},
+            {"url": "https://example.com/x.yaml"},
+        ]
+    }
+    absolutize_imports(data, tmp_path)
+    assert data["imports"] == [
+        str(tmp_path / "data.yaml"),
+        {"url": str(tmp_path / "nodes.yaml")},
+        {"url": "/abs/file.yaml"},
+        {"url": "https://example.com/x.yaml"},
+    ]
+
+
+class TestOfflineResolution:
+    @pytest.fixture
+    def resolved(self, tmp_path):
+        data = YAML().load(SAT)
+        with patch("sardou.connections.get", side_effect=AssertionError("network")):
+            resolve_imports(data, cache_dir=tmp_path)
+        return data
+
+    def test_no_network_needed(self, resolved):
+        assert Path(resolved["imports"][0]["url"]).exists()
+
+    def test_closure_has_no_remote_imports(self, resolved):
+        yaml = YAML(typ="safe")
+        pending = [Path(resolved["imports"][0]["url"])]
+        visited = set()
+        while pending:
+            path = pending.pop()
+            visited.add(path)
+            for imp in yaml.load(path).get("imports", []):
+                assert "://" not in imp["url"]
+                assert Path(imp["url"]).exists()
+                if Path(imp["url"]) not in visited:
+                    pending.append(Path(imp["url"]))
+        assert len(visited) == 5
+
+    def test_mirror_can_be_disabled(self, tmp_path):
+        data = {"imports": [{"url": PROFILE_URL}]}
+        with patch("sardou.cache.fetch", return_value=None) as mock_fetch:
+            resolve_imports(data, cache_dir=tmp_path, mirror_table={})
+        assert mock_fetch.called
+        assert data["imports"][0]["url"] == PROFILE_URL
@@ -0,0 +1,191 @@
+"""Tests for sardou.opened — Sardou.open and its cache of validated templates."""
+
+import os
+
+import pytest
+
+from sardou import Sardou, opened
+from sardou.opened import OpenCache, open_cache
+
+PUCCINI_JSON = (
+    '{"metadata": {"kind": "SAT"}, '
+    '"nodeTemplates": {"app": {"properties": {"ports": [{"port": 80}]}}}}'
+)
+
+
+@pytest.fixture
+def puccini(fake_puccini, monkeypatch):
+    fake_puccini.write_text(
+        fake_puccini.read_text().replace(
+            "printf '", f"printf '{PUCCINI_JSON}'\nexit 0\nprintf '"
+        )
+    )
+    # Count validations, not result cache hits.
+    monkeypatch.setenv("SARDOU_RESULT_CACHE", "0")
+    open_cache.clear()
+    open_cache.metrics.reset()
+    yield fake_puccini
+    open_cache.clear()
+
+
+class TestOpen:
+    def test_validated_once(self, puccini, puccini_runs, template):
+        first = Sardou.open(template)
+        second = Sardou.open(str(template))
+        assert puccini_runs() == 1
+        assert first is not second
+        assert second._to_json() == first._to_json() == PUCCINI_JSON
+        assert second.raw._to_dict() == first.raw._to_dict()
+        counters = open_cache.metrics.snapshot()["counters"]
+        assert counters == {"open.misses": 1, "open.hits": 1}
+
+    def test_touch_keeps_entry(self, puccini, puccini_runs, template):
+        Sardou.open(template)
+        stat = template.stat()
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        Sardou.open(template)
+        assert puccini_runs() == 1
+
+    def test_changed_file_revalidated(self, puccini, puccini_runs, template):
+        Sardou.open(template)
+        template.write_text(template.read_text().replace("Compute", "Container"))
+        sat = Sardou.open(template)
+        assert puccini_runs() == 2
+        assert sat.raw.service_template.node_templates.app.type == "Container"
+        Sardou.open(template)
+        assert puccini_runs() == 2
+
+    def test_changed_import_revalidated(self, puccini, puccini_runs, template):
+        Sardou.open(template)
+        (template.parent / "types.yaml").write_text(
+            "tosca_definitions_version: tosca_2_0\ndescription: changed\n"
+        )
+        Sardou.open(template)
+        assert puccini_runs() == 2
+
+    def test_locked_separate(self, puccini, puccini_runs, template):
+        Sardou.open(template)
+        Sardou.open(template, locked=False)
+        assert puccini_runs() == 2
+
+    def test_lru_eviction(self, puccini, puccini_runs, tmp_path, template):
+        cache = OpenCache(size=2)
+        others = []
+        for name in ("b", "c"):
+            path = tmp_path / f"{name}.yaml"
+            path.write_text(template.read_text())
+            others.append(path)
+        cache.open(Sardou, template)
+        cache.open(Sardou, others[0])
+        cache.open(Sardou, template)
+        cache.open(Sardou, others[1])
+        assert len(cache) == 2
+        assert cache.metrics.snapshot()["counters"]["open.evictions"] == 1
+        cache.open(Sardou, template)
+        assert puccini_runs() == 3
+        cache.open(Sardou, others[0])
+        assert puccini_runs() == 4
+
+    def test_disabled(self, puccini, puccini_runs, template):
+        cache = OpenCache(size=0)
+        cache.open(Sardou, template)
+        cache.open(Sardou, template)
+        assert puccini_runs() == 2
+        assert len(cache) == 0
+
+    def test_size_from_env(self, monkeypatch):
+        monkeypatch.setenv(opened.SIZE_ENV, "3")
+        assert OpenCache.from_env().size == 3
+
+    def test_missing_file(self, puccini, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            Sardou.open(tmp_path / "missing.yaml")
+
+
+class TestClone:
+    @pytest.fixture
+    def sats(self, puccini, template):
+        return Sardou.open(template), Sardou.open(template)
+
+    def test_data_shared(self, sats):
+        first, second = sats
+        assert first.nodeTemplates._synced() is second.nodeTemplates._synced()
+        assert first.raw._synced() is second.raw._synced()
+
+    def test_changes_not_shared(self, sats):
+        changed, other = sats
+        changed.nodeTemplates.app.properties.ports[0].port = 8080
+        changed.nodeTemplates.app.properties.ports.append({"port": 443})
+        changed.raw.service_template.node_templates.app.type = "Container"
+        del changed.nodeTemplates.app.properties
+        assert other._to_json() == PUCCINI_JSON
+        assert other.raw.service_template.node_templates.app.type == "Compute"
+        assert "properties" not in changed.nodeTemplates.app
+
+    def test_changes_through_held_views(self, sats):
+        changed, other = sats
+        properties = changed.nodeTemplates.app.properties
+        port = properties.ports[0]
+        port.port = 8080
+        properties.image = "nginx"
+        assert changed.nodeTemplates.app.properties.ports[0].port == 8080
+        assert changed.nodeTemplates.app.properties.image == "nginx"
+        assert other.nodeTemplates.app.properties.ports[0].port == 80
+        assert "image" not in other.nodeTemplates.app.properties
+        assert '"port": 8080' in changed._to_json()
+
+    def test_to_dict_is_own(self, sats):
+        changed, other = sats
+        changed.nodeTemplates._to_dict()["app"]["properties"]["ports"].clear()
+        assert other.nodeTemplates.app.properties.ports[0].port == 80
+        assert changed.nodeTemplates.app.properties.ports == []
+
+    def test_added_dicts_writable(self, sats):
+        changed, other = sats
+        ports = changed.nodeTemplates.app.properties.ports
+        ports.append({"port": 443})
+        changed._sync()
+        ports[1].port = 8443
+        assert changed.nodeTemplates._to_dict()["app"]["properties"]["ports"] == [
+            {"port": 80},
+            {"port": 8443},
+        ]
+        assert len(other.nodeTemplates.app.properties.ports) == 1
+
+    def test_nested_lists_not_shared(self, puccini, template):
+        template.write_text(
+            template.read_text()
+            + "      properties:\n"
+            + "        matrix: [[1, 2], [{a: 1}]]\n"
+        )
+        changed = Sardou.open(template)
+        matrix = changed.raw.service_template.node_templates.app.properties.matrix
+        matrix[0].append(3)
+        matrix[1][0]["a"] = 2
+        assert changed.raw._to_dict()["service_template"]["node_templates"]["app"][
+            "properties"
+        ]["matrix"] == [[1, 2, 3], [{"a": 2}]]
+        other = Sardou.open(template)
+        assert other.raw.service_template.node_templates.app.properties.matrix == [
+            [1, 2],
+            [{"a": 1}],
+        ]
+
+    def test_accessors_shared_until_changed(self, sats, monkeypatch):
+        calls = []
+
+        def get_qos(sat):
+            calls.append(sat)
+            return {"ports": sat.nodeTemplates.app.properties.ports[0].port}
+
+        monkeypatch.setattr("sardou.sardou._get_qos", get_qos)
+        changed, other = sats
+        assert changed.get_qos() == other.get_qos() == {"ports": 80}
+        assert len(calls) == 1
+        changed.nodeTemplates.app.properties.ports[0].port = 8080
+        assert changed.get_qos() == {"ports": 8080}
+        assert other.get_qos() == {"ports": 80}
+        assert len(calls) == 2
+
+    def test_timings_empty(self, sats):
+        assert sats[1].timings == {}
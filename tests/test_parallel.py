@@ -0,0 +1,109 @@
+"""Tests for sardou.parallel — ordered process-pool execution."""
+
+import logging
+import os
+import time
+
+import pytest
+
+from sardou import results
+from sardou.cli import main
+from sardou.parallel import captured, imap
+
+
+def _slow_square(n):
+    # Later items finish first, so ordering comes from imap, not timing.
+    time.sleep(0.05 * (4 - n))
+    return n * n, os.getpid()
+
+
+def _log(message):
+    logging.getLogger("sardou.test").error(message)
+    return message
+
+
+class TestImap:
+    def test_ordered(self):
+        results = list(imap(_slow_square, range(4), jobs=4))
+        assert [square for square, _ in results] == [0, 1, 4, 9]
+        assert len({pid for _, pid in results}) > 1
+
+    def test_single_job_in_process(self):
+        results = list(imap(_slow_square, range(2), jobs=1))
+        assert {pid for _, pid in results} == {os.getpid()}
+
+    def test_empty(self):
+        assert list(imap(_slow_square, [], jobs=4)) == []
+
+
+def test_captured():
+    result, logs = captured(_log, "boom")
+    assert result == "boom"
+    assert logs == "boom\n"
+
+
+def _info(message):
+    logging.getLogger("sardou.test").info(message)
+    return message
+
+
+def test_captured_sets_level():
+    # A spawned worker starts with the root logger at WARNING, so INFO
+    # records only reach the capture if captured() lowers the level itself.
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.WARNING)
+    try:
+        assert captured(_info, "quiet") == ("quiet", "")
+        assert captured(_info, "loud", level=logging.INFO) == ("loud", "loud\n")
+        assert root.level == logging.WARNING
+    finally:
+        root.setLevel(level)
+
+
+class TestCliJobs:
+    @pytest.fixture
+    def templates(self, tmp_path):
+        paths = []
+        for i in range(4):
+            path = tmp_path / f"app{i}.yaml"
+            path.write_text(
+                "tosca_definitions_version: tosca_2_0\n"
+                f"description: app {i}\n"
+                "service_template:\n"
+                "  node_templates: {}\n"
+            )
+            paths.append(str(path))
+        return paths
+
+    def _main(self, *argv):
+        with pytest.raises(SystemExit) as exc:
+            main(list(argv))
+        return exc.value.code
+
+    def test_parallel_output_in_order(self, fake_puccini, templates, capsys):
+        assert self._main("-j", "4", "-v", *templates) == 0
+        out = capsys.readouterr().out
+        parsing = [line for line in out.splitlines() if line.startswith("Parsing")]
+        assert parsing == [f"Parsing TOSCA template: {path}" for path in templates]
+
+    def test_parallel_runs_overlap(self, puccini_overlap, templates):
+        assert self._main("-j", "4", *templates) == 0
+        assert puccini_overlap() > 1
+
+    def test_first_failure_reported(self, fake_puccini, templates, capsys):
+        with open(templates[1], "a") as f:
+            f.write("metadata:\n  note: broken\n")
+        assert self._main("-j", "4", *templates) == 1
+        err = capsys.readouterr().err
+        assert "app1.yaml" in err
+        assert "Validation failed" in err
+
+    def test_cache_stats_merged(self, fake_puccini, templates, capsys):
+        results.metrics.reset()
+        assert self._main("-j", "2", "--cache-stats", *templates) == 0
+        out = capsys.readouterr().out
+        assert "results.misses: 4" in out
+
+    def test_invalid_jobs(self, capsys):
+        assert self._main("-j", "0", "x.yaml") == 2
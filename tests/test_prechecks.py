@@ -0,0 +1,197 @@
+"""Tests for sardou.prechecks — fast checks run alongside Puccini."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from ruamel.yaml import YAML
+
+from sardou import Sardou, aio, results, validation
+from sardou.prechecks import MIXED_KINDS, check_structure, run_prechecks
+from sardou.validation import prevalidate, validate_many, validate_template
+
+PROFILE_URL = (
+    "https://raw.githubusercontent.com/Swarmchestrate/tosca/refs/heads/main"
+    "/profiles/eu.swarmchestrate/profile.yaml"
+)
+
+PROFILES = Path(__file__).parent.parent / "profiles"
+
+
+def _template(nodes=None, policies=None):
+    service_template = {"node_templates": nodes or {}}
+    if policies is not None:
+        service_template["policies"] = policies
+    return {
+        "tosca_definitions_version": "tosca_2_0",
+        "imports": [{"namespace": "swch", "url": PROFILE_URL}],
+        "service_template": service_template,
+    }
+
+
+def _check(data):
+    return run_prechecks(prevalidate(data), Path.cwd())
+
+
+class TestRules:
+    def test_valid_template_passes(self):
+        assert _check(_template({"app": {"type": "swch:Microservice"}})) == []
+
+    def test_missing_service_template(self):
+        errors = _check({"tosca_definitions_version": "tosca_2_0"})
+        assert "service_template" in errors[0]
+
+    def test_type_definitions_need_no_service_template(self):
+        data = {
+            "tosca_definitions_version": "tosca_2_0",
+            "node_types": {"Thing": {"derived_from": "Root"}},
+        }
+        assert _check(data) == []
+
+    @pytest.mark.parametrize(
+        "name",
+        sorted(str(p.relative_to(PROFILES)) for p in PROFILES.glob("**/*.yaml")),
+    )
+    def test_profiles_pass(self, name):
+        data = YAML(typ="safe").load((PROFILES / name).read_text())
+        assert check_structure(data) == []
+
+    def test_unknown_policy_target(self):
+        data = _template(
+            {"app": {"type": "swch:Microservice"}},
+            [{"scale": {"type": "swch:Reconfiguration", "targets": ["app", "db"]}}],
+        )
+        assert _check(data) == ["Policy 'scale' targets unknown node template 'db'"]
+
+    def test_capacity_and_microservice(self):
+        data = _template(
+            {
+                "app": {"type": "swch:Microservice"},
+                "edge": {"type": "swch:EdgeCapacity"},
+            }
+        )
+        assert _check(data) == [MIXED_KINDS]
+
+    def test_derived_capacity_type(self):
+        data = _template(
+            {
+                "app": {"type": "swch:Microservice"},
+                "edge": {"type": "MyEdge"},
+            }
+        )
+        data["node_types"] = {"MyEdge": {"derived_from": "swch:EdgeCapacity"}}
+        assert _check(data) == [MIXED_KINDS]
+
+    def test_unreadable_check_skipped_alone(self):
+        data = _template(
+            {
+                "app": {"type": "swch:Microservice"},
+                "edge": {"type": "swch:EdgeCapacity"},
+            },
+            [{"scale": {"type": "swch:Reconfiguration", "targets": 5}}],
+        )
+        assert _check(data) == [MIXED_KINDS]
+
+    def test_colocation_split(self):
+        nodes = {"a": {"type": "swch:Microservice"}, "b": {"type": "swch:Microservice"}}
+        policies = [
+            {"col": {"type": "swch:Scheduling.Colocation", "targets": ["a", "b"]}},
+            {"rec1": {"type": "swch:Reconfiguration", "targets": ["a"]}},
+            {"rec2": {"type": "swch:Reconfiguration", "targets": ["b"]}},
+        ]
+        errors = _check(_template(nodes, policies))
+        assert "Colocated microservices" in errors[0]
+
+
+class TestFailFast:
+    BAD = _template(
+        {"app": {"type": "swch:Microservice"}},
+        [{"scale": {"type": "swch:Reconfiguration", "targets": ["db"]}}],
+    )
+
+    @pytest.fixture
+    def slow_puccini(self, fake_puccini):
+        fake_puccini.write_text(
+            fake_puccini.read_text().replace("sleep 0.2", "sleep 5")
+        )
+        return fake_puccini
+
+    def test_puccini_killed(self, slow_puccini, caplog):
+        start = time.perf_counter()
+        assert validate_template(self.BAD) is None
+        assert time.perf_counter() - start < 2
+        assert "targets unknown node template 'db'" in caplog.text
+
+    def test_sardou_raises(self, slow_puccini):
+        start = time.perf_counter()
+        with pytest.raises(ValueError) as raised:
+            Sardou(content=self.BAD)
+        assert time.perf_counter() - start < 2
+        assert str(raised.value) == (
+            "Validation failed for: provided content\n"
+            "Policy 'scale' targets unknown node template 'db'"
+        )
+
+    def test_aload_raises(self, slow_puccini):
+        start = time.perf_counter()
+        with pytest.raises(ValueError, match="unknown node template 'db'"):
+            asyncio.run(Sardou.aload(content=self.BAD))
+        assert time.perf_counter() - start < 2
+
+    def test_sardou_raises_mixed_kinds(self, slow_puccini):
+        data = _template(
+            {
+                "app": {"type": "swch:Microservice"},
+                "edge": {"type": "swch:EdgeCapacity"},
+            }
+        )
+        with pytest.raises(ValueError, match="cannot have both"):
+            Sardou(content=data)
+
+    def test_puccini_error_in_message(self, fake_puccini):
+        data = _template({"app": {"type": "swch:Microservice"}})
+        data["description"] = "broken"
+        with pytest.raises(ValueError, match="provided content\nbroken template"):
+            Sardou(content=data)
+
+    @pytest.fixture
+    def late_precheck(self, monkeypatch):
+        """A pre-check failing after Puccini exits; records group kills."""
+        killed = []
+        monkeypatch.setattr("os.killpg", lambda *args: killed.append(args))
+
+        def precheck():
+            time.sleep(0.5)
+            return ["late"]
+
+        return precheck, killed
+
+    def test_reaped_puccini_not_killed(self, fake_puccini, late_precheck):
+        precheck, killed = late_precheck
+        result = validation._run_puccini(b"{}", precheck)
+        assert result.stderr == "late"
+        assert killed == []
+
+    def test_reaped_puccini_not_killed_aio(self, fake_puccini, late_precheck):
+        precheck, killed = late_precheck
+        result = asyncio.run(aio._run_puccini(b"{}", precheck))
+        assert result.stderr == "late"
+        assert killed == []
+
+    def test_failure_not_stored(self, fake_puccini):
+        assert validate_template(self.BAD) is None
+        assert not any(results.results_dir().rglob("*.json"))
+
+    def test_aio_failure_not_stored(self, fake_puccini):
+        assert asyncio.run(aio.avalidate_template(self.BAD)) is None
+        assert not any(results.results_dir().rglob("*.json"))
+
+    def test_batch_skips_puccini(self, fake_puccini):
+        errors = {}
+        assert validate_many([self.BAD], errors=errors) == [None]
+        assert "db" in errors[0]
+        assert not (fake_puccini.parent / "calls").exists()
+
+    def test_valid_template_unaffected(self, fake_puccini):
+        assert validate_template(_template({"app": {"type": "swch:Microservice"}}))
@@ -0,0 +1,71 @@
+"""Tests for sardou.results — the persistent Puccini result cache."""
+
+from sardou import results
+from sardou.validation import PUCCINI_FLAGS, validate_template
+
+
+class TestTemplateKey:
+    def _key(self, template, cmd, flags=PUCCINI_FLAGS):
+        data = {"imports": [{"url": "types.yaml"}], "a": 1}
+        return results.template_key(data, template.parent, str(cmd), flags)
+
+    def test_stable(self, fake_puccini, template):
+        assert self._key(template, fake_puccini) == self._key(template, fake_puccini)
+
+    def test_canonical(self, fake_puccini, template):
+        a = {"x": 1, "y": {"b": 2, "a": 1}}
+        b = {"y": {"a": 1, "b": 2}, "x": 1}
+        cmd = str(fake_puccini)
+        assert results.template_key(a, template.parent, cmd, []) == (
+            results.template_key(b, template.parent, cmd, [])
+        )
+
+    def test_nested_import_change(self, fake_puccini, template):
+        before = self._key(template, fake_puccini)
+        (template.parent / "base.yaml").write_text("description: changed\n")
+        assert self._key(template, fake_puccini) != before
+
+    def test_flags_change(self, fake_puccini, template):
+        assert self._key(template, fake_puccini) != self._key(
+            template, fake_puccini, flags=[]
+        )
+
+    def test_version_change(self, fake_puccini, template):
+        before = self._key(template, fake_puccini)
+        fake_puccini.write_text(
+            fake_puccini.read_text().replace("fake 0.0", "fake 0.1")
+        )
+        assert self._key(template, fake_puccini) != before
+
+    def test_disabled(self, fake_puccini, template, monkeypatch):
+        monkeypatch.setenv(results.RESULTS_ENV, "0")
+        assert self._key(template, fake_puccini) is None
+
+    def test_unknown_version(self, template, tmp_path):
+        assert self._key(template, tmp_path / "missing") is None
+
+
+class TestValidateTemplate:
+    def test_second_run_skips_puccini(self, puccini_runs, template):
+        first = validate_template(template)
+        second = validate_template(template)
+        assert first.stdout == second.stdout
+        assert puccini_runs() == 1
+
+    def test_changed_template_revalidated(self, puccini_runs, template):
+        validate_template(template)
+        template.write_text(template.read_text().replace("Compute", "Container"))
+        validate_template(template)
+        assert puccini_runs() == 2
+
+    def test_failure_cached(self, puccini_runs, template):
+        template.write_text(template.read_text() + "description: broken\n")
+        assert validate_template(template) is None
+        assert validate_template(template) is None
+        assert puccini_runs() == 1
+
+    def test_disabled(self, puccini_runs, template, monkeypatch):
+        monkeypatch.setenv(results.RESULTS_ENV, "no")
+        validate_template(template)
+        validate_template(template)
+        assert puccini_runs() == 2
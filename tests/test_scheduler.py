@@ -0,0 +1,261 @@
+"""Tests for sardou.scheduler — the process-wide limit on Puccini runs."""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sardou import Sardou, aio, results, validation
+from sardou.scheduler import Scheduler, SchedulerBusy, scheduler
+from sardou.validation import validate_many, validate_template
+
+TEMPLATE = (
+    "tosca_definitions_version: tosca_2_0\n"
+    "service_template:\n"
+    "  node_templates:\n"
+    "    {name}: {{}}\n"
+)
+
+
+@pytest.fixture
+def limits():
+    """Restore the shared scheduler after the test."""
+    scheduler.metrics.reset()
+    yield scheduler.configure
+    scheduler.configure()
+    scheduler.metrics.reset()
+
+
+@pytest.fixture
+def slow_puccini(fake_puccini):
+    fake_puccini.write_text(fake_puccini.read_text().replace("sleep 0.2", "sleep 5"))
+    return fake_puccini
+
+
+def _in_threads(fn, count):
+    threads = [threading.Thread(target=fn, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestScheduler:
+    def test_limits_runs_in_flight(self):
+        sched = Scheduler(max_in_flight=2)
+        peak = []
+
+        def run(_):
+            with sched.slot():
+                peak.append(sched.stats()["in_flight"])
+                time.sleep(0.05)
+
+        _in_threads(run, 6)
+        assert max(peak) == 2
+        assert sched.stats() == {"in_flight": 0, "queued": 0}
+        assert sched.metrics.snapshot()["counters"]["puccini.runs"] == 6
+
+    def test_admits_in_arrival_order(self):
+        sched = Scheduler(max_in_flight=1)
+        sched.acquire()
+        order = []
+
+        def run(i):
+            time.sleep(i * 0.02)
+            with sched.slot():
+                order.append(i)
+
+        thread = threading.Thread(target=_in_threads, args=(run, 5))
+        thread.start()
+        time.sleep(0.2)
+        sched.release()
+        thread.join()
+        assert order == [0, 1, 2, 3, 4]
+
+    def test_full_queue_rejects(self):
+        sched = Scheduler(max_in_flight=1, max_queued=1)
+        sched.acquire()
+        waiter = threading.Thread(target=lambda: (sched.acquire(), sched.release()))
+        waiter.start()
+        while sched.stats()["queued"] == 0:
+            time.sleep(0.01)
+        with pytest.raises(SchedulerBusy):
+            sched.acquire()
+        sched.release()
+        waiter.join()
+        assert sched.metrics.snapshot()["counters"]["puccini.rejected"] == 1
+
+    def test_queue_wait_recorded(self):
+        sched = Scheduler(max_in_flight=1)
+        sched.acquire()
+        threading.Timer(0.1, sched.release).start()
+        sched.acquire()
+        waited = sched.metrics.snapshot()["histograms"]["puccini.queue_seconds"]
+        assert waited["count"] == 2
+        assert waited["max"] >= 0.09
+
+    def test_enqueued_callback_admitted_in_order(self):
+        sched = Scheduler(max_in_flight=1)
+        sched.acquire()
+        admitted = []
+        ticket = sched.enqueue(lambda: admitted.append(1))
+        assert admitted == [] and sched.stats()["queued"] == 1
+        sched.release()
+        assert admitted == [1]
+        assert sched.stats() == {"in_flight": 1, "queued": 0}
+        assert not sched.withdraw(ticket)
+        sched.release()
+
+    def test_withdrawn_callback_never_admitted(self):
+        sched = Scheduler(max_in_flight=1)
+        sched.acquire()
+        admitted = []
+        ticket = sched.enqueue(lambda: admitted.append(1))
+        assert sched.withdraw(ticket)
+        sched.release()
+        assert admitted == []
+        assert sched.stats() == {"in_flight": 0, "queued": 0}
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("SARDOU_PUCCINI_MAX", "3")
+        monkeypatch.setenv("SARDOU_PUCCINI_TIMEOUT", "1.5")
+        sched = Scheduler.from_env()
+        assert (sched.max_in_flight, sched.timeout, sched.max_queued) == (3, 1.5, None)
+
+
+class TestPucciniRuns:
+    def test_threads_share_the_limit(self, fake_puccini, limits):
+        limits(max_in_flight=2)
+        peak = []
+
+        def sample():
+            while not done.is_set():
+                peak.append(scheduler.stats()["in_flight"])
+                time.sleep(0.01)
+
+        done = threading.Event()
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+
+        documents = [TEMPLATE.format(name=f"node{i}").encode() for i in range(6)]
+
+        def run(i):
+            assert validation._run_puccini(documents[i]).returncode == 0
+
+        _in_threads(run, 6)
+        done.set()
+        sampler.join()
+        assert max(peak) == 2
+        assert scheduler.metrics.snapshot()["counters"]["puccini.runs"] == 6
+
+    def test_validate_many_respects_limit(self, puccini_overlap, limits):
+        limits(max_in_flight=1)
+        validate_many([TEMPLATE.format(name=f"node{i}") for i in range(3)])
+        assert puccini_overlap() == 1
+
+    def test_timeout_kills_puccini(self, slow_puccini, limits):
+        limits(timeout=0.5)
+        start = time.perf_counter()
+        assert validate_template(TEMPLATE.format(name="node")) is None
+        assert time.perf_counter() - start < 3
+        assert scheduler.metrics.snapshot()["counters"]["puccini.timeouts"] == 1
+
+    def test_timed_out_run_not_cached(self, slow_puccini, limits):
+        limits(timeout=0.5)
+        validate_template(TEMPLATE.format(name="node"))
+        assert not any(results.results_dir().rglob("*.json"))
+
+    def test_async_timeout(self, slow_puccini, limits):
+        limits(timeout=0.5)
+        start = time.perf_counter()
+        result = asyncio.run(aio.avalidate_template(TEMPLATE.format(name="node")))
+        assert result is None
+        assert time.perf_counter() - start < 3
+        assert scheduler.stats()["in_flight"] == 0
+
+    def test_async_runs_share_the_limit(self, puccini_overlap, limits):
+        limits(max_in_flight=1)
+
+        async def main():
+            return await asyncio.gather(
+                *(
+                    aio.avalidate_template(TEMPLATE.format(name=f"node{i}"))
+                    for i in range(3)
+                )
+            )
+
+        assert all(asyncio.run(main()))
+        assert puccini_overlap() == 1
+        assert scheduler.metrics.snapshot()["counters"]["puccini.runs"] == 3
+
+    def test_async_waiters_hold_no_threads(self, fake_puccini, limits, monkeypatch):
+        limits(max_in_flight=1)
+        monkeypatch.setattr(aio, "MAX_CONCURRENCY", 4)
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(3))
+            loads = (
+                Sardou.aload(content=TEMPLATE.format(name=f"node{i}")) for i in range(8)
+            )
+            try:
+                return await asyncio.wait_for(asyncio.gather(*loads), 30)
+            finally:
+                # Frees any thread stuck waiting, so a failure cannot hang.
+                limits(max_in_flight=64)
+
+        assert len(asyncio.run(main())) == 8
+
+    def test_cancelled_waiter_leaves_queue(self, limits):
+        limits(max_in_flight=1)
+        scheduler.acquire()
+
+        async def main():
+            waiter = asyncio.ensure_future(aio._acquire())
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["queued"] == 1
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(main())
+        scheduler.release()
+        assert scheduler.stats() == {"in_flight": 0, "queued": 0}
+
+    def test_waiter_cancelled_once_admitted(self, limits):
+        limits(max_in_flight=1)
+        scheduler.acquire()
+
+        async def main():
+            waiter = asyncio.ensure_future(aio._acquire())
+            await asyncio.sleep(0.01)
+            scheduler.release()  # admits the waiter before it resumes
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(main())
+        assert scheduler.stats() == {"in_flight": 0, "queued": 0}
+
+    def test_cancel_kills_puccini(self, slow_puccini, limits):
+        calls = slow_puccini.parent / "calls"
+
+        async def main():
+            task = asyncio.ensure_future(
+                aio.avalidate_template(TEMPLATE.format(name="node"))
+            )
+            while not (calls.exists() and calls.read_text().strip()):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        assert time.perf_counter() - start < 3
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(calls.read_text()), 0)
+        assert scheduler.stats() == {"in_flight": 0, "queued": 0}
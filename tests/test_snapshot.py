@@ -0,0 +1,93 @@
+"""Tests for sardou.snapshot — saving and loading validated templates."""
+
+import copy
+import pickle
+
+import pytest
+
+from sardou import Sardou
+from sardou.sardou import DotDict
+from sardou.validation import TemplateKind
+
+
+@pytest.fixture
+def sat(fake_puccini, template):
+    return Sardou(template)
+
+
+@pytest.fixture
+def snapshot(sat, tmp_path):
+    path = tmp_path / "app.snapshot"
+    sat.save_snapshot(path)
+    return path
+
+
+class TestSnapshot:
+    def test_round_trip(self, sat, snapshot):
+        loaded = Sardou.load_snapshot(snapshot)
+        assert loaded._to_dict() == sat._to_dict()
+        assert loaded.raw._to_dict() == sat.raw._to_dict()
+        assert loaded.kind is TemplateKind.TDT
+        assert loaded.path == sat.path
+
+    def test_loading_skips_validation(self, sat, snapshot, puccini_runs, monkeypatch):
+        monkeypatch.setattr("sardou.validation.PUCCINI_CMD", "/nonexistent/puccini")
+        before = puccini_runs()
+        loaded = Sardou.load_snapshot(snapshot)
+        assert puccini_runs() == before
+        assert loaded.raw.service_template.node_templates.app.type == "Compute"
+
+    def test_loaded_object_is_usable(self, snapshot):
+        loaded = Sardou.load_snapshot(snapshot)
+        loaded.metadata["note"] = "changed"
+        assert '"note": "changed"' in loaded._to_json()
+
+    def test_matching_template(self, snapshot, template):
+        assert Sardou.load_snapshot(snapshot, template=template)
+
+    def test_changed_template_rejected(self, snapshot, template):
+        template.write_text(template.read_text().replace("Compute", "Other"))
+        with pytest.raises(ValueError, match="was not made from"):
+            Sardou.load_snapshot(snapshot, template=template)
+
+    def test_changed_import_rejected(self, snapshot, template):
+        (template.parent / "base.yaml").write_text("description: changed\n")
+        with pytest.raises(ValueError, match="current imports and Puccini"):
+            Sardou.load_snapshot(snapshot, template=template)
+
+    def test_other_puccini_rejected(self, snapshot, template, fake_puccini):
+        fake_puccini.write_text(
+            fake_puccini.read_text().replace("fake 0.0", "fake 0.1")
+        )
+        with pytest.raises(ValueError, match="current imports and Puccini"):
+            Sardou.load_snapshot(snapshot, template=template)
+
+    def test_corrupt_payload_rejected(self, snapshot):
+        blob = bytearray(snapshot.read_bytes())
+        blob[-10] ^= 0xFF
+        snapshot.write_bytes(bytes(blob))
+        with pytest.raises(ValueError, match="corrupt"):
+            Sardou.load_snapshot(snapshot)
+
+    def test_not_a_snapshot(self, template):
+        with pytest.raises(ValueError, match="Not a Sardou snapshot"):
+            Sardou.load_snapshot(template)
+
+
+class TestPickle:
+    def test_dotdict_pickles_as_its_data(self):
+        d = DotDict(a={"b": [{"c": 1}]})
+        assert d.a.b[0].c == 1
+        restored = pickle.loads(pickle.dumps(d))
+        assert restored._to_dict() == {"a": {"b": [{"c": 1}]}}
+        assert restored.a.b[0].c == 1
+
+    def test_sardou_pickles(self, sat):
+        restored = pickle.loads(pickle.dumps(sat))
+        assert restored._to_dict() == sat._to_dict()
+        assert restored.kind is sat.kind
+
+    def test_deepcopy_independent(self, sat):
+        clone = copy.deepcopy(sat)
+        clone.metadata["note"] = "changed"
+        assert "note" not in sat.metadata
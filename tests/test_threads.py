@@ -0,0 +1,125 @@
+"""Tests for building and using Sardou objects from many threads at once."""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from sardou import Sardou, results
+from sardou.rdt import generate_rdt
+from sardou.sardou import DotDict
+from sardou.yamlio import ThreadLocalYAML
+
+THREADS = 4
+
+
+def _template(i, nodes=100):
+    lines = [
+        "tosca_definitions_version: tosca_2_0",
+        f"description: app {i}",
+        "service_template:",
+        "  node_templates:",
+    ]
+    for n in range(nodes):
+        lines += [
+            f"    app{i}_{n}:",
+            "      type: Compute",
+            "      properties:",
+            f"        ports: [{n}, {i}]",
+            f"        labels: {{app: app{i}, node: '{n}'}}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _write(directory, nodes):
+    paths = []
+    for i in range(THREADS * 2):
+        path = directory / f"app{i}.yaml"
+        path.write_text(_template(i, nodes))
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def templates(tmp_path):
+    return _write(tmp_path, nodes=100)
+
+
+@pytest.fixture
+def small_templates(tmp_path):
+    # Parsing holds the GIL; only the Puccini runs can overlap.
+    return _write(tmp_path, nodes=5)
+
+
+@pytest.fixture
+def no_result_cache(monkeypatch):
+    monkeypatch.setenv(results.RESULTS_ENV, "0")
+
+
+@pytest.fixture
+def interleaved():
+    """Switch threads as often as possible, so races show up."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _summary(sat):
+    return sat.raw._to_dict(), sat._to_json()
+
+
+def _in_pool(fn, items):
+    with ThreadPoolExecutor(THREADS) as pool:
+        return list(pool.map(fn, items))
+
+
+def test_thread_local_yaml():
+    yaml = ThreadLocalYAML(width=4096)
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(yaml.yaml))
+    thread.start()
+    thread.join()
+    assert seen[0] is not yaml.yaml
+    assert seen[0].width == yaml.yaml.width == 4096
+
+
+def test_builds_match_serial(fake_puccini, no_result_cache, templates, interleaved):
+    expected = [_summary(Sardou(path)) for path in templates]
+    built = _in_pool(lambda path: _summary(Sardou(path)), templates)
+    assert built == expected
+
+
+def test_puccini_runs_overlap(puccini_overlap, no_result_cache, small_templates):
+    _in_pool(Sardou, small_templates)
+    # Puccini runs in its own process, so the 0.2s runs overlap.
+    assert puccini_overlap() > 1
+
+
+def test_generate_rdt(tmp_path, interleaved):
+    cdt = SimpleNamespace(
+        raw=DotDict(
+            tosca_definitions_version="tosca_2_0",
+            service_template={
+                "node_templates": {
+                    f"vm{i}": {"type": "Compute", "properties": {"size": i}}
+                    for i in range(50)
+                }
+            },
+        )
+    )
+    offers = [
+        {"app": {f"offer{n}": {"ids": {"res_id": f"vm{n}", "ms_id": "app"}}}}
+        for n in range(THREADS * 2)
+    ]
+
+    def rdt(args):
+        n, offer = args
+        path = tmp_path / f"rdt{n}-{threading.get_ident()}.yaml"
+        generate_rdt(cdt, offer, str(path))
+        return path.read_text()
+
+    expected = [rdt(args) for args in enumerate(offers)]
+    assert _in_pool(rdt, enumerate(offers)) == expected
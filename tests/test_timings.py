@@ -0,0 +1,108 @@
+"""Tests for sardou.timings — per-stage timing of Sardou construction."""
+
+import asyncio
+
+import pytest
+
+from sardou import Sardou, timings
+from sardou.cli import main
+
+STAGES = [
+    "read",
+    "strip blank lines",
+    "yaml load",
+    "import resolution",
+    "result lookup",
+    "serialize",
+    "puccini",
+    "output parse",
+    "dotdict build",
+    "classify",
+    "raw build",
+    "post validate",
+]
+
+
+@pytest.fixture
+def hook():
+    calls = []
+
+    def record(sardou, spent):
+        calls.append((sardou, spent))
+
+    timings.add_hook(record)
+    yield calls
+    timings.remove_hook(record)
+
+
+class TestTimed:
+    def test_accumulates(self):
+        spent = {}
+        for _ in range(2):
+            with timings.timed(spent, "stage"):
+                sum(range(10000))
+        assert list(spent) == ["stage"]
+        assert spent["stage"]["wall"] > 0
+        assert spent["stage"]["cpu"] >= 0
+
+    def test_none_records_nothing(self):
+        with timings.timed(None, "stage"):
+            pass
+
+    def test_format(self):
+        text = timings.format_timings(
+            {
+                "yaml load": {"wall": 0.002, "cpu": 0.001},
+                "puccini": {"wall": 0.1, "cpu": 0},
+            }
+        )
+        lines = text.splitlines()
+        assert lines[0].startswith("yaml load")
+        assert "2.00 ms wall" in lines[0]
+        assert lines[-1].startswith("total")
+        assert "102.00 ms wall" in lines[-1]
+
+
+class TestSardouTimings:
+    def test_stages_recorded_in_order(self, fake_puccini, template):
+        sat = Sardou(template)
+        assert list(sat.timings) == STAGES
+        assert sat.timings["puccini"]["wall"] >= 0.2
+
+    def test_not_part_of_template(self, fake_puccini, template):
+        sat = Sardou(template)
+        assert "timings" not in sat._to_json(indent=2)
+
+    def test_cached_result_skips_puccini(self, fake_puccini, template):
+        Sardou(template)
+        sat = Sardou(template)
+        assert "puccini" not in sat.timings
+        assert "result lookup" in sat.timings
+
+    def test_aload(self, fake_puccini, template):
+        sat = asyncio.run(Sardou.aload(template))
+        assert list(sat.timings) == STAGES
+
+    def test_hook_called(self, fake_puccini, template, hook):
+        sat = Sardou(template)
+        assert hook == [(sat, sat.timings)]
+
+    def test_failing_hook_logged(self, fake_puccini, template, caplog):
+        def broken(sardou, spent):
+            raise RuntimeError("metrics pipeline down")
+
+        timings.add_hook(broken)
+        try:
+            assert Sardou(template)
+        finally:
+            timings.remove_hook(broken)
+        assert "metrics pipeline down" in caplog.text
+
+    def test_cli(self, fake_puccini, template, capsys):
+        with pytest.raises(SystemExit) as exc:
+            main(["-j", "1", "--timings", str(template)])
+        assert exc.value.code == 0
+        out = capsys.readouterr().out
+        assert f"Timings for {template}:" in out
+        assert "puccini" in out
+        assert out.rstrip().splitlines()[-1].startswith("total")
@@ -84,6 +84,64 @@ class TestDotDict:
         parsed = json.loads(d._to_json())
         assert parsed == {"x": 1}
 
+    def test_to_dict_is_not_a_copy(self, DotDict):
+        data = {"a": {"b": [{"c": 1}]}}
+        d = DotDict._wrap(data)
+        assert d._to_dict() is data
+        d.a.b[0].c = 2
+        assert data["a"]["b"][0]["c"] == 2
+
+    def test_nested_wrapped_on_access(self, DotDict):
+        d = DotDict(outer={"inner": {"x": 1}})
+        assert d._views == {}
+        assert d.outer is d.outer
+        assert list(d._views) == ["outer"]
+
+    def test_list_changes_written_back(self, DotDict):
+        d = DotDict(items=[{"x": 1}])
+        d.items.append(DotDict(x=2))
+        d.items.append({"x": 3})
+        assert d._to_dict() == {"items": [{"x": 1}, {"x": 2}, {"x": 3}]}
+
+    def test_assign_dotdict_stores_plain_data(self, DotDict):
+        d = DotDict()
+        inner = DotDict(x=1)
+        d.inner = inner
+        assert d.inner is inner
+        assert type(d._to_dict()["inner"]) is dict
+
+    def test_replaced_value_rewrapped(self, DotDict):
+        d = DotDict(a={"x": 1})
+        assert d.a.x == 1
+        d._to_dict()["a"] = {"x": 2}
+        assert d.a.x == 2
+
+    def test_list_append_through_to_dict_kept(self, DotDict):
+        d = DotDict(a=[{"x": 1}])
+        items = d.a
+        d._to_dict()["a"].append({"x": 2})
+        assert d._to_dict() == {"a": [{"x": 1}, {"x": 2}]}
+        assert d.a[1].x == 2
+        assert items[1].x == 2
+
+    def test_list_item_replaced_through_to_dict_kept(self, DotDict):
+        d = DotDict(a=[{"x": 1}, 5])
+        assert d.a[0].x == 1
+        d._to_dict()["a"][0] = {"x": 2}
+        d._to_dict()["a"][1] = 6
+        assert d._to_dict() == {"a": [{"x": 2}, 6]}
+        assert d.a[0].x == 2
+        assert '"x": 2' in d._to_json()
+
+    def test_list_change_through_to_dict_in_clone(self, DotDict):
+        d = DotDict._wrap({"a": [{"x": 1}]}, {"json": None, "memo": {}, "private": {}})
+        original = d._data["a"]
+        assert d.a[0].x == 1
+        d._to_dict()["a"].append({"x": 2})
+        d.a[1].x = 3
+        assert d._to_dict() == {"a": [{"x": 1}, {"x": 3}]}
+        assert original == [{"x": 1}]
+
 
 # ---------------------------------------------------------------------------
 # prevalidate
@@ -149,3 +207,295 @@ class TestPrevalidate:
         # ...but the caller's dict is untouched.
         assert data["imports"][0] == {"profile": "some.profile"}
         assert result is not data
+
+    def test_dict_input_node_filter_not_mutated(self, prevalidate):
+        node = {"type": "Compute", "node_filter": {"properties": []}}
+        data = {
+            "tosca_definitions_version": "tosca_2_0",
+            "service_template": {"node_templates": {"a": node}},
+        }
+        result = prevalidate(data)
+        assert "node_filter" not in result["service_template"]["node_templates"]["a"]
+        assert "node_filter" in node
+
+    def test_dict_input_untouched_parts_shared(self, prevalidate):
+        """Only what prevalidate rewrites is copied; inline data is shared."""
+        inline = {"data": list(range(1000))}
+        node = {"type": "Compute", "properties": inline}
+        data = {
+            "tosca_definitions_version": "tosca_2_0",
+            "service_template": {"node_templates": {"a": node}},
+        }
+        result = prevalidate(data)
+        assert result["service_template"]["node_templates"]["a"] is node
+        assert result["service_template"] is not data["service_template"]
+
+    def test_parsed_merge_keys_not_mutated(self, prevalidate, tmp_path):
+        import io
+
+        from sardou import validation
+
+        f = tmp_path / "merge.yaml"
+        f.write_text(
+            "tosca_definitions_version: tosca_2_0\n"
+            "base: &base\n"
+            "  type: Compute\n"
+            "service_template:\n"
+            "  node_templates:\n"
+            "    app:\n"
+            "      <<: *base\n"
+            "      node_filter: {}\n"
+        )
+
+        def dump(data):
+            stream = io.StringIO()
+            validation.yaml.dump(data, stream)
+            return stream.getvalue()
+
+        data = validation.parse_template(f)
+        before = dump(data)
+        result = prevalidate(f, locked=False, data=data)
+        assert dump(data) == before
+        app = result["service_template"]["node_templates"]["app"]
+        assert app["type"] == "Compute"
+        assert "node_filter" not in app
+
+
+# ---------------------------------------------------------------------------
+# Puccini JSON output
+# ---------------------------------------------------------------------------
+
+
+class TestPucciniJson:
+    PUCCINI_JSON = (
+        '{"metadata": {"kind": "TDT"}, "nodeTemplates": {"a": {"x": [{"y": 1}]}}}'
+    )
+
+    @pytest.fixture
+    def sardou(self, fake_puccini, tmp_path):
+        from sardou import Sardou
+
+        fake_puccini.write_text(
+            fake_puccini.read_text().replace(
+                "printf '", f"printf '{self.PUCCINI_JSON}'\nexit 0\nprintf '"
+            )
+        )
+        path = tmp_path / "t.yaml"
+        path.write_text("tosca_definitions_version: tosca_2_0\nservice_template: {}\n")
+        return Sardou(path)
+
+    def test_puccini_asked_for_json(self):
+        from sardou.validation import _puccini_args
+
+        assert "json" in _puccini_args()
+
+    def test_output_decoded(self, sardou):
+        assert sardou.nodeTemplates.a.x[0].y == 1
+
+    def test_unmodified_returns_puccini_output(self, sardou):
+        assert sardou._to_json() == self.PUCCINI_JSON
+
+    def test_formatting_re_encodes(self, sardou):
+        import json
+
+        text = sardou._to_json(indent=2)
+        assert text != self.PUCCINI_JSON
+        assert json.loads(text) == json.loads(self.PUCCINI_JSON)
+
+    def test_nested_change_re_encodes(self, sardou):
+        import json
+
+        sardou.nodeTemplates.a.x[0].y = 2
+        assert json.loads(sardou._to_json())["nodeTemplates"]["a"]["x"][0]["y"] == 2
+
+    def test_to_dict_change_re_encodes(self, sardou):
+        import json
+
+        sardou._to_dict()["nodeTemplates"]["a"]["x"][0]["y"] = 2
+        assert json.loads(sardou._to_json())["nodeTemplates"]["a"]["x"][0]["y"] == 2
+
+    def test_delete_re_encodes(self, sardou):
+        import json
+
+        del sardou.nodeTemplates["a"]
+        assert json.loads(sardou._to_json())["nodeTemplates"] == {}
+
+    def test_list_append_re_encodes(self, sardou):
+        import json
+
+        sardou.nodeTemplates.a.x.append({"y": 2})
+        assert json.loads(sardou._to_json())["nodeTemplates"]["a"]["x"][1] == {"y": 2}
+
+    def test_attributes_not_part_of_template(self, sardou):
+        assert set(sardou._to_dict()) == {"metadata", "nodeTemplates"}
+        assert sardou._to_json() == self.PUCCINI_JSON
+
+
+# ---------------------------------------------------------------------------
+# Sardou construction
+# ---------------------------------------------------------------------------
+
+
+class TestSingleParse:
+    TEMPLATE = (
+        "tosca_definitions_version: tosca_2_0\n"
+        "service_template:\n"
+        "  node_templates:\n"
+        "    app:\n"
+        "      type: Compute\n"
+        "      node_filter: {}\n"
+    )
+
+    @pytest.fixture
+    def loads(self, monkeypatch):
+        from sardou import validation
+
+        calls = []
+        load = validation.yaml.load
+
+        def counting(stream):
+            calls.append(stream)
+            return load(stream)
+
+        monkeypatch.setattr(validation.yaml, "load", counting)
+        return calls
+
+    def test_file_parsed_once(self, fake_puccini, loads, tmp_path):
+        from sardou import Sardou
+
+        path = tmp_path / "t.yaml"
+        path.write_text(self.TEMPLATE)
+        sat = Sardou(path)
+        assert len(loads) == 1
+        # raw comes from the same parse, before prevalidation rewrote it.
+        assert sat.raw.service_template.node_templates.app.type == "Compute"
+        assert "node_filter" in sat.raw.service_template.node_templates.app
+
+    def test_content_parsed_once(self, fake_puccini, loads):
+        from sardou import Sardou
+
+        sat = Sardou(content=self.TEMPLATE)
+        assert len(loads) == 1
+        assert sat.raw.tosca_definitions_version == "tosca_2_0"
+
+    def test_content_dict_not_modified_through_raw(self, fake_puccini):
+        from sardou import Sardou
+
+        content = {
+            "tosca_definitions_version": "tosca_2_0",
+            "service_template": {"node_templates": {"a": {"type": "Compute"}}},
+        }
+        sat = Sardou(content=content)
+        assert sat.raw._to_dict() is not content
+        sat.raw.service_template.node_templates.a.type = "X"
+        assert content["service_template"]["node_templates"]["a"]["type"] == "Compute"
+
+    def test_raw_plain_types(self, fake_puccini):
+        import datetime
+
+        from sardou import Sardou
+
+        sat = Sardou(
+            content=self.TEMPLATE
+            + "      properties:\n"
+            + "        ratio: 0.5\n"
+            + "        count: 0x10\n"
+            + "        since: 2024-01-02 03:04:05\n"
+            + "        script: |\n"
+            + "          echo hi\n"
+            + "        ports: [80]\n"
+        )
+        raw = sat.raw._to_dict()
+        app = raw["service_template"]["node_templates"]["app"]
+        properties = app["properties"]
+        assert type(raw) is dict
+        assert type(properties["ports"]) is list
+        assert type(properties["ratio"]) is float
+        assert type(properties["count"]) is int
+        assert properties["count"] == 16
+        assert type(properties["script"]) is str
+        assert type(properties["since"]) is datetime.datetime
+        assert all(type(key) is str for key in properties)
+
+
+# ---------------------------------------------------------------------------
+# Accessor results
+# ---------------------------------------------------------------------------
+
+
+class TestMemoizedAccessors:
+    PUCCINI_JSON = (
+        '{"metadata": {"kind": "SAT"}, "nodeTemplates": {"a": {"x": [{"y": 1}]}}}'
+    )
+
+    @pytest.fixture
+    def sat(self, fake_puccini, tmp_path):
+        from sardou import Sardou
+
+        fake_puccini.write_text(
+            fake_puccini.read_text().replace(
+                "printf '", f"printf '{self.PUCCINI_JSON}'\nexit 0\nprintf '"
+            )
+        )
+        path = tmp_path / "t.yaml"
+        path.write_text(
+            "tosca_definitions_version: tosca_2_0\n"
+            "service_template:\n"
+            "  node_templates:\n"
+            "    a: {type: Compute}\n"
+        )
+        return Sardou(path)
+
+    @pytest.fixture
+    def qos_calls(self, monkeypatch):
+        calls = []
+
+        def get_qos(sat):
+            calls.append(sat)
+            return {"bandwidth": {"targets": ["a"], "y": sat.nodeTemplates.a.x[0].y}}
+
+        monkeypatch.setattr("sardou.sardou._get_qos", get_qos)
+        return calls
+
+    def test_result_reused(self, sat, qos_calls):
+        assert sat.get_qos() == sat.get_qos()
+        assert len(qos_calls) == 1
+
+    def test_callers_get_copies(self, sat, qos_calls):
+        sat.get_qos()["bandwidth"]["targets"].append("b")
+        assert sat.get_qos()["bandwidth"]["targets"] == ["a"]
+
+    def test_setitem_invalidates(self, sat, qos_calls):
+        sat.get_qos()
+        sat.nodeTemplates.a.x[0]["y"] = 2
+        assert sat.get_qos()["bandwidth"]["y"] == 2
+        assert len(qos_calls) == 2
+
+    def test_to_dict_invalidates(self, sat, qos_calls):
+        sat.get_qos()
+        sat.nodeTemplates._to_dict()["a"]["x"][0]["y"] = 2
+        assert sat.get_qos()["bandwidth"]["y"] == 2
+
+    def test_delitem_invalidates(self, sat, qos_calls):
+        sat.get_qos()
+        del sat["metadata"]
+        sat.get_qos()
+        assert len(qos_calls) == 2
+
+    def test_list_change_invalidates(self, sat, qos_calls):
+        sat.get_qos()
+        sat.nodeTemplates.a.x.insert(0, {"y": 3})
+        assert sat.get_qos()["bandwidth"]["y"] == 3
+
+    def test_raw_change_invalidates(self, sat, monkeypatch):
+        monkeypatch.setattr(
+            "sardou.sardou.tosca_to_ask_dict",
+            lambda raw: sorted(raw["service_template"]["node_templates"]),
+        )
+        assert sat.get_requirements() == ["a"]
+        sat.raw.service_template.node_templates["b"] = {"type": "Compute"}
+        assert sat.get_requirements() == ["a", "b"]
+
+    def test_kind_still_checked(self, sat):
+        with pytest.raises(TypeError):
+            sat.get_capacities()
@@ -0,0 +1,109 @@
+"""Tests for batch validation in sardou.validation."""
+
+import pytest
+
+from sardou import cache
+from sardou.validation import validate_many, validate_template
+
+PROFILE_URL = (
+    "https://raw.githubusercontent.com/Swarmchestrate/tosca/refs/heads/main"
+    "/profiles/eu.swarmchestrate/profile.yaml"
+)
+
+TEMPLATE = (
+    "tosca_definitions_version: tosca_2_0\n"
+    "service_template:\n"
+    "  node_templates:\n"
+    "    {name}: {{}}\n"
+)
+
+
+@pytest.fixture
+def templates(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"app{i}.yaml"
+        path.write_text(TEMPLATE.format(name=f"node{i}"))
+        paths.append(path)
+    return paths
+
+
+class TestValidateMany:
+    def test_results_in_input_order(self, puccini_runs, templates):
+        results = validate_many(templates)
+        assert len(results) == 4
+        assert all(r.returncode == 0 for r in results)
+        assert puccini_runs() == 4
+
+    def test_identical_templates_share_a_run(self, puccini_runs, templates):
+        content = templates[0].read_text()
+        results = validate_many([templates[0], content, content, templates[1]])
+        assert all(results)
+        assert puccini_runs() == 2
+
+    def test_errors_mapped_to_inputs(self, fake_puccini, templates):
+        templates[2].write_text(TEMPLATE.format(name="broken"))
+        errors = {}
+        results = validate_many(
+            [templates[0], "{not: [yaml", templates[2]], errors=errors
+        )
+        assert results[0] is not None
+        assert results[1] is None and results[2] is None
+        assert set(errors) == {1, 2}
+        assert "broken template" in errors[2]
+
+    def test_runs_concurrently(self, puccini_overlap, templates):
+        validate_many(templates, max_workers=4)
+        assert puccini_overlap() > 1
+
+    def test_empty(self, fake_puccini):
+        assert validate_many([]) == []
+
+    def test_imports_resolved_once(self, fake_puccini, monkeypatch):
+        resolved = []
+
+        def resolve_imports(data, **kwargs):
+            resolved.append(data)
+            return cache.resolve_imports(data, **kwargs)
+
+        monkeypatch.setattr("sardou.validation.resolve_imports", resolve_imports)
+        inputs = [
+            f"imports:\n  - url: {PROFILE_URL}\n" + TEMPLATE.format(name=f"node{i}")
+            for i in range(3)
+        ]
+        assert all(validate_many(inputs, locked=False))
+        assert len(resolved) == 1
+        sent = (fake_puccini.parent / "last.yaml").read_text()
+        assert "https://" not in sent
+
+
+class TestStdinTransport:
+    def test_template_streamed_to_puccini(self, fake_puccini, templates):
+        assert validate_template(templates[0])
+        sent = (fake_puccini.parent / "last.yaml").read_text()
+        assert "node0" in sent
+
+    def test_relative_imports_anchored(self, fake_puccini, tmp_path):
+        (tmp_path / "types.yaml").write_text("tosca_definitions_version: tosca_2_0\n")
+        path = tmp_path / "app.yaml"
+        path.write_text(
+            "tosca_definitions_version: tosca_2_0\n"
+            "imports:\n"
+            "  - url: types.yaml\n"
+            "  - types.yaml\n"
+            "service_template: {}\n"
+        )
+        assert validate_template(path)
+        sent = (fake_puccini.parent / "last.yaml").read_text()
+        assert sent.count(str(tmp_path / "types.yaml")) == 2
+
+    def test_missing_relative_import_left_alone(self, fake_puccini, tmp_path):
+        path = tmp_path / "app.yaml"
+        path.write_text(
+            "tosca_definitions_version: tosca_2_0\n"
+            "imports:\n"
+            "  - url: nope.yaml\n"
+            "service_template: {}\n"
+        )
+        validate_template(path)
+        assert "url: nope.yaml" in (fake_puccini.parent / "last.yaml").read_text()
@@ -0,0 +1,93 @@
+"""Time the Python stages of building a Sardou object from a file.
+
+Usage: python tools/bench_construct.py [NODES] [RUNS]
+
+Writes a synthetic SAT with NODES microservices (default: 2000, several
+hundred KB) importing the Swarmchestrate profile, then times each stage
+the constructor goes through before and after Puccini, the way it used to
+(parse for prevalidation, then parse again for ``raw``) and the way it does
+now (one parse feeding both). Puccini itself is not run. Times are medians
+of RUNS (default: 5).
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from sardou import validation
+
+PROFILE_URL = (
+    "https://raw.githubusercontent.com/Swarmchestrate/tosca/refs/heads/main"
+    "/profiles/eu.swarmchestrate/profile.yaml"
+)
+
+
+def synthetic_sat(nodes: int) -> str:
+    lines = [
+        "tosca_definitions_version: tosca_2_0",
+        "imports:",
+        "  - namespace: swch",
+        f"    url: {PROFILE_URL}",
+        "service_template:",
+        "  node_templates:",
+    ]
+    for i in range(nodes):
+        lines += [
+            f"    service_{i}:",
+            "      type: swch:Microservice",
+            "      properties:",
+            f"        image: docker.io/example/service-{i}:1.0",
+            "        replicas: 1",
+            "        labels:",
+            f"          app: service-{i}",
+            "          version: v1",
+            "        ports:",
+            "          - port: 8080",
+            "            targetPort: 8080",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _stages(path: Path, single_parse: bool) -> dict:
+    times = {}
+
+    def timed(stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        times[stage] = time.perf_counter() - start
+        return result
+
+    data = timed("parse", validation.parse_template, path)
+    prepared = timed("prevalidate", validation.prevalidate, path, data=data)
+    timed("serialize", validation._serialize, prepared)
+    if not single_parse:
+        safe = YAML(typ="safe")
+        timed("raw parse", lambda: safe.load(path.read_text()))
+    return times
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sat.yaml"
+        path.write_text(synthetic_sat(nodes))
+        size = path.stat().st_size
+        print(f"{nodes} nodes ({size // 1024} KB), median of {runs}:")
+        for name, single_parse in (("two parses", False), ("one parse", True)):
+            samples = [_stages(path, single_parse) for _ in range(runs)]
+            medians = {
+                stage: statistics.median(s[stage] for s in samples)
+                for stage in samples[0]
+            }
+            print(f"  {name}: {sum(medians.values()) * 1000:9.2f} ms")
+            for stage, seconds in medians.items():
+                print(f"    {stage:12} {seconds * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
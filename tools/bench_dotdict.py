@@ -0,0 +1,143 @@
+"""Compare the lazy DotDict with the eager one it replaced.
+
+Usage: python tools/bench_dotdict.py [NODES] [RUNS]
+
+Builds a DotDict over Puccini-shaped output with NODES node templates
+(default: 5000) and times construction, reading one node, and
+``_to_dict()``; times are medians of RUNS (default: 5) and building
+includes decoding the JSON. Each variant then runs once more in a fresh
+process to report how much it grows peak RSS (read from /proc, so
+Linux only). Run from the repository root.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sardou.sardou import DotDict
+
+_TYPE = "eu.swarmchestrate:0.1::Microservice"
+
+
+class EagerDotDict:
+    """DotDict as it was: every nested dict converted up front."""
+
+    def __init__(self, **entries):
+        for k, v in entries.items():
+            if isinstance(v, dict):
+                v = EagerDotDict(**v)
+            elif isinstance(v, list):
+                v = [EagerDotDict(**i) if isinstance(i, dict) else i for i in v]
+            self.__dict__[k] = v
+
+    def _to_dict(self):
+        result = {}
+        for key, value in self.__dict__.items():
+            if isinstance(value, EagerDotDict):
+                result[key] = value._to_dict()
+            elif isinstance(value, list):
+                result[key] = [
+                    v._to_dict() if isinstance(v, EagerDotDict) else v for v in value
+                ]
+            else:
+                result[key] = value
+        return result
+
+
+def puccini_output(nodes: int) -> str:
+    return json.dumps(
+        {
+            "metadata": {"kind": "SAT"},
+            "nodeTemplates": {
+                f"service_{i}": {
+                    "metadata": {},
+                    "description": "",
+                    "types": {_TYPE: {"parent": "tosca::Root"}},
+                    "directives": [],
+                    "properties": {
+                        "image": {"$primitive": f"docker.io/example/service-{i}:1.0"},
+                        "replicas": {"$primitive": 1},
+                        "ports": {"$list": [{"$map": [{"$primitive": 8080}]}]},
+                    },
+                    "attributes": {},
+                    "requirements": [{"name": "host", "nodeTemplateName": "vm"}],
+                    "capabilities": {},
+                    "interfaces": {},
+                    "artifacts": {},
+                }
+                for i in range(nodes)
+            },
+        }
+    )
+
+
+def build(variant: str, text: str):
+    data = json.loads(text)
+    if variant == "eager":
+        return EagerDotDict(**data)
+    return DotDict._wrap(data)
+
+
+def _median(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def peak_rss() -> int:
+    """Peak RSS of this process in KiB (Linux only)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmHWM not reported")
+
+
+def _peak_rss_growth(variant: str, path: Path) -> int:
+    """How much building *variant* from the JSON in *path* grows peak RSS
+    (KiB), measured in a fresh process."""
+    code = (
+        "import sys; sys.path.insert(0, 'tools'); import bench_dotdict as b; "
+        f"text = open({str(path)!r}).read(); "
+        "before = b.peak_rss(); "
+        f"d = b.build({variant!r}, text); d.nodeTemplates.service_0.types; "
+        "print(b.peak_rss() - before)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return int(out.stdout)
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    text = puccini_output(nodes)
+    path = Path(tempfile.mkdtemp()) / "output.json"
+    path.write_text(text)
+    print(f"{nodes} nodes ({len(text) // 1024} KB of JSON), median of {runs}:")
+    for variant in ("eager", "lazy"):
+        built = build(variant, text)
+        construct = _median(lambda v=variant: build(v, text), runs)
+        read = _median(lambda d=built: d.nodeTemplates.service_0.properties, runs)
+        to_dict = _median(built._to_dict, runs)
+        rss = _peak_rss_growth(variant, path)
+        print(
+            f"  {variant:5}  build {construct * 1000:8.2f} ms"
+            f"  read {read * 1e6:7.2f} us"
+            f"  _to_dict {to_dict * 1000:8.2f} ms"
+            f"  peak RSS +{rss / 1024:.1f} MiB"
+        )
+    path.unlink()
+    path.parent.rmdir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Time decoding Puccini's output as YAML and as JSON.
+
+Usage: python tools/bench_load.py [RUNS]
+
+Measures templates/BookInfo.yaml and a synthetic SAT with 1000
+microservices. With Puccini installed, each template is parsed once in each
+output format and the real output is decoded RUNS times (default: 5).
+Without it, output of the same shape is synthesized from the template, so
+the numbers show the decoders rather than Puccini's exact output.
+"""
+
+import io
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from sardou import validation
+
+yaml = YAML(typ="safe")
+
+BOOKINFO = Path("templates/BookInfo.yaml")
+_TYPE = "eu.swarmchestrate:0.1::Microservice"
+
+
+def synthetic_sat(nodes: int) -> dict:
+    template = validation.yaml.load(BOOKINFO.read_text())
+    template["service_template"]["node_templates"] = {
+        f"service_{i}": {
+            "type": "swch:Microservice",
+            "properties": {
+                "image": f"docker.io/example/service-{i}:1.0",
+                "replicas": 1,
+                "labels": {"app": f"service-{i}", "version": "v1"},
+                "ports": [{"port": 8080, "targetPort": 8080}],
+            },
+        }
+        for i in range(nodes)
+    }
+    template["service_template"].pop("policies", None)
+    return template
+
+
+def _normalized(template: dict) -> dict:
+    """Something shaped like Puccini's normalized output for *template*."""
+    nodes = template["service_template"]["node_templates"]
+    return {
+        "metadata": dict(template.get("metadata", {})),
+        "nodeTemplates": {
+            name: {
+                "metadata": {},
+                "description": "",
+                "types": {_TYPE: {"parent": "tosca::Root"}},
+                "directives": node.get("directives", []),
+                "properties": {
+                    key: {"$primitive": value}
+                    for key, value in (node.get("properties") or {}).items()
+                },
+                "attributes": {},
+                "requirements": [],
+                "capabilities": node.get("capabilities", {}),
+                "interfaces": {},
+                "artifacts": {},
+            }
+            for name, node in nodes.items()
+        },
+        "groups": {},
+        "policies": {},
+        "workflows": {},
+    }
+
+
+def puccini_outputs(template: dict) -> tuple[str, str, str]:
+    """``(yaml, json, source)`` outputs for *template*."""
+    if shutil.which(validation.PUCCINI_CMD):
+        stream = io.BytesIO()
+        validation.yaml.dump(validation.prevalidate(template), stream)
+        outputs = []
+        for flags in (["--format", "yaml"], ["--format", "json", "--pretty=false"]):
+            result = subprocess.run(
+                [validation.PUCCINI_CMD, "parse"] + validation.PUCCINI_FLAGS + flags,
+                input=stream.getvalue(),
+                check=True,
+                capture_output=True,
+            )
+            outputs.append(result.stdout.decode())
+        return outputs[0], outputs[1], "puccini"
+
+    # Plain types only, as Puccini would emit.
+    normalized = json.loads(json.dumps(_normalized(template), default=str))
+    stream = io.StringIO()
+    yaml.dump(normalized, stream)
+    return stream.getvalue(), json.dumps(normalized), "synthesized"
+
+
+def _time(fn, text, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cases = {
+        BOOKINFO.name: validation.yaml.load(BOOKINFO.read_text()),
+        "synthetic (1000 nodes)": synthetic_sat(1000),
+    }
+    for name, template in cases.items():
+        yaml_out, json_out, source = puccini_outputs(template)
+        yaml_time = _time(yaml.load, yaml_out, runs)
+        json_time = _time(json.loads, json_out, runs)
+        print(f"{name}, {source} output, median of {runs}:")
+        print(f"  yaml: {yaml_time * 1000:9.2f} ms  ({len(yaml_out)} bytes)")
+        print(f"  json: {json_time * 1000:9.2f} ms  ({len(json_out)} bytes)")
+        print(f"  {yaml_time / json_time:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
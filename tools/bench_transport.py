@@ -0,0 +1,65 @@
+"""Per-call latency of handing a template to Puccini by temp file vs stdin.
+
+Usage: python tools/bench_transport.py [TEMPLATE] [RUNS] [COMMAND]
+
+TEMPLATE (default: templates/BookInfo.yaml) is prevalidated once, then
+passed RUNS times (default: 50) to COMMAND (default: Puccini) both ways:
+dumped to a NamedTemporaryFile whose path is given on the command line, as
+validate_template used to, and streamed over stdin, as it does now.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from sardou import validation
+
+
+def _via_temp_file(cmd, yaml_data):
+    with NamedTemporaryFile() as temp_file:
+        validation.yaml.dump(yaml_data, temp_file)
+        temp_file.flush()
+        subprocess.run(
+            [cmd, "parse", temp_file.name] + validation.PUCCINI_FLAGS,
+            check=False,
+            capture_output=True,
+        )
+
+
+def _via_stdin(cmd, yaml_data):
+    subprocess.run(
+        [cmd, "parse"] + validation.PUCCINI_FLAGS,
+        input=validation._serialize(yaml_data),
+        check=False,
+        capture_output=True,
+    )
+
+
+def _time(fn, runs, *args):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    template = Path(sys.argv[1] if len(sys.argv) > 1 else "templates/BookInfo.yaml")
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    cmd = sys.argv[3] if len(sys.argv) > 3 else validation.PUCCINI_CMD
+
+    yaml_data = validation.prevalidate(template)
+    temp_file = _time(_via_temp_file, runs, cmd, yaml_data)
+    stdin = _time(_via_stdin, runs, cmd, yaml_data)
+    print(f"{template}, {runs} runs, median per call:")
+    print(f"temp file: {temp_file * 1000:8.2f} ms")
+    print(f"stdin:     {stdin * 1000:8.2f} ms")
+    print(f"saved:     {(temp_file - stdin) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Throughput of per-file validate_template against batched validate_many.
+
+Usage: python tools/bench_validation.py [TEMPLATE_DIR] [COPIES]
+
+Every template under TEMPLATE_DIR (default: templates/) is validated
+COPIES times (default: 10), first one call at a time, then as one batch.
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+from sardou.validation import validate_many, validate_template
+
+
+def main():
+    templates_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "templates")
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    logging.basicConfig(level=logging.WARNING)
+
+    # Distinct documents, so batching cannot just deduplicate them.
+    files = sorted(templates_dir.rglob("*.yaml"))
+    inputs = [
+        f"{path.read_text()}\n# copy {i}\n" for path in files for i in range(copies)
+    ]
+    if not inputs:
+        sys.exit(f"No YAML files found under {templates_dir}/")
+
+    # Warm the import cache so both paths measure validation only.
+    validate_template(inputs[0])
+
+    start = time.perf_counter()
+    serial = [validate_template(text) for text in inputs]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = validate_many(inputs)
+    batch_time = time.perf_counter() - start
+
+    assert [bool(r) for r in serial] == [bool(r) for r in batched]
+    n = len(inputs)
+    print(f"{n} templates ({len(files)} files x {copies})")
+    print(f"validate_template: {serial_time:7.2f}s  {n / serial_time:7.1f} /s")
+    print(f"validate_many:     {batch_time:7.2f}s  {n / batch_time:7.1f} /s")
+    print(f"speed-up:          {serial_time / batch_time:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()